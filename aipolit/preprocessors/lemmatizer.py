@@ -1,5 +1,6 @@
 import spacy
 import re
+from typing import Iterable, List, Optional, Tuple
 from aipolit.preprocessors.tweet_cleaners import preserve_tokens, restore_tokens
 
 
@@ -62,3 +63,27 @@ class PLLemmatizer:
 
         result_text = " ".join(result)
         return result_text
+
+    def lemmatize_many_with_offsets(
+            self,
+            texts: Iterable[str],
+            batch_size: int = 64,
+            n_process: Optional[int] = None) -> List[List[Tuple[str, int, int]]]:
+        """
+        Runs lemmatization of many texts in batches (nlp.pipe), optionally in n_process processes.
+        Useful for large corpora (e.g. all utts of transcripts), where calling process_text for each text is slow.
+
+        Returns for each text list of (lowercased lemma, start, end), where start and end are character offsets
+        of the token in the text. Punctuation and whitespace tokens are skipped.
+        """
+        result = []
+        for doc in self.model.pipe(texts, batch_size=batch_size, n_process=n_process if n_process else 1):
+            tokens = []
+            for token in doc:
+                if token.is_punct or token.is_space:
+                    continue
+                # sometimes spacy returns two forms, hotfix (the same as in process_text)
+                lemma = token.lemma_.split(" ")[0].lower()
+                tokens.append((lemma, token.idx, token.idx + len(token.text)))
+            result.append(tokens)
+        return result
@@ -19,6 +19,14 @@ def remove_users_from_beg(text):
     return text
 
 
+def remove_users_from_beg_column(texts):
+    """
+    Vectorised remove_users_from_beg for pandas Series of strings (e.g. text column of columnar PolitTweetsData).
+    Missing values are kept.
+    """
+    return texts.str.replace(USERNAME_BEGIN_REGEX.pattern, "", regex=True)
+
+
 def preserve_tokens(text, with_tt_usernames_and_hashes=True, with_emojis=True, surround_spaces=False):
     """
     Returns text with some entities replaced with keywords.
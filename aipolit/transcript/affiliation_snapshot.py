@@ -0,0 +1,139 @@
+import os
+import pickle
+import hashlib
+import logging
+from typing import Optional
+
+from aipolit.utils.globals import AIPOLIT_CACHE_DIR
+from aipolit.transcript import person_affiliation as person_affiliation_module
+from aipolit.transcript import transcript_speaker_affiliation as transcript_speaker_affiliation_module
+from aipolit.transcript.person_affiliation import PersonAffiliation
+from aipolit.transcript.transcript_speaker_affiliation import TranscriptSpeakerAffiliation
+
+
+class AffiliationSnapshot:
+    """
+    Compiled snapshot of PersonAffiliation JSON file stored in AIPOLIT_CACHE_DIR.
+
+    Snapshot is pickled TranscriptSpeakerAffiliation (with its PersonAffiliation), so it keeps everything
+    which is computed on startup: persons with compiled interval arrays of clubs (Person.compile_clubs),
+    name_to_entry / normalized_name_to_name dicts and name indexes used by normalize_name.
+    Loading it is a single pickle load instead of parsing JSON, dates and building indexes again.
+
+    Snapshot is valid if md5 hash of the JSON file content did not change and the layout of pickled classes
+    is the same (md5 of sources of person_affiliation and transcript_speaker_affiliation modules),
+    otherwise it is built again from JSON.
+
+    If cache dir can't be written (e.g. read only), then snapshot is not saved (JSON is parsed as without snapshot).
+    """
+    MY_CACHE_DIR = "person-affiliation-snapshots"
+    SNAPSHOT_FORMAT_VERSION = 2
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = os.path.join(AIPOLIT_CACHE_DIR, self.MY_CACHE_DIR)
+        self.cache_dir = cache_dir
+
+    def load(self, fixed_filepath: Optional[str] = None) -> TranscriptSpeakerAffiliation:
+        """
+        Returns TranscriptSpeakerAffiliation for given affiliations JSON file (default sejm.json if not defined)
+        loaded from the snapshot. If there is no valid snapshot, then it is created from JSON and saved.
+        """
+        data_fp = PersonAffiliation.get_data_filepath(fixed_filepath)
+        content_hash = self._get_content_hash(data_fp)
+        snapshot_fp = self._get_snapshot_filepath(data_fp)
+
+        transcript_speaker_affiliation = None
+        if os.path.isfile(snapshot_fp):
+            try:
+                with open(snapshot_fp, "rb") as f:
+                    meta = pickle.load(f)
+                    if self._is_snapshot_valid(meta, content_hash):
+                        transcript_speaker_affiliation = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+                logging.warning("AffiliationSnapshot: broken snapshot %s for %s (%s)", snapshot_fp, data_fp, e)
+
+        if transcript_speaker_affiliation is not None:
+            logging.debug("AffiliationSnapshot: HIT %s", data_fp)
+            return transcript_speaker_affiliation
+
+        logging.debug("AffiliationSnapshot: MISS %s", data_fp)
+        transcript_speaker_affiliation = TranscriptSpeakerAffiliation(PersonAffiliation(fixed_filepath=data_fp))
+        try:
+            self.put(data_fp, transcript_speaker_affiliation, content_hash)
+        except OSError as e:
+            logging.warning("AffiliationSnapshot: can't save snapshot in %s (%s), it is not cached", self.cache_dir, e)
+        return transcript_speaker_affiliation
+
+    def put(self, data_fp: str, transcript_speaker_affiliation: TranscriptSpeakerAffiliation, content_hash: str):
+        meta = {
+            'version': self.SNAPSHOT_FORMAT_VERSION,
+            'layout_hash': get_layout_hash(),
+            'filepath': os.path.abspath(data_fp),
+            'content_hash': content_hash,
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        snapshot_fp = self._get_snapshot_filepath(data_fp)
+        tmp_fp = f"{snapshot_fp}.{os.getpid()}.tmp"
+        with open(tmp_fp, "wb") as f:
+            pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(transcript_speaker_affiliation, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_fp, snapshot_fp)
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".pickle"):
+                os.remove(os.path.join(self.cache_dir, filename))
+
+    def _is_snapshot_valid(self, meta, content_hash: str) -> bool:
+        if meta.get('version') != self.SNAPSHOT_FORMAT_VERSION:
+            return False
+        if meta.get('layout_hash') != get_layout_hash():
+            return False
+        return meta['content_hash'] == content_hash
+
+    def _get_snapshot_filepath(self, data_fp: str) -> str:
+        path_hash = hashlib.md5(os.path.abspath(data_fp).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{path_hash}.pickle")
+
+    def _get_content_hash(self, data_fp: str) -> str:
+        with open(data_fp, "rb") as f:
+            return hashlib.md5(f.read()).hexdigest()
+
+
+_layout_hash = None
+
+
+def get_layout_hash() -> str:
+    """
+    Returns md5 of sources of modules with pickled classes (Person, PersonAffiliation, TranscriptSpeakerAffiliation),
+    so snapshots created by other version of the code are not loaded.
+    """
+    global _layout_hash
+    if _layout_hash is None:
+        md5 = hashlib.md5()
+        for module in [person_affiliation_module, transcript_speaker_affiliation_module]:
+            with open(module.__file__, "rb") as f:
+                md5.update(f.read())
+        _layout_hash = md5.hexdigest()
+    return _layout_hash
+
+
+def load_transcript_speaker_affiliation(
+        fixed_filepath: Optional[str] = None,
+        use_snapshot: bool = False,
+        snapshot_cache_dir: Optional[str] = None) -> TranscriptSpeakerAffiliation:
+    """
+    Returns TranscriptSpeakerAffiliation (with PersonAffiliation) for given affiliations JSON file
+    (default sejm.json if not defined).
+
+    If use_snapshot is True, then it is loaded from AffiliationSnapshot stored in snapshot_cache_dir
+    (by default in AIPOLIT_CACHE_DIR). It saves only few ms of startup (~500 persons),
+    so it is useful mostly for scripts which are run many times (e.g. in loops of shell scripts).
+    """
+    if use_snapshot:
+        return AffiliationSnapshot(cache_dir=snapshot_cache_dir).load(fixed_filepath=fixed_filepath)
+    return TranscriptSpeakerAffiliation(PersonAffiliation(fixed_filepath=fixed_filepath))
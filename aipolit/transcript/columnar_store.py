@@ -0,0 +1,596 @@
+import os
+import logging
+from collections import Counter
+from datetime import date
+from typing import Iterable, List, Optional, Union, Iterator, Tuple
+import numpy as np
+from hipisejm.stenparser.transcript import SessionTranscript, SpeechReaction, SpeechInterruption
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from aipolit.transcript.symbol_table import TranscriptSymbolTable
+from aipolit.utils.date import texts_to_dates, date_obj_unk_to_text
+from aipolit.utils.string_pool import StringPool, NO_ID
+
+
+# utt type codes (index in UTT_TYPE_NAMES, names are the same as returned by occurrence_counter.get_utt_type)
+UTT_TYPE_NORM = 0
+UTT_TYPE_REACTION = 1
+UTT_TYPE_INTERRUPT = 2
+UTT_TYPE_NAMES = ['norm', 'reaction', 'interrupt']
+
+# kinds of strings dumped by ColumnarTranscriptStore.iter_dump
+DUMP_KIND_SPEECH_SPEAKER = 0
+DUMP_KIND_INTERRUPT_BY = 1
+DUMP_KIND_TEXT = 2
+
+# keys of AVAILABLE_TO_DUMP the dumped string comes from (check iter_dump_records)
+DUMPED_AS_NAMES = ['speech_speaker', 'utt_interrupt_by', 'utt_norm', 'utt_reaction', 'utt_interrupt']
+
+# keys available in ColumnarTranscriptStore.group_count
+AVAILABLE_GROUP_BY = {
+    'speaker',  # raw name of the speech speaker
+    'canon_name',  # canon name of the speech speaker (None if speaker can't be assigned to any person)
+    'affiliation',  # affiliation of the speech speaker (in the session date)
+    'interrupted_by',  # raw name of the person who interrupted (None for other utts)
+    'interrupted_by_affiliation',  # affiliation of the person who interrupted
+    'utt_type',  # one of UTT_TYPE_NAMES
+    'session',  # XML filename of the session
+    'date',  # session date (YYYY-MM-DD)
+    'month',  # month of the session (YYYY-MM)
+}
+
+# keys available in ColumnarTranscriptStore.group_count_dump
+AVAILABLE_DUMP_GROUP_BY = {
+    'text',  # dumped string itself (e.g. name of the person who interrupted for utt_interrupt_by)
+    'dumped_as',  # one of DUMPED_AS_NAMES
+    'speaker',  # speaker of the dumped string (check iter_dump_records)
+    'canon_name',  # canon name of the speaker
+    'affiliation',  # affiliation of the speaker (in the session date)
+    'session',  # XML filename of the session
+    'date',  # session date (YYYY-MM-DD)
+    'month',  # month of the session (YYYY-MM)
+}
+
+_NAT_INT = np.datetime64('NaT', 'D').astype(np.int64)
+
+
+def date_range_mask(dates: np.ndarray, date_from: Optional[Union[str, date]], date_to: Optional[Union[str, date]]) -> np.ndarray:
+    """
+    Returns boolean mask of datetime64[D] array: date in range (both ends inclusive, str or date), NaT is not matched.
+    """
+    mask = ~np.isnat(dates)
+    if date_from is not None:
+        mask &= dates >= np.datetime64(date_obj_unk_to_text(date_from), 'D')
+    if date_to is not None:
+        mask &= dates <= np.datetime64(date_obj_unk_to_text(date_to), 'D')
+    return mask
+
+
+def utt_type_mask(utt_types: Iterable[str]) -> np.ndarray:
+    """
+    Returns boolean array indexed by utt type code, True for given utt types (names from UTT_TYPE_NAMES).
+    """
+    mask = np.zeros(len(UTT_TYPE_NAMES), dtype=bool)
+    for utt_type in utt_types:
+        mask[UTT_TYPE_NAMES.index(utt_type)] = True
+    return mask
+
+
+class ColumnarTranscriptStore:
+    """
+    In-memory columnar representation of the transcripts for analytics.
+
+    There are three tables kept as NumPy arrays (all strings are kept in StringPools of TranscriptSymbolTable
+    or in texts pool, columns keep only ids):
+    - sessions - one row per transcript: session_dates (datetime64[D], NaT if unknown) and session_filenames
+    - speeches - one row per SessionSpeech: speech_session, speech_index (in session_content), speech_speaker,
+                 speech_first_utt and speech_utt_count (range of rows in utt table)
+    - utts - one row per utterance: utt_session, utt_session_date, utt_speech (row in speech table),
+             utt_speech_index, utt_speaker (speaker of the speech), utt_type (UTT_TYPE_* code),
+             utt_interrupted_by (NO_ID if not interruption) and utt_text
+
+    Rows are in the same order as in transcripts, so filters are boolean masks computed for whole columns
+    (check select_speeches, select_utts) and the result is the same as for looping over transcript objects.
+    """
+    def __init__(self, symbol_table: Optional[TranscriptSymbolTable] = None):
+        """
+        symbol_table - if defined, then ids of speakers, canon names and clubs are taken from this table
+                       (so they can be compared with ids in other results sharing the table)
+        """
+        self.symbol_table = symbol_table if symbol_table is not None else TranscriptSymbolTable()
+        # raw speaker names (speech speakers and interrupting persons)
+        self.names = self.symbol_table.speakers
+        # texts of utts (the same reaction, e.g. "Oklaski", is stored once)
+        self.texts = StringPool()
+        # affiliations resolved by get_speech_affiliation_ids
+        self.clubs = self.symbol_table.clubs
+
+        self.session_filenames = []
+        self.session_dates = np.array([], dtype='datetime64[D]')
+
+        self.speech_session = np.array([], dtype=np.int32)
+        self.speech_index = np.array([], dtype=np.int32)
+        self.speech_speaker = np.array([], dtype=np.int32)
+        self.speech_first_utt = np.array([], dtype=np.int64)
+        self.speech_utt_count = np.array([], dtype=np.int32)
+
+        self.utt_session = np.array([], dtype=np.int32)
+        self.utt_session_date = np.array([], dtype='datetime64[D]')
+        self.utt_speech = np.array([], dtype=np.int64)
+        self.utt_speech_index = np.array([], dtype=np.int32)
+        self.utt_speaker = np.array([], dtype=np.int32)
+        self.utt_type = np.array([], dtype=np.int8)
+        self.utt_interrupted_by = np.array([], dtype=np.int32)
+        self.utt_text = np.array([], dtype=np.int32)
+
+        # affiliations are resolved once for given SpeakerAffiliationTable
+        self.cache = dict()
+        self.cache['affiliation_table'] = None
+        self.cache['name_session_to_club'] = dict()
+
+    @classmethod
+    def from_transcripts(
+            cls,
+            transcripts: Iterable[SessionTranscript],
+            filepaths: Optional[List[str]] = None,
+            symbol_table: Optional[TranscriptSymbolTable] = None) -> 'ColumnarTranscriptStore':
+        """
+        Builds store from given transcripts (can be any iterable, e.g. generator from iter_transcripts).
+        If filepaths are defined (in the same order as transcripts), then session filenames are kept in the store.
+        """
+        store = cls(symbol_table=symbol_table)
+
+        session_date_texts = []
+        speech_columns = ([], [], [], [], [])
+        utt_columns = ([], [], [], [], [], [])
+
+        for session_idx, transcript in enumerate(transcripts):
+            session_date_texts.append(transcript.session_date)
+            store.session_filenames.append(os.path.basename(filepaths[session_idx]) if filepaths is not None else None)
+            store._add_session(session_idx, transcript, speech_columns, utt_columns)
+
+        store._set_session_dates(session_date_texts)
+
+        (store.speech_session, store.speech_index, store.speech_speaker,
+         store.speech_first_utt, store.speech_utt_count) = [
+            np.array(column, dtype=dtype)
+            for column, dtype in zip(speech_columns, [np.int32, np.int32, np.int32, np.int64, np.int32])]
+
+        (store.utt_speech, store.utt_speech_index, store.utt_speaker,
+         store.utt_type, store.utt_interrupted_by, store.utt_text) = [
+            np.array(column, dtype=dtype)
+            for column, dtype in zip(utt_columns, [np.int64, np.int32, np.int32, np.int8, np.int32, np.int32])]
+        store.utt_session = store.speech_session[store.utt_speech]
+        store.utt_session_date = store.session_dates[store.utt_session]
+
+        logging.info(
+            "ColumnarTranscriptStore: loaded %i sessions, %i speeches, %i utts (%i distinct texts)",
+            store.count_sessions(), store.count_speeches(), store.count_utts(), len(store.texts))
+        return store
+
+    def _add_session(self, session_idx, transcript, speech_columns, utt_columns):
+        speech_session, speech_index, speech_speaker, speech_first_utt, speech_utt_count = speech_columns
+        utt_speech, utt_speech_index, utt_speaker, utt_type, utt_interrupted_by, utt_text = utt_columns
+
+        for index_in_session, speech in enumerate(transcript.session_content):
+            speech_row = len(speech_session)
+            speaker_id = self.names.add(speech.speaker)
+
+            speech_session.append(session_idx)
+            speech_index.append(index_in_session)
+            speech_speaker.append(speaker_id)
+            speech_first_utt.append(len(utt_speech))
+            speech_utt_count.append(len(speech.content))
+
+            for utt in speech.content:
+                utt_speech.append(speech_row)
+                utt_speech_index.append(index_in_session)
+                utt_speaker.append(speaker_id)
+                if isinstance(utt, str):
+                    utt_type.append(UTT_TYPE_NORM)
+                    utt_interrupted_by.append(NO_ID)
+                    utt_text.append(self.texts.add(utt))
+                elif isinstance(utt, SpeechReaction):
+                    utt_type.append(UTT_TYPE_REACTION)
+                    utt_interrupted_by.append(NO_ID)
+                    utt_text.append(self.texts.add(utt.reaction_text))
+                elif isinstance(utt, SpeechInterruption):
+                    utt_type.append(UTT_TYPE_INTERRUPT)
+                    utt_interrupted_by.append(self.names.add_optional(utt.interrupted_by_speaker))
+                    utt_text.append(self.texts.add(utt.text))
+                else:
+                    raise ValueError(f"Unknown object type utt: {utt}")
+
+    def _set_session_dates(self, session_date_texts: List[Optional[str]]):
+        self.session_dates = np.full(len(session_date_texts), np.datetime64('NaT'), dtype='datetime64[D]')
+        known = [i for i, date_txt in enumerate(session_date_texts) if date_txt is not None]
+        if len(known) > 0:
+            self.session_dates[known] = texts_to_dates([session_date_texts[i] for i in known], as_numpy=True)
+
+    def count_sessions(self) -> int:
+        return len(self.session_dates)
+
+    def count_speeches(self) -> int:
+        return len(self.speech_session)
+
+    def count_utts(self) -> int:
+        return len(self.utt_type)
+
+    def get_session_date(self, session_idx: int) -> Optional[date]:
+        """
+        Returns date object (or None if date is unknown).
+        """
+        return self.session_dates[session_idx].tolist()
+
+    def select_speeches(
+            self,
+            date_from: Optional[Union[str, date]] = None,
+            date_to: Optional[Union[str, date]] = None,
+            speakers: Optional[Iterable[str]] = None,
+            affiliations: Optional[Iterable[str]] = None,
+            speaker_affiliation_table: Optional[SpeakerAffiliationTable] = None) -> np.ndarray:
+        """
+        Returns boolean mask over speeches which meet all given criteria:
+        - date_from, date_to - session date in range (both ends inclusive, str or date), sessions without date are skipped
+        - speakers - speech speaker is one of given (raw) names
+        - affiliations - affiliation of the speech speaker (in the session date) is one of given,
+                         speaker_affiliation_table is required
+        """
+        mask = np.ones(self.count_speeches(), dtype=bool)
+
+        if date_from is not None or date_to is not None:
+            session_mask = date_range_mask(self.session_dates, date_from, date_to)
+            mask &= session_mask[self.speech_session]
+
+        if speakers is not None:
+            mask &= np.isin(self.speech_speaker, self.names.find_ids(speakers))
+
+        if affiliations is not None:
+            assert speaker_affiliation_table is not None, "speaker_affiliation_table is required to filter by affiliations"
+            club_ids = self.get_speech_affiliation_ids(speaker_affiliation_table)
+            mask &= np.isin(club_ids, self.clubs.find_ids(affiliations))
+
+        return mask
+
+    def select_utts(self, speech_mask: Optional[np.ndarray] = None, utt_types: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Returns boolean mask over utts from selected speeches (speech_mask from select_speeches)
+        which are of given types (from UTT_TYPE_NAMES).
+        """
+        mask = np.ones(self.count_utts(), dtype=bool)
+        if speech_mask is not None:
+            mask &= speech_mask[self.utt_speech]
+        if utt_types is not None:
+            mask &= utt_type_mask(utt_types)[self.utt_type]
+        return mask
+
+    def iter_dump(self, what_to_dump: Iterable[str], speech_mask: Optional[np.ndarray] = None) -> Iterator[Optional[str]]:
+        """
+        Yields strings for TranscriptQuery dump (what_to_dump are keys of AVAILABLE_TO_DUMP) from selected speeches
+        in the same order as TranscriptQuery does for transcript objects.
+        """
+        kinds, rows, ids = self._get_dump_rows(what_to_dump, speech_mask)
+        for kind, string_id in zip(kinds.tolist(), ids.tolist()):
+            if kind == DUMP_KIND_TEXT:
+                yield self.texts.get_string(string_id)
+            else:
+                yield self.names.get_string(string_id)
+
+    def iter_dump_records(
+            self,
+            what_to_dump: Iterable[str],
+            speech_mask: Optional[np.ndarray] = None) -> Iterator[Tuple[Optional[str], str, Optional[str], str]]:
+        """
+        The same as iter_dump, but yields tuples: (string, dumped_as, speaker, session_date), where:
+        - dumped_as - key of AVAILABLE_TO_DUMP the string comes from (utt_norm, utt_reaction or utt_interrupt for texts)
+        - speaker - speech speaker for speech_speaker and utt_norm, the person who interrupted for utt_interrupt
+                    and utt_interrupt_by, None for utt_reaction (as get_speaker_for_utt)
+        - session_date - YYYY-MM-DD (None if unknown)
+        """
+        kinds, rows, ids = self._get_dump_rows(what_to_dump, speech_mask)
+        dumped_as, speakers, sessions = self._get_dump_columns(kinds, rows)
+        dates = self.session_dates[sessions]
+
+        for kind, string_id, dumped_as_code, speaker_id, session_date in zip(
+                kinds.tolist(), ids.tolist(), dumped_as.tolist(), speakers.tolist(), dates.tolist()):
+            if kind == DUMP_KIND_TEXT:
+                txt = self.texts.get_string(string_id)
+            else:
+                txt = self.names.get_string(string_id)
+            yield txt, DUMPED_AS_NAMES[dumped_as_code], self.names.get_string(speaker_id), date_obj_unk_to_text(session_date)
+
+    def group_count_dump(
+            self,
+            what_to_dump: Iterable[str],
+            group_by: List[str],
+            speech_mask: Optional[np.ndarray] = None,
+            speaker_affiliation_table: Optional[SpeakerAffiliationTable] = None) -> Counter:
+        """
+        Counts strings which would be dumped by iter_dump, grouped by given keys (from AVAILABLE_DUMP_GROUP_BY).
+        Returns Counter: tuple of key values (in group_by order) -> number of dumped strings.
+        Speaker of the dumped string is the same as in iter_dump_records.
+
+        E.g. the same as ranking: ./bin/aipolit-transcript-query.py -w utt_interrupt_by | sort | uniq -c
+            store.group_count_dump(['utt_interrupt_by'], ['text'])
+        """
+        for key in group_by:
+            assert key in AVAILABLE_DUMP_GROUP_BY, f"Unknown group_by key: {key}"
+
+        kinds, rows, ids = self._get_dump_rows(what_to_dump, speech_mask)
+        dumped_as, speakers, sessions = self._get_dump_columns(kinds, rows)
+
+        codes = []
+        decoders = []
+        for key in group_by:
+            if key == 'text':
+                # names and texts are in separate pools, so kind is kept in the lowest bit
+                codes.append(ids.astype(np.int64) * 2 + (kinds == DUMP_KIND_TEXT))
+                decoders.append(self._decode_dumped_string)
+            elif key == 'dumped_as':
+                codes.append(dumped_as)
+                decoders.append(lambda code: DUMPED_AS_NAMES[code])
+            elif key == 'speaker':
+                codes.append(speakers)
+                decoders.append(self.names.get_string)
+            elif key == 'canon_name':
+                assert speaker_affiliation_table is not None, f"speaker_affiliation_table is required to group by {key}"
+                codes.append(self._get_name_canon_ids(speaker_affiliation_table)[speakers])
+                decoders.append(self.symbol_table.get_canon_name)
+            elif key == 'affiliation':
+                assert speaker_affiliation_table is not None, f"speaker_affiliation_table is required to group by {key}"
+                codes.append(self._get_affiliation_ids(speakers, sessions, speaker_affiliation_table))
+                decoders.append(self.clubs.get_string)
+            elif key == 'session':
+                codes.append(sessions)
+                decoders.append(lambda code: self.session_filenames[code])
+            elif key == 'date':
+                codes.append(self.session_dates[sessions].astype(np.int64))
+                decoders.append(lambda code: self._decode_datetime(code, 'D'))
+            else:
+                codes.append(self.session_dates[sessions].astype('datetime64[M]').astype(np.int64))
+                decoders.append(lambda code: self._decode_datetime(code, 'M'))
+
+        return self._count_rows(codes, decoders)
+
+    def get_speech_affiliation_ids(self, speaker_affiliation_table: SpeakerAffiliationTable) -> np.ndarray:
+        """
+        Returns array of club ids (in self.clubs, NO_ID if unknown) of the speech speaker for each speech.
+        """
+        return self._get_affiliation_ids(self.speech_speaker, self.speech_session, speaker_affiliation_table)
+
+    def get_speech_canon_ids(self, speaker_affiliation_table: SpeakerAffiliationTable) -> np.ndarray:
+        """
+        Returns array of canon name ids (in self.symbol_table.canon_names, NO_ID if unknown) of the speech speaker
+        for each speech.
+        """
+        return self._get_name_canon_ids(speaker_affiliation_table)[self.speech_speaker]
+
+    def get_utt_interrupted_by_affiliation_ids(self, speaker_affiliation_table: SpeakerAffiliationTable) -> np.ndarray:
+        """
+        Returns array of club ids (in self.clubs, NO_ID if unknown) of the person who interrupted for each utt.
+        """
+        return self._get_affiliation_ids(self.utt_interrupted_by, self.utt_session, speaker_affiliation_table)
+
+    def group_count(
+            self,
+            group_by: List[str],
+            utt_mask: Optional[np.ndarray] = None,
+            speaker_affiliation_table: Optional[SpeakerAffiliationTable] = None) -> Counter:
+        """
+        Counts utts (selected by utt_mask) grouped by given keys (from AVAILABLE_GROUP_BY).
+        Returns Counter: tuple of key values (in group_by order) -> number of utts.
+
+        E.g. number of interruptions per affiliation of the interrupting person per month:
+            utt_mask = store.select_utts(utt_types=['interrupt'])
+            store.group_count(['interrupted_by_affiliation', 'month'], utt_mask, speaker_affiliation_table)
+        """
+        for key in group_by:
+            assert key in AVAILABLE_GROUP_BY, f"Unknown group_by key: {key}"
+
+        if utt_mask is None:
+            utt_mask = np.ones(self.count_utts(), dtype=bool)
+
+        codes = []
+        decoders = []
+        for key in group_by:
+            key_codes, decoder = self._get_group_column(key, speaker_affiliation_table)
+            codes.append(key_codes[utt_mask].astype(np.int64))
+            decoders.append(decoder)
+
+        return self._count_rows(codes, decoders)
+
+    @staticmethod
+    def _count_rows(codes, decoders):
+        """
+        Counts distinct rows of given code columns (all of the same length), rows are decoded with decoders.
+        Columns are packed into single int64 key (if it fits), so counting is single bincount (small key space)
+        or unique over 1-D array.
+        """
+        result = Counter()
+        if len(codes) == 0 or len(codes[0]) == 0:
+            return result
+
+        codes = [c.astype(np.int64) for c in codes]
+        mins = [int(c.min()) for c in codes]
+        sizes = [int(c.max()) - mn + 1 for c, mn in zip(codes, mins)]
+        key_space = 1
+        for size in sizes:
+            key_space *= size
+
+        if key_space >= 2 ** 62:
+            unique_rows, counts = np.unique(np.stack(codes, axis=1), axis=0, return_counts=True)
+            for row, count in zip(unique_rows.tolist(), counts.tolist()):
+                result[tuple(decoder(code) for decoder, code in zip(decoders, row))] = count
+            return result
+
+        keys = np.zeros(len(codes[0]), dtype=np.int64)
+        for c, mn, size in zip(codes, mins, sizes):
+            keys = keys * size + (c - mn)
+
+        if key_space <= max(4 * len(keys), 1 << 16):
+            bin_counts = np.bincount(keys, minlength=key_space)
+            unique_keys = np.flatnonzero(bin_counts)
+            counts = bin_counts[unique_keys]
+        else:
+            unique_keys, counts = np.unique(keys, return_counts=True)
+
+        for key, count in zip(unique_keys.tolist(), counts.tolist()):
+            row = []
+            for mn, size in zip(reversed(mins), reversed(sizes)):
+                key, code = divmod(key, size)
+                row.append(code + mn)
+            result[tuple(decoder(code) for decoder, code in zip(decoders, reversed(row)))] = count
+        return result
+
+    def _get_group_column(self, key, speaker_affiliation_table):
+        if key == 'speaker':
+            return self.utt_speaker, self.names.get_string
+        if key == 'interrupted_by':
+            return self.utt_interrupted_by, self.names.get_string
+        if key == 'utt_type':
+            return self.utt_type, lambda code: UTT_TYPE_NAMES[code]
+        if key == 'session':
+            return self.utt_session, lambda code: self.session_filenames[code]
+        if key == 'date':
+            return self.utt_session_date.astype(np.int64), lambda code: self._decode_datetime(code, 'D')
+        if key == 'month':
+            return self.utt_session_date.astype('datetime64[M]').astype(np.int64), lambda code: self._decode_datetime(code, 'M')
+
+        assert speaker_affiliation_table is not None, f"speaker_affiliation_table is required to group by {key}"
+        if key == 'canon_name':
+            return self.get_speech_canon_ids(speaker_affiliation_table)[self.utt_speech], self.symbol_table.get_canon_name
+        if key == 'affiliation':
+            return self.get_speech_affiliation_ids(speaker_affiliation_table)[self.utt_speech], self.clubs.get_string
+        return self.get_utt_interrupted_by_affiliation_ids(speaker_affiliation_table), self.clubs.get_string
+
+    @staticmethod
+    def _decode_datetime(code, unit):
+        if code == _NAT_INT:
+            return None
+        return str(np.datetime64(code, unit))
+
+    def _get_affiliation_ids(self, name_ids, session_ids, speaker_affiliation_table):
+        if self.cache['affiliation_table'] is not speaker_affiliation_table:
+            self.cache['affiliation_table'] = speaker_affiliation_table
+            self.cache['name_session_to_club'] = dict()
+        name_session_to_club = self.cache['name_session_to_club']
+
+        result = np.full(len(name_ids), NO_ID, dtype=np.int32)
+        known = name_ids != NO_ID
+        if not known.any():
+            return result
+
+        # affiliation is resolved only once for each distinct (name, session) pair
+        pair_keys = name_ids[known].astype(np.int64) * max(1, self.count_sessions()) + session_ids[known]
+        unique_keys, inverse = np.unique(pair_keys, return_inverse=True)
+        club_ids = np.empty(len(unique_keys), dtype=np.int32)
+        for i, pair_key in enumerate(unique_keys.tolist()):
+            club_id = name_session_to_club.get(pair_key, None)
+            if club_id is None:
+                name_id, session_idx = divmod(pair_key, max(1, self.count_sessions()))
+                session_date = self.get_session_date(session_idx)
+                club_id = NO_ID
+                # affiliation is unknown for session without date (get_club(None) would return current club)
+                if session_date is not None:
+                    club = speaker_affiliation_table.get_affiliation(self.names.get_string(name_id), session_date)
+                    club_id = self.clubs.add_optional(club)
+                name_session_to_club[pair_key] = club_id
+            club_ids[i] = club_id
+        result[known] = club_ids[inverse.reshape(-1)]
+        return result
+
+    def _get_name_canon_ids(self, speaker_affiliation_table):
+        """
+        Returns array: name id -> canon name id (NO_ID if unknown), last element is for NO_ID (so it can be indexed with -1).
+        """
+        return np.array([
+            self.symbol_table.get_canon_id(speaker_affiliation_table.get_canon_name(name))
+            for name in self.names.strings] + [NO_ID], dtype=np.int32)
+
+    def _get_dump_columns(self, kinds, rows):
+        """
+        Returns arrays for rows from _get_dump_rows: dumped_as code (index in DUMPED_AS_NAMES), speaker id and session.
+        """
+        is_speech = kinds == DUMP_KIND_SPEECH_SPEAKER
+        speech_rows = rows[is_speech]
+        utt_rows = rows[~is_speech]
+
+        sessions = np.empty(len(rows), dtype=np.int32)
+        sessions[is_speech] = self.speech_session[speech_rows]
+        sessions[~is_speech] = self.utt_session[utt_rows]
+
+        speakers = np.empty(len(rows), dtype=np.int32)
+        speakers[is_speech] = self.speech_speaker[speech_rows]
+        utt_types = self.utt_type[utt_rows]
+        speakers[~is_speech] = np.where(
+            (kinds[~is_speech] == DUMP_KIND_INTERRUPT_BY) | (utt_types == UTT_TYPE_INTERRUPT),
+            self.utt_interrupted_by[utt_rows],
+            np.where(utt_types == UTT_TYPE_NORM, self.utt_speaker[utt_rows], NO_ID))
+
+        dumped_as = np.full(len(rows), DUMPED_AS_NAMES.index('speech_speaker'), dtype=np.int8)
+        text_dumped_as = np.array([DUMPED_AS_NAMES.index(f"utt_{utt_type_name}") for utt_type_name in UTT_TYPE_NAMES], dtype=np.int8)
+        dumped_as[~is_speech] = np.where(
+            kinds[~is_speech] == DUMP_KIND_INTERRUPT_BY, DUMPED_AS_NAMES.index('utt_interrupt_by'), text_dumped_as[utt_types])
+        return dumped_as, speakers, sessions
+
+    def _decode_dumped_string(self, code):
+        string_id, is_text = divmod(code, 2)
+        if is_text:
+            return self.texts.get_string(string_id)
+        return self.names.get_string(string_id)
+
+    def _get_dump_rows(self, what_to_dump: Iterable[str], speech_mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns arrays (in dump order): kind of the dumped string (DUMP_KIND_*), row (speech row for DUMP_KIND_SPEECH_SPEAKER,
+        utt row otherwise) and string id (in self.names or self.texts for DUMP_KIND_TEXT).
+        """
+        if speech_mask is None:
+            speech_mask = np.ones(self.count_speeches(), dtype=bool)
+
+        # each dumped string gets sort key: 4 * utt row + position of the string in the utt (speaker goes before its first utt)
+        keys = []
+        kinds = []
+        rows = []
+        ids = []
+
+        if 'speech_speaker' in what_to_dump:
+            speech_rows = np.flatnonzero(speech_mask)
+            keys.append(self.speech_first_utt[speech_rows] * 4)
+            kinds.append(np.full(len(speech_rows), DUMP_KIND_SPEECH_SPEAKER, dtype=np.int8))
+            rows.append(speech_rows)
+            ids.append(self.speech_speaker[speech_rows])
+
+        utt_mask = speech_mask[self.utt_speech]
+        if 'utt_interrupt_by' in what_to_dump:
+            utt_rows = np.flatnonzero(utt_mask & (self.utt_type == UTT_TYPE_INTERRUPT))
+            keys.append(utt_rows * 4 + 1)
+            kinds.append(np.full(len(utt_rows), DUMP_KIND_INTERRUPT_BY, dtype=np.int8))
+            rows.append(utt_rows)
+            ids.append(self.utt_interrupted_by[utt_rows])
+
+        text_types = self._dumped_utt_types(what_to_dump)
+        if len(text_types) > 0:
+            utt_rows = np.flatnonzero(utt_mask & utt_type_mask(text_types)[self.utt_type])
+            keys.append(utt_rows * 4 + 2)
+            kinds.append(np.full(len(utt_rows), DUMP_KIND_TEXT, dtype=np.int8))
+            rows.append(utt_rows)
+            ids.append(self.utt_text[utt_rows])
+
+        if len(keys) == 0:
+            return np.array([], dtype=np.int8), np.array([], dtype=np.int64), np.array([], dtype=np.int32)
+
+        # stable sort keeps speakers of speeches without utts in the speech order
+        order = np.argsort(np.concatenate(keys), kind='stable')
+        return np.concatenate(kinds)[order], np.concatenate(rows)[order], np.concatenate(ids)[order]
+
+    @staticmethod
+    def _dumped_utt_types(what_to_dump):
+        if 'utt' in what_to_dump:
+            return UTT_TYPE_NAMES
+        result = []
+        if 'utt_norm' in what_to_dump:
+            result.append('norm')
+        if 'utt_reaction' in what_to_dump:
+            result.append('reaction')
+        if 'utt_interrupt' in what_to_dump:
+            result.append('interrupt')
+        return result
@@ -0,0 +1,342 @@
+import os
+import json
+import hashlib
+import logging
+from collections import Counter
+from typing import Optional, List, Dict, Iterator, Tuple
+
+from aipolit.utils.globals import AIPOLIT_10TERM_SEJM_INGESTED_DIR
+from aipolit.transcript.utils import list_transcript_filepaths, load_transcripts_from_filepaths, iter_transcripts_from_filepaths
+from aipolit.transcript.affiliation_snapshot import load_transcript_speaker_affiliation
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from aipolit.transcript.utt_sentence_splitter import UttSentenceSplitter
+from aipolit.transcript.occurrence_counter import ListOccurrenceCounter, get_utt_type
+from aipolit.transcript.transcript_index import TranscriptIndex
+from aipolit.transcript.columnar_store import UTT_TYPE_NAMES
+from hipisejm.stenparser.transcript import SessionTranscript
+
+
+class TranscriptIngestion:
+    """
+    Incremental processing of the transcripts directory.
+
+    Manifest (manifest.json in output_dir) records which XML files were processed (size, mtime)
+    and their derived artefacts (per file, in output_dir subdirs):
+    - speeches/<name>.jsonl - speeches with resolved speaker affiliation (speech_index, speaker_name, canon_name,
+                              affiliation, when and number of utts of each type)
+    - sentence splits - utts are split with UttSentenceSplitter with persistent cache (so next analyses take them from cache),
+                        number of sentences is kept in the manifest
+    - occurrences/<name>.jsonl - occurrences of searched_tokens (ListOccurrenceCounter), if searched_tokens are defined
+
+    Each run processes only new or changed files (or files processed with other searched_tokens),
+    drops artefacts of removed files, and merges per file artefacts into outputs (check MERGED_OUTPUTS),
+    which are the same as if whole directory was processed at once.
+    Optionally TranscriptIndex of transcripts_dir is updated too.
+    """
+    MANIFEST_FORMAT_VERSION = 1
+    # number of files parsed at once by each worker (when run with workers)
+    PARSE_CHUNK_PER_WORKER = 2
+    MANIFEST_FILENAME = "manifest.json"
+    SPEECHES_DIR = "speeches"
+    OCCURRENCES_DIR = "occurrences"
+    MERGED_OUTPUTS = {
+        'speeches': "speeches.jsonl",
+        'speakers': "speakers_with_affiliations.tsv",
+        'occurrences': "occurrences.jsonl",
+        'occurrence_counts': "occurrence_counts.tsv",
+    }
+
+    def __init__(
+            self,
+            transcripts_dir: str,
+            output_dir: Optional[str] = None,
+            searched_tokens: Optional[List[str]] = None,
+            sentence_cache_fp: Optional[str] = None):
+        """
+        Params:
+        - transcripts_dir - directory with transcript XML files
+        - output_dir - where manifest, artefacts and merged outputs are stored (by default AIPOLIT_10TERM_SEJM_INGESTED_DIR)
+        - searched_tokens - if defined, then occurrences of these tokens are counted (check ListOccurrenceCounter)
+        - sentence_cache_fp - sqlite file with sentence segmentation cache (by default file in AIPOLIT_CACHE_DIR,
+                              check UttSentenceSplitter)
+        """
+        self.transcripts_dir = transcripts_dir
+        self.output_dir = output_dir if output_dir is not None else AIPOLIT_10TERM_SEJM_INGESTED_DIR
+        self.searched_tokens = searched_tokens
+        self.sentence_cache_fp = sentence_cache_fp
+        self.searched_tokens_hash = None
+        if searched_tokens is not None:
+            self.searched_tokens_hash = hashlib.md5("\n".join(searched_tokens).encode('utf-8')).hexdigest()
+
+        self.manifest_fp = os.path.join(self.output_dir, self.MANIFEST_FILENAME)
+        # filename -> entry
+        self.entries = dict()
+        self._load_manifest()
+
+        self.speaker_affiliation_table = None
+        self.utt_sentence_splitter = None
+        self.occurrence_counter = None
+
+    def find_files_to_process(self) -> List[str]:
+        """
+        Returns paths to XML files which are new or changed since the last run.
+        """
+        result = []
+        for filepath in list_transcript_filepaths(self.transcripts_dir):
+            if not self._is_entry_valid(self.entries.get(os.path.basename(filepath), None), filepath):
+                result.append(filepath)
+        return result
+
+    def run(
+            self,
+            workers: Optional[int] = None,
+            use_cache: bool = False,
+            update_index: bool = False,
+            index_dir: Optional[str] = None) -> Dict[str, int]:
+        """
+        Processes new or changed files and merges results into outputs.
+
+        Params:
+        - workers, use_cache - how to parse transcripts (check load_transcripts), with workers files are parsed
+                               in chunks (PARSE_CHUNK_PER_WORKER files per worker), otherwise one by one,
+                               so only few transcripts are kept in memory at once
+        - update_index - if True, then TranscriptIndex of transcripts_dir is updated too
+        - index_dir - where TranscriptIndex is stored (by default in AIPOLIT_CACHE_DIR)
+
+        Returns dict with number of 'processed', 'removed' and 'unchanged' files.
+        """
+        filepaths = list_transcript_filepaths(self.transcripts_dir)
+        to_process = self.find_files_to_process()
+
+        existing_filenames = {os.path.basename(fp) for fp in filepaths}
+        removed_filenames = [filename for filename in self.entries if filename not in existing_filenames]
+        for filename in removed_filenames:
+            self._remove_artefacts(self.entries.pop(filename))
+
+        for filepath, transcript in self._iter_transcripts(to_process, workers, use_cache):
+            self.entries[os.path.basename(filepath)] = self.process_transcript(filepath, transcript)
+            # manifest is saved after each file, so interrupted run does not need to start from scratch
+            self._save_manifest()
+
+        if len(to_process) > 0 or len(removed_filenames) > 0 or not self._merged_outputs_exist():
+            self.merge_outputs()
+        self._save_manifest()
+
+        if update_index:
+            # transcripts are not kept after processing, so index parses files itself (from TranscriptCache if use_cache)
+            transcript_index = TranscriptIndex(self.transcripts_dir, index_dir=index_dir)
+            transcript_index.update(workers=workers, use_cache=use_cache)
+
+        stats = {
+            'processed': len(to_process),
+            'removed': len(removed_filenames),
+            'unchanged': len(filepaths) - len(to_process),
+        }
+        logging.info(
+            "TranscriptIngestion: %i files processed, %i removed, %i unchanged (outputs in %s)",
+            stats['processed'], stats['removed'], stats['unchanged'], self.output_dir)
+        return stats
+
+    def process_transcript(self, filepath: str, transcript: SessionTranscript) -> dict:
+        """
+        Computes (and saves) all artefacts of single XML file, returns manifest entry.
+        """
+        filename = os.path.basename(filepath)
+        file_stat = os.stat(filepath)
+        entry = {
+            'size': file_stat.st_size,
+            'mtime_ns': file_stat.st_mtime_ns,
+            'session_date': transcript.session_date,
+            'speech_count': len(transcript.session_content),
+            'speeches_fp': os.path.join(self.SPEECHES_DIR, f"{filename}.jsonl"),
+            'sentence_count': self._split_sentences(transcript),
+            'searched_tokens_hash': self.searched_tokens_hash,
+            'occurrences_fp': None,
+            'occurrence_count': None,
+        }
+
+        self._save_jsonl(entry['speeches_fp'], self._resolve_speeches(filename, transcript))
+
+        if self.searched_tokens is not None:
+            occurrences = self._count_occurrences(filepath, transcript)
+            entry['occurrences_fp'] = os.path.join(self.OCCURRENCES_DIR, f"{filename}.jsonl")
+            entry['occurrence_count'] = len(occurrences)
+            self._save_jsonl(entry['occurrences_fp'], occurrences)
+
+        logging.debug("TranscriptIngestion: processed %s", filepath)
+        return entry
+
+    def merge_outputs(self):
+        """
+        Merges per file artefacts (in filename order) into outputs from MERGED_OUTPUTS.
+        """
+        # speaker_name -> [set of affiliations, canon_name] (the same as TranscriptQuery.assign_speakers_to_affiliations)
+        speaker_to_affiliations = dict()
+        with open(self._get_output_fp('speeches'), "w", encoding='utf8') as f:
+            for filename, entry in sorted(self.entries.items()):
+                for speech in self._read_jsonl(entry['speeches_fp']):
+                    f.write(json.dumps(speech, ensure_ascii=False))
+                    f.write("\n")
+
+                    speaker_entry = speaker_to_affiliations.setdefault(speech['speaker_name'], [set(), None])
+                    if speech['affiliation']:
+                        speaker_entry[0].add(speech['affiliation'])
+                        speaker_entry[1] = speech['canon_name']
+
+        with open(self._get_output_fp('speakers'), "w", encoding='utf8') as f:
+            f.write("\t".join(['speaker_name', 'affiliations', 'canon_name']))
+            f.write("\n")
+            for speaker_name, (affiliations, canon_name) in sorted(
+                    speaker_to_affiliations.items(), key=lambda k_v: (k_v[1][1] or '', k_v[0])):
+                f.write("\t".join([speaker_name, ",".join(sorted(affiliations)), canon_name if canon_name is not None else "<UNK>"]))
+                f.write("\n")
+
+        occurrence_counts = Counter()
+        with open(self._get_output_fp('occurrences'), "w", encoding='utf8') as f:
+            for filename, entry in sorted(self.entries.items()):
+                if entry['occurrences_fp'] is None:
+                    continue
+                for occurrence in self._read_jsonl(entry['occurrences_fp']):
+                    f.write(json.dumps(occurrence, ensure_ascii=False))
+                    f.write("\n")
+                    occurrence_counts[occurrence['speaker']] += 1
+
+        with open(self._get_output_fp('occurrence_counts'), "w", encoding='utf8') as f:
+            f.write("\t".join(['speaker', 'count']))
+            f.write("\n")
+            for speaker, count in sorted(occurrence_counts.items(), key=lambda k_v: (-k_v[1], str(k_v[0]))):
+                f.write(f"{speaker}\t{count}\n")
+
+    def _resolve_speeches(self, filename: str, transcript: SessionTranscript) -> List[dict]:
+        if self.speaker_affiliation_table is None:
+            self.speaker_affiliation_table = SpeakerAffiliationTable(load_transcript_speaker_affiliation())
+
+        result = []
+        for speech_index, session_speech in enumerate(transcript.session_content):
+            utt_counts = Counter(get_utt_type(utt) for utt in session_speech.content)
+            affiliation = None
+            if transcript.session_date is not None:
+                affiliation = self.speaker_affiliation_table.get_affiliation(session_speech.speaker, transcript.session_date)
+            result.append({
+                'source_file': filename,
+                'speech_index': speech_index,
+                'speaker_name': session_speech.speaker,
+                'canon_name': self.speaker_affiliation_table.get_canon_name(session_speech.speaker),
+                'affiliation': affiliation,
+                'when': transcript.session_date,
+                'utt_counts': {utt_type: utt_counts[utt_type] for utt_type in UTT_TYPE_NAMES},
+            })
+        return result
+
+    def _iter_transcripts(
+            self,
+            filepaths: List[str],
+            workers: Optional[int],
+            use_cache: bool) -> Iterator[Tuple[str, SessionTranscript]]:
+        if workers is None or workers <= 1:
+            yield from zip(filepaths, iter_transcripts_from_filepaths(filepaths, use_cache=use_cache))
+            return
+
+        chunk_size = workers * self.PARSE_CHUNK_PER_WORKER
+        for chunk_start in range(0, len(filepaths), chunk_size):
+            chunk = filepaths[chunk_start:chunk_start + chunk_size]
+            yield from zip(chunk, load_transcripts_from_filepaths(chunk, workers=workers, use_cache=use_cache))
+
+    def _split_sentences(self, transcript: SessionTranscript) -> int:
+        if self.utt_sentence_splitter is None:
+            self.utt_sentence_splitter = UttSentenceSplitter(use_cache=True, cache_fp=self.sentence_cache_fp)
+
+        sentence_count = 0
+        for session_speech in transcript.session_content:
+            for spans in self.utt_sentence_splitter.split_many_to_spans(session_speech.content):
+                sentence_count += len(spans)
+        return sentence_count
+
+    def _count_occurrences(self, filepath: str, transcript: SessionTranscript) -> List[dict]:
+        if self.occurrence_counter is None:
+            # sentence splits are already in the cache (check _split_sentences)
+            self.occurrence_counter = ListOccurrenceCounter(
+                self.searched_tokens, use_sentence_cache=True, sentence_cache_fp=self.sentence_cache_fp)
+
+        result = []
+        for occurrence in self.occurrence_counter.run_count(transcript):
+            result.append({
+                'source_file': os.path.basename(filepath),
+                'speech_index': occurrence.speech_index,
+                'matched_utt_index': occurrence.matched_utt_index,
+                'utt_type': occurrence.utt_type,
+                'speaker': occurrence.speaker,
+                'speech_speaker': occurrence.speech_speaker,
+                'when': transcript.session_date,
+                'sentence': occurrence.sentence,
+                'sentence_start_index_in_utt': occurrence.sentence_start_index_in_utt,
+                'sentence_start_match': occurrence.sentence_start_match,
+                'sentence_end_match': occurrence.sentence_end_match,
+                'prev_sentence': occurrence.prev_sentence,
+            })
+        return result
+
+    def _is_entry_valid(self, entry: Optional[dict], filepath: str) -> bool:
+        if entry is None:
+            return False
+        file_stat = os.stat(filepath)
+        if entry['size'] != file_stat.st_size or entry['mtime_ns'] != file_stat.st_mtime_ns:
+            return False
+        if entry['searched_tokens_hash'] != self.searched_tokens_hash:
+            return False
+        for artefact_fp in [entry['speeches_fp'], entry['occurrences_fp']]:
+            if artefact_fp is not None and not os.path.isfile(os.path.join(self.output_dir, artefact_fp)):
+                return False
+        return True
+
+    def _remove_artefacts(self, entry: dict):
+        for artefact_fp in [entry['speeches_fp'], entry['occurrences_fp']]:
+            if artefact_fp is not None and os.path.isfile(os.path.join(self.output_dir, artefact_fp)):
+                os.remove(os.path.join(self.output_dir, artefact_fp))
+
+    def _get_output_fp(self, output_name: str) -> str:
+        return os.path.join(self.output_dir, self.MERGED_OUTPUTS[output_name])
+
+    def _merged_outputs_exist(self) -> bool:
+        return all(os.path.isfile(self._get_output_fp(output_name)) for output_name in self.MERGED_OUTPUTS)
+
+    def _save_jsonl(self, relative_fp: str, rows: List[dict]):
+        fp = os.path.join(self.output_dir, relative_fp)
+        os.makedirs(os.path.dirname(fp), exist_ok=True)
+        tmp_fp = f"{fp}.{os.getpid()}.tmp"
+        with open(tmp_fp, "w", encoding='utf8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False))
+                f.write("\n")
+        os.replace(tmp_fp, fp)
+
+    def _read_jsonl(self, relative_fp: str) -> List[dict]:
+        with open(os.path.join(self.output_dir, relative_fp), "r", encoding='utf8') as f:
+            return [json.loads(line) for line in f]
+
+    def _save_manifest(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_fp = f"{self.manifest_fp}.{os.getpid()}.tmp"
+        with open(tmp_fp, "w", encoding='utf8') as f:
+            json.dump({
+                'version': self.MANIFEST_FORMAT_VERSION,
+                'transcripts_dir': os.path.abspath(self.transcripts_dir),
+                'entries': self.entries,
+            }, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_fp, self.manifest_fp)
+
+    def _load_manifest(self):
+        if not os.path.isfile(self.manifest_fp):
+            return
+
+        with open(self.manifest_fp, "r", encoding='utf8') as f:
+            manifest = json.load(f)
+        if manifest.get('version', None) != self.MANIFEST_FORMAT_VERSION:
+            logging.info("TranscriptIngestion: manifest %s has old format, all files will be processed again", self.manifest_fp)
+            return
+        if manifest['transcripts_dir'] != os.path.abspath(self.transcripts_dir):
+            logging.warning(
+                "TranscriptIngestion: manifest %s was created for other transcripts dir (%s), all files will be processed again",
+                self.manifest_fp, manifest['transcripts_dir'])
+            return
+        self.entries = manifest['entries']
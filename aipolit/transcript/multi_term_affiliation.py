@@ -0,0 +1,228 @@
+import json
+import logging
+from bisect import bisect_right
+from typing import Optional, Union, List, Dict, Tuple
+from datetime import date
+from aipolit.utils.date import text_to_date
+from aipolit.transcript.person_affiliation import Person, PersonAffiliation
+
+
+class SejmTerm:
+    """
+    Single term of Sejm (kadencja) with JSON file of persons (the same format as PersonAffiliation datafile).
+
+    Term lasts from date_from (inclusive) to date_from of the next term (exclusive), the last term is not closed.
+
+    Each person entry in JSON may have also optional keys:
+    - person_id - primary key of the person shared by all terms (by default "f_name s_name"),
+                  so namesakes can be distinguished and persons who changed name are linked across terms
+    - name_variants - list of other names of the person (e.g. maiden/married name) which are matched as well
+    """
+    def __init__(self, term: int, date_from: Union[str, date], data_filepath: str):
+        self.term = term
+        self.date_from = text_to_date(date_from) if isinstance(date_from, str) else date_from
+        self.data_filepath = data_filepath
+
+
+DEFAULT_SEJM_TERMS = [
+    SejmTerm(10, "2023-11-13", PersonAffiliation.get_data_filepath()),
+]
+
+
+class NameVariantEntry:
+    """
+    All persons known by the same name in all terms, compiled to single sorted interval array of ordinal dates
+    (bounds, club_by_interval, person_id_by_interval), so club for (name, date) is a single bisect.
+
+    It has the same get_club method as Person, so it can be used by TranscriptSpeakerAffiliation.
+    """
+    __slots__ = (
+        'name',
+        'person_ids',
+        'bounds',
+        'club_by_interval',
+        'person_id_by_interval',
+    )
+
+    def __init__(self, name: str):
+        self.name = name
+        self.person_ids = []
+        self.bounds = None
+        self.club_by_interval = None
+        self.person_id_by_interval = None
+
+    def get_club(self, when: Optional[Union[str, date]] = None) -> Optional[str]:
+        return self.club_by_interval[bisect_right(self.bounds, self._when_to_ordinal(when))]
+
+    def get_person_id(self, when: Optional[Union[str, date]] = None) -> Optional[str]:
+        """
+        Returns person_id of the person with this name during 'when' (None if there was no such person in the term).
+        """
+        return self.person_id_by_interval[bisect_right(self.bounds, self._when_to_ordinal(when))]
+
+    @staticmethod
+    def _when_to_ordinal(when: Optional[Union[str, date]]) -> int:
+        if when is None:
+            return date.today().toordinal()
+        elif isinstance(when, str):
+            return text_to_date(when).toordinal()
+        return when.toordinal()
+
+
+class MultiTermPersonAffiliation:
+    """
+    Affiliations of persons from many terms of Sejm.
+
+    Persons are stored by person_id (primary key) with separate Person (clubs) for each term,
+    names (and name variants) are indexed by NameVariantEntry, which merges club intervals of all terms
+    and all persons with the given name. So lookup by (name, date) is one hash probe plus one bisect,
+    regardless of number of persons and terms.
+
+    Namesakes (the same name, different person_id) are resolved by date: the first person (in order of JSON files)
+    who is a member of a club during the date wins.
+
+    It has the same name_to_entry / get_person_by_name interface as PersonAffiliation,
+    so it can be passed to TranscriptSpeakerAffiliation (entries are NameVariantEntry instead of Person).
+    """
+    def __init__(self, terms: Optional[List[SejmTerm]] = None):
+        """
+        Params:
+        - terms - terms of Sejm with JSON files of persons (by default DEFAULT_SEJM_TERMS)
+        """
+        if terms is None:
+            terms = DEFAULT_SEJM_TERMS
+        self.terms = sorted(terms, key=lambda t: t.date_from)
+        self.term_bounds = tuple(t.date_from.toordinal() for t in self.terms)
+
+        # person_id -> term -> Person
+        self.persons = dict()
+        # name (as in JSON) -> NameVariantEntry
+        self.name_to_entry = dict()
+        self.normalized_name_to_name = dict()
+
+        for term in self.terms:
+            self._load_term(term)
+        self._compile_entries()
+
+        logging.info(
+            "MultiTermPersonAffiliation: %i persons, %i name variants from %i terms",
+            len(self.persons), len(self.name_to_entry), len(self.terms))
+
+    def count(self) -> int:
+        return len(self.persons)
+
+    def get_person_by_name(self, name: str) -> Optional[NameVariantEntry]:
+        entry = self.name_to_entry.get(name, None)
+        if entry is not None:
+            return entry
+
+        canon_name = self.normalized_name_to_name.get(self._normalize_name(name))
+        if canon_name is not None:
+            return self.name_to_entry.get(canon_name, None)
+        return None
+
+    def get_club(self, name: str, when: Optional[Union[str, date]] = None) -> Optional[str]:
+        """
+        Returns club of the person with given name during 'when' (today if not defined),
+        or None if there was no such person or the person was not a member of any club.
+        """
+        entry = self.get_person_by_name(name)
+        if entry is None:
+            return None
+        return entry.get_club(when)
+
+    def get_person_id(self, name: str, when: Optional[Union[str, date]] = None) -> Optional[str]:
+        entry = self.get_person_by_name(name)
+        if entry is None:
+            return None
+        return entry.get_person_id(when)
+
+    def get_person_terms(self, person_id: str) -> Dict[int, Person]:
+        """
+        Returns dict term -> Person for given person_id (empty dict for unknown person_id).
+        """
+        return self.persons.get(person_id, dict())
+
+    def _load_term(self, term: SejmTerm):
+        with open(term.data_filepath, "r") as f:
+            data = json.load(f)
+
+        for json_entry in data['poslowie']:
+            person_id = json_entry.get('person_id', None)
+            name_variants = json_entry.get('name_variants', [])
+            person = Person.from_json_entry(json_entry)
+            if person_id is None:
+                person_id = person.name
+
+            person_terms = self.persons.setdefault(person_id, dict())
+            if term.term in person_terms:
+                logging.info(
+                    "DUPLICATE person_id found in term %i (%s): %s (will not be added)",
+                    term.term, term.data_filepath, person_id)
+                continue
+            person_terms[term.term] = person
+
+            for name in [person.name] + name_variants:
+                entry = self.name_to_entry.get(name, None)
+                if entry is None:
+                    entry = NameVariantEntry(name)
+                    self.name_to_entry[name] = entry
+                    self.normalized_name_to_name[self._normalize_name(name)] = name
+                if person_id not in entry.person_ids:
+                    entry.person_ids.append(person_id)
+
+    def _compile_entries(self):
+        for entry in self.name_to_entry.values():
+            self._compile_entry(entry)
+
+    def _compile_entry(self, entry: NameVariantEntry):
+        bounds = set(self.term_bounds)
+        for person_id in entry.person_ids:
+            for term_index, term in enumerate(self.terms):
+                person = self.persons[person_id].get(term.term, None)
+                if person is None:
+                    continue
+                if person.club_bounds is None:
+                    person.compile_clubs()
+                term_from, term_to = self._get_term_range(term_index)
+                bounds.update(b for b in person.club_bounds if term_from < b and (term_to is None or b < term_to))
+        bounds = sorted(bounds)
+
+        club_by_interval = [self._find_at(entry, bounds[0] - 1)]
+        for bound in bounds:
+            club_by_interval.append(self._find_at(entry, bound))
+
+        entry.bounds = tuple(bounds)
+        entry.club_by_interval = tuple(club for club, _ in club_by_interval)
+        entry.person_id_by_interval = tuple(person_id for _, person_id in club_by_interval)
+
+    def _find_at(self, entry: NameVariantEntry, ordinal: int) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Returns (club, person_id) for given name entry at given ordinal date.
+        """
+        term_index = bisect_right(self.term_bounds, ordinal) - 1
+        if term_index < 0:
+            return None, None
+        term = self.terms[term_index].term
+
+        first_person_id = None
+        for person_id in entry.person_ids:
+            person = self.persons[person_id].get(term, None)
+            if person is None:
+                continue
+            if first_person_id is None:
+                first_person_id = person_id
+            club = person.club_by_interval[bisect_right(person.club_bounds, ordinal)]
+            if club is not None:
+                return club, person_id
+
+        return None, first_person_id
+
+    def _get_term_range(self, term_index: int) -> Tuple[int, Optional[int]]:
+        term_to = None
+        if term_index + 1 < len(self.term_bounds):
+            term_to = self.term_bounds[term_index + 1]
+        return self.term_bounds[term_index], term_to
+
+    def _normalize_name(self, name: str) -> str:
+        return name.lower()
@@ -1,8 +1,19 @@
 import re
-from typing import Union, Optional, List
+from typing import Union, Optional, List, Iterable
+from concurrent.futures import ProcessPoolExecutor
 from hipisejm.stenparser.transcript import SessionTranscript, SpeechReaction, SpeechInterruption, SessionSpeech
-from hipisejm.stenparser.transcript_utils import get_speaker_for_utt
+from hipisejm.stenparser.transcript_utils import get_speaker_for_utt, get_utt_text
 from aipolit.transcript.utt_sentence_splitter import UttSentenceSplitter
+from aipolit.transcript.utils import load_transcript_from_xml
+from aipolit.transcript.symbol_table import TranscriptSymbolTable
+from aipolit.utils.phrase_matcher import PhraseMatcher
+from aipolit.utils.string_pool import NO_ID
+
+
+# if any of searched tokens contains these chars, then tokens are treated as regexes (not literal phrases)
+REGEX_SPECIAL_CHARS = set(".^$*+?{}[]\\|()")
+# for shorter lists of tokens regex is faster than PhraseMatcher (pure python loop over chars)
+PHRASE_MATCHER_MIN_TOKENS = 64
 
 
 class PhraseOccurrence:
@@ -15,9 +26,21 @@ class PhraseOccurrence:
     sentence_start_index_in_utt - character index (of utt text) where 'sentence' begins (allows to retrieve text before sentence from utt)
     sentence_start_match - chracter index (in sentence!) where matching begins
     sentence_end_match - chracter index (in sentence!) where matching finishes
-    utt_ref - reference to utt object which contains matched text
+    utt_ref - reference to utt object which contains matched text (None for compact occurrence)
     speech_ref - reference to speech object which contains matched text (in fact this means that utt_ref is redundant because we already have matched_utt_index, but I leave it due to initial implementation :( )
+                 (None for compact occurrence)
     prev_sentence - sentence preceeding matching
+    source_file - transcript file (XML filepath or source_filename of the transcript), with speech_index and matched_utt_index
+                  it is a locator of matched utt
+    speech_index - index of speech_ref in the transcript session_content
+    utt_type - type of utt_ref: 'norm', 'reaction' or 'interrupt'
+    speech_speaker - speaker of speech_ref (for interruption this is interrupted speaker)
+    speaker_id, speech_speaker_id - ids of speaker and speech_speaker in TranscriptSymbolTable
+                                    (NO_ID until intern_symbols is called)
+
+    Compact occurrences (check make_compact) do not keep references to transcript objects,
+    so they are cheap to pickle (e.g. when they are returned from other processes).
+    Use get_speech and get_utt to retrieve referenced objects from the transcript.
     """
     def __init__(self,
                  speaker: str,
@@ -28,7 +51,9 @@ class PhraseOccurrence:
                  sentence_end_match: int,
                  utt_ref: Union[str, SpeechReaction, SpeechInterruption],
                  speech_ref: SessionSpeech,
-                 prev_sentence: Optional[str]):
+                 prev_sentence: Optional[str],
+                 source_file: Optional[str] = None,
+                 speech_index: Optional[int] = None):
         self.speaker = speaker
         self.sentence = sentence
         self.matched_utt_index = matched_utt_index
@@ -38,30 +63,100 @@ class PhraseOccurrence:
         self.utt_ref = utt_ref
         self.speech_ref = speech_ref
         self.prev_sentence = prev_sentence
+        self.source_file = source_file
+        self.speech_index = speech_index
+        self.utt_type = get_utt_type(utt_ref)
+        self.speech_speaker = speech_ref.speaker
+        self.speaker_id = NO_ID
+        self.speech_speaker_id = NO_ID
+
+    def intern_symbols(self, symbol_table: TranscriptSymbolTable):
+        """
+        Assigns speaker ids from given table (speaker names are replaced with strings kept in the table,
+        so all occurrences of the same speaker share one string).
+        """
+        self.speaker_id = symbol_table.get_speaker_id(self.speaker)
+        self.speaker = symbol_table.get_speaker(self.speaker_id)
+        self.speech_speaker_id = symbol_table.get_speaker_id(self.speech_speaker)
+        self.speech_speaker = symbol_table.get_speaker(self.speech_speaker_id)
+
+    def make_compact(self):
+        """
+        Drops references to transcript objects (only locators are left).
+        """
+        self.utt_ref = None
+        self.speech_ref = None
+
+    def get_speech(self, transcript: SessionTranscript) -> SessionSpeech:
+        if self.speech_ref is not None:
+            return self.speech_ref
+        return transcript.session_content[self.speech_index]
+
+    def get_utt(self, transcript: SessionTranscript) -> Union[str, SpeechReaction, SpeechInterruption]:
+        if self.utt_ref is not None:
+            return self.utt_ref
+        return self.get_speech(transcript).content[self.matched_utt_index]
 
     def __str__(self):
         sentence_with_tag = self.sentence[:self.sentence_start_match] + \
           '<b>' + \
           self.sentence[self.sentence_start_match: self.sentence_end_match] + \
           '</b>' + \
-          self.sentence_end_match[self.sentence_end_match:]
+          self.sentence[self.sentence_end_match:]
 
         full_txt = f"{self.speaker}: {sentence_with_tag}"
 
-        if isinstance(self.utt_ref, SpeechInterruption):
-            inter_txt = f" (przerywając wypowiedź <{self.speech_ref.speaker}> o treści: {self.prev_sentence})"
+        if self.utt_type == 'interrupt':
+            inter_txt = f" (przerywając wypowiedź <{self.speech_speaker}> o treści: {self.prev_sentence})"
             full_txt = full_txt + inter_txt
         return full_txt
 
 
+def get_utt_type(utt: Union[str, SpeechReaction, SpeechInterruption]) -> str:
+    """
+    Returns 'norm', 'reaction' or 'interrupt' for utt object of given type.
+    """
+    if isinstance(utt, str):
+        return 'norm'
+    elif isinstance(utt, SpeechReaction):
+        return 'reaction'
+    elif isinstance(utt, SpeechInterruption):
+        return 'interrupt'
+    else:
+        raise ValueError(f"Unknown object type utt: {utt}")
+
+
 class ListOccurrenceCounter:
     """
     This class counts occurrences of fixed list of phrases / words in the given transcript.
+
+    Long lists of literal phrases are searched with PhraseMatcher (one pass per sentence, works well also for
+    thousands of phrases), short lists and tokens with regex special chars (or empty) are searched with the regex.
+    Both give the same results (case insensitive, whole words, one match for each start position).
     """
-    def __init__(self, searched_tokens: List[str]):
+    def __init__(
+            self,
+            searched_tokens: List[str],
+            use_phrase_matcher: Optional[bool] = None,
+            use_sentence_cache: bool = False,
+            symbol_table: Optional[TranscriptSymbolTable] = None,
+            sentence_cache_fp: Optional[str] = None):
+        """
+        use_phrase_matcher - if None, then PhraseMatcher is used for at least PHRASE_MATCHER_MIN_TOKENS literal tokens,
+                             if True, then it is used for any list of literal tokens, if False, then only regex is used.
+        use_sentence_cache - if True, then sentence segmentation is taken from persistent cache (check UttSentenceSplitter),
+                             so repeated analyses (e.g. for other lists of tokens) do not split utts again.
+        symbol_table - if defined, then returned occurrences carry speaker ids from this table (check PhraseOccurrence.intern_symbols)
+        sentence_cache_fp - sqlite file with sentence segmentation cache (by default file in AIPOLIT_CACHE_DIR)
+        """
         self.searched_tokens = searched_tokens
-        self.utt_sentence_splitter = UttSentenceSplitter()
+        self.use_phrase_matcher = use_phrase_matcher
+        self.use_sentence_cache = use_sentence_cache
+        self.sentence_cache_fp = sentence_cache_fp
+        self.symbol_table = symbol_table
+        self.utt_sentence_splitter = UttSentenceSplitter(use_cache=use_sentence_cache, cache_fp=sentence_cache_fp)
         self.searched_regex = self._create_searched_regex()
+        self.phrase_matcher = self._create_phrase_matcher(use_phrase_matcher)
         # cache objects
         self.cache = dict()
         self._init_cache()
@@ -84,58 +179,119 @@ class ListOccurrenceCounter:
         """
         result = []
         self._init_cache()
+        self.cache['source_file'] = transcript.source_filename
 
-        for session_speech in transcript.session_content:
+        for speech_index, session_speech in enumerate(transcript.session_content):
+            self.cache['speech_index'] = speech_index
             self._count_in_speech(result, session_speech)
 
+        self._intern_symbols(result)
+        return result
+
+    def run_count_corpus(
+            self,
+            transcripts: Iterable[Union[SessionTranscript, str]],
+            workers: Optional[int] = None) -> List[List[PhraseOccurrence]]:
+        """
+        Counts occurrences in many transcripts (in the pool of processes if workers > 1).
+        Returns list of occurrences lists (the same as of run_count) for each transcript (in the same order).
+
+        transcripts - SessionTranscript objects or paths to XML files. Paths are preferred for workers > 1,
+                      because then XML files are parsed in the workers (transcripts do not need to be pickled).
+
+        Returned occurrences are compact (check PhraseOccurrence.make_compact), source_file is XML filepath
+        (if paths were given) or source_filename of the transcript.
+        Symbol ids (if symbol_table is defined) are assigned in the main process, so they are the same as for run_count.
+        """
+        transcripts = list(transcripts)
+        if workers is not None and workers > 1 and len(transcripts) > 1:
+            chunksize = max(1, len(transcripts) // (workers * 4))
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker_counter,
+                    initargs=(self.searched_tokens, self.use_phrase_matcher, self.use_sentence_cache, self.sentence_cache_fp)) as executor:
+                results = list(executor.map(_run_count_compact_in_worker, transcripts, chunksize=chunksize))
+            for result in results:
+                self._intern_symbols(result)
+            return results
+
+        return [self.run_count_compact(transcript) for transcript in transcripts]
+
+    def run_count_compact(self, transcript: Union[SessionTranscript, str]) -> List[PhraseOccurrence]:
+        """
+        The same as run_count, but accepts path to XML file and returns compact occurrences.
+        """
+        source_file = None
+        if isinstance(transcript, str):
+            source_file = transcript
+            transcript = load_transcript_from_xml(source_file)
+
+        result = self.run_count(transcript)
+        for occurrence in result:
+            occurrence.make_compact()
+            if source_file is not None:
+                occurrence.source_file = source_file
         return result
 
+    def _intern_symbols(self, occurrences: List[PhraseOccurrence]):
+        if self.symbol_table is None:
+            return
+        for occurrence in occurrences:
+            occurrence.intern_symbols(self.symbol_table)
+
     def _create_searched_regex(self):
         regex_txt = r"\b(?:" + "|".join(self.searched_tokens) + r")\b"
         return re.compile(regex_txt, flags=re.IGNORECASE)
 
+    def _create_phrase_matcher(self, use_phrase_matcher: Optional[bool]) -> Optional[PhraseMatcher]:
+        if use_phrase_matcher is None:
+            use_phrase_matcher = len(self.searched_tokens) >= PHRASE_MATCHER_MIN_TOKENS
+        if not use_phrase_matcher:
+            return None
+
+        for token in self.searched_tokens:
+            if len(token) == 0 or not REGEX_SPECIAL_CHARS.isdisjoint(token):
+                return None
+        return PhraseMatcher(self.searched_tokens)
+
+    def _find_matches_in_sentence(self, sentence):
+        """
+        Returns list of (start, end) of matches in the sentence.
+        """
+        if self.phrase_matcher is not None:
+            return [(start, end) for start, end, _ in self.phrase_matcher.find_all(sentence)]
+
+        result = []
+        pos = 0
+        while True:
+            matched = self.searched_regex.search(sentence, pos=pos)
+            if not matched:
+                break
+            result.append((matched.start(), matched.end()))
+            pos = matched.start() + 1
+        return result
+
     def _init_cache(self):
         self.cache['prev_sentence'] = None
         self.cache['prev_utt'] = None
         self.cache['prev_utt_speech'] = None
+        self.cache['source_file'] = None
+        self.cache['speech_index'] = None
 
     def _count_in_speech(self, result, session_speech):
-        speech_speaker = session_speech.speaker
-        for utt_index, utt in enumerate(session_speech.content):
-            sentences = self.utt_sentence_splitter.split_utt_to_sentences(utt)
-            sentences_cache = {
-                'sentence_index': 0,
-                'all_sentences_starting_indexes': None,
-                'all_sentences': sentences,
-            }
-            for i, sentence in enumerate(sentences):
-                sentences_cache['sentence_index'] = i
-                self._check_searched_in_sentence(result, sentence, sentences_cache, utt, utt_index, session_speech)
+        all_utts_spans = self.utt_sentence_splitter.split_many_to_spans(session_speech.content)
+        for utt_index, (utt, spans) in enumerate(zip(session_speech.content, all_utts_spans)):
+            sentences = self.utt_sentence_splitter.spans_to_sentences(get_utt_text(utt), spans)
+            for sentence, (sentence_start_index_in_utt, _) in zip(sentences, spans):
+                self._check_searched_in_sentence(result, sentence, sentence_start_index_in_utt, utt, utt_index, session_speech)
                 if isinstance(utt, str):
                     self.cache['prev_sentence'] = sentence
             self.cache['prev_utt'] = utt
             self.cache['prev_utt_speech'] = session_speech
 
-    def _check_searched_in_sentence(self, result, sentence, sentences_cache, utt, utt_index, session_speech):
-        pos = 0
-        keep_procesing = True
-
-        sentence_start_index_in_utt = None
-
-        while keep_procesing:
-            matched = self.searched_regex.search(sentence, pos=pos)
-            if matched:
-                keep_procesing = True
-                pos = matched.start() + 1
-
-                if sentences_cache['all_sentences_starting_indexes'] is None:
-                    all_sentences = sentences_cache['all_sentences']
-                    sentences_cache['all_sentences_starting_indexes'] = self.utt_sentence_splitter.estimate_start_index_of_each_sentence_matching(utt, all_sentences)
-                sentence_start_index_in_utt = sentences_cache['all_sentences_starting_indexes'][sentences_cache['sentence_index']]
-
-                self._new_occurrence(result, sentence, sentence_start_index_in_utt, utt, utt_index, matched.start(), matched.end(), session_speech)
-            else:
-                keep_procesing = False
+    def _check_searched_in_sentence(self, result, sentence, sentence_start_index_in_utt, utt, utt_index, session_speech):
+        for match_start, match_end in self._find_matches_in_sentence(sentence):
+            self._new_occurrence(result, sentence, sentence_start_index_in_utt, utt, utt_index, match_start, match_end, session_speech)
         return False
 
     def _new_occurrence(self, result, sentence, sentence_start_index_in_utt, utt_ref, matched_utt_index, sentence_start_match, sentence_end_match, speech_ref):
@@ -150,6 +306,29 @@ class ListOccurrenceCounter:
             sentence_start_match,
             sentence_end_match,
             utt_ref, speech_ref,
-            prev_sentence)
+            prev_sentence,
+            source_file=self.cache['source_file'],
+            speech_index=self.cache['speech_index'])
 
         result.append(occurrence)
+
+
+# counter used by the worker process in ListOccurrenceCounter.run_count_corpus
+_worker_counter = None
+
+
+def _init_worker_counter(
+        searched_tokens: List[str],
+        use_phrase_matcher: Optional[bool],
+        use_sentence_cache: bool,
+        sentence_cache_fp: Optional[str]):
+    global _worker_counter
+    _worker_counter = ListOccurrenceCounter(
+        searched_tokens,
+        use_phrase_matcher=use_phrase_matcher,
+        use_sentence_cache=use_sentence_cache,
+        sentence_cache_fp=sentence_cache_fp)
+
+
+def _run_count_compact_in_worker(transcript: Union[SessionTranscript, str]) -> List[PhraseOccurrence]:
+    return _worker_counter.run_count_compact(transcript)
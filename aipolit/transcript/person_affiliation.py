@@ -1,7 +1,8 @@
 import os
 import json
 import logging
-from typing import Optional
+from bisect import bisect_right
+from typing import Optional, Union
 from datetime import date
 from collections import OrderedDict
 from aipolit.utils.date import text_to_date, date_to_text
@@ -13,8 +14,26 @@ def create_name_from_f_s_name(f_name: str, s_name: str) -> str:
 
 
 class Person:
+    """
+    Represents single person (MP) with the history of political clubs.
+
+    Clubs are compiled to sorted interval array of ordinal dates (club_bounds, club_by_interval),
+    so get_club is a single bisect. Compiled intervals are (re)built lazily after clubs are sorted.
+    """
     UNK_ENTRY = "TODO"
 
+    __slots__ = (
+        'f_name',
+        's_name',
+        'name',
+        'is_active',
+        'deactivate_reason',
+        'active_to',
+        'all_clubs',
+        'club_bounds',
+        'club_by_interval',
+    )
+
     def __init__(self, f_name: str, s_name: str, is_active: bool):
         self.f_name = f_name
         self.s_name = s_name
@@ -23,45 +42,81 @@ class Person:
         self.deactivate_reason = None
         self.active_to = None
         self.all_clubs = []
+        # compiled clubs: club for given date d is club_by_interval[bisect_right(club_bounds, d.toordinal())]
+        self.club_bounds = None
+        self.club_by_interval = None
 
-    def check_is_active(self, when: Optional[str] = None) -> bool:
+    def check_is_active(self, when: Optional[Union[str, date]] = None) -> bool:
         if self.is_active:
             return True
         else:
-            if when is not None:
-                when = text_to_date(when)
-            else:
-                when = date.today()
+            when = self._when_to_date(when)
 
             if when < self.active_to:
                 return True
             else:
                 return False
 
-    def get_club(self, when: Optional[str] = None) -> Optional[str]:
-        if not self.check_is_active(when=when):
-            return None
+    def get_club(self, when: Optional[Union[str, date]] = None) -> Optional[str]:
+        """
+        Returns club of the person during 'when' (date or string date, today if not defined).
+        Returns None if person was not active or was not a member of any club.
+        """
+        if self.club_bounds is None:
+            self.compile_clubs()
+
+        when = self._when_to_date(when)
+        return self.club_by_interval[bisect_right(self.club_bounds, when.toordinal())]
 
-        if when is not None:
-            when = text_to_date(when)
+    def compile_clubs(self):
+        """
+        Compiles all_clubs (and activity) to interval array of ordinal dates.
+        For each interval the club is the first club (from sorted all_clubs) which covers it.
+        Dates which are not known yet (UNK_ENTRY strings) are treated as not defined.
+        """
+        bounds = set()
+        for club in self.all_clubs:
+            for k in ['from_date', 'to_date']:
+                if isinstance(club.get(k, None), date):
+                    bounds.add(club[k].toordinal())
+        if not self.is_active and isinstance(self.active_to, date):
+            bounds.add(self.active_to.toordinal())
+        bounds = sorted(bounds)
+
+        if len(bounds) == 0:
+            club_by_interval = [self._find_club_at(date.today().toordinal())]
         else:
-            when = date.today()
+            club_by_interval = [self._find_club_at(bounds[0] - 1)]
+            for bound in bounds:
+                club_by_interval.append(self._find_club_at(bound))
+
+        self.club_bounds = tuple(bounds)
+        self.club_by_interval = tuple(club_by_interval)
+
+    def _find_club_at(self, ordinal: int) -> Optional[str]:
+        if not self.is_active and isinstance(self.active_to, date):
+            if ordinal >= self.active_to.toordinal():
+                return None
 
         for club in self.all_clubs:
-            if 'to_date' in club and 'from_date' in club:
-                if club['from_date'] <= when < club['to_date']:
-                    return club['club_name']
-            elif 'to_date' in club:
-                if when < club['to_date']:
-                    return club['club_name']
-            elif 'from_date' in club:
-                if when >= club['from_date']:
-                    return club['club_name']
-            else:
-                return club['club_name']
+            from_date = club.get('from_date', None)
+            to_date = club.get('to_date', None)
+            if isinstance(from_date, date) and ordinal < from_date.toordinal():
+                continue
+            if isinstance(to_date, date) and ordinal >= to_date.toordinal():
+                continue
+            return club['club_name']
 
         return None
 
+    @staticmethod
+    def _when_to_date(when: Optional[Union[str, date]]) -> date:
+        if when is None:
+            return date.today()
+        elif isinstance(when, str):
+            return text_to_date(when)
+        return when
+
     def to_dict(self) -> OrderedDict:
         dict_data = OrderedDict()
         dict_data["f_name"] = self.f_name
@@ -117,6 +172,8 @@ class Person:
 
         sorted_clubs = [c for c in sorted(self.all_clubs, key=get_for_sort_func)]
         self.all_clubs = sorted_clubs
+        self.club_bounds = None
+        self.club_by_interval = None
 
     @classmethod
     def text_to_date_with_unk(cls, txt: str):
@@ -146,6 +203,7 @@ class Person:
             new_person.active_to = cls.text_to_date_with_unk(json_entry['active_to'])
 
         new_person.sort_clubs()
+        new_person.compile_clubs()
         return new_person
 
 
@@ -214,12 +272,17 @@ class PersonAffiliation:
 
         return
 
-    def _load_data(self, fixed_filepath: Optional[str] = None):
-        fp = None
+    @classmethod
+    def get_data_filepath(cls, fixed_filepath: Optional[str] = None) -> str:
+        """
+        Returns path to JSON file with affiliations (fixed_filepath if defined, otherwise default sejm.json from resources).
+        """
         if fixed_filepath is not None:
-            fp = fixed_filepath
-        else:
-            fp = os.path.join(RESOURCES_DIR, self.AFFILIATION_DATA_DIR, "sejm.json")
+            return fixed_filepath
+        return os.path.join(RESOURCES_DIR, cls.AFFILIATION_DATA_DIR, "sejm.json")
+
+    def _load_data(self, fixed_filepath: Optional[str] = None):
+        fp = self.get_data_filepath(fixed_filepath)
 
         self.input_data_filepath = os.path.abspath(fp)
         data = None
@@ -0,0 +1,186 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import date
+from typing import Optional, List, Union, Iterable, Dict
+
+from aipolit.utils.globals import AIPOLIT_CACHE_DIR
+from aipolit.utils.date import date_obj_unk_to_text
+from aipolit.transcript.utils import list_transcript_filepaths, load_transcripts_from_filepaths
+from hipisejm.stenparser.transcript import SessionTranscript, SpeechReaction, SpeechInterruption
+
+
+class TranscriptSessionIndex:
+    """
+    Small sidecar index of the transcripts directory.
+    For each XML file it stores (in JSON file):
+    - session_date, session_no, term_no
+    - speakers - sorted list of all (raw) speaker names from speech tags
+    - speech_count and utt_counts (number of norm, reaction and interrupt utts)
+
+    Index allows to find transcripts matching given criteria without opening XML files.
+    It is built once and updated incrementally (only new or changed files are parsed,
+    entries of removed files are dropped).
+    """
+    MY_CACHE_DIR = "session-index"
+    INDEX_FORMAT_VERSION = 1
+
+    def __init__(self, transcripts_dir: str, index_fp: Optional[str] = None):
+        """
+        Params:
+        - transcripts_dir - directory with transcript XML files
+        - index_fp - where index is stored, by default it is file in AIPOLIT_CACHE_DIR (unique for transcripts_dir)
+        """
+        self.transcripts_dir = transcripts_dir
+        if index_fp is None:
+            dir_hash = hashlib.md5(os.path.abspath(transcripts_dir).encode('utf-8')).hexdigest()
+            index_fp = os.path.join(AIPOLIT_CACHE_DIR, self.MY_CACHE_DIR, f"{dir_hash}.json")
+        self.index_fp = index_fp
+
+        # filename -> entry
+        self.entries = dict()
+        self._load()
+
+    def update(
+            self,
+            workers: Optional[int] = None,
+            use_cache: bool = False,
+            loaded_transcripts: Optional[Dict[str, SessionTranscript]] = None,
+            save: bool = True) -> int:
+        """
+        Updates index with new or changed files (and removes entries for files which do not exist anymore).
+        Saves index to index_fp if anything changed (and save is True).
+
+        Params:
+        - workers, use_cache - how to parse transcripts which need to be indexed (check load_transcripts)
+        - loaded_transcripts - dict filepath -> already parsed transcript, such files are not parsed again
+        - save - if False, then index is updated only in memory
+
+        Returns number of updated entries.
+        """
+        if loaded_transcripts is None:
+            loaded_transcripts = dict()
+
+        filepaths = list_transcript_filepaths(self.transcripts_dir)
+
+        to_update = []
+        for filepath in filepaths:
+            entry = self.entries.get(os.path.basename(filepath), None)
+            file_stat = os.stat(filepath)
+            if entry is None or entry['size'] != file_stat.st_size or entry['mtime_ns'] != file_stat.st_mtime_ns:
+                to_update.append(filepath)
+
+        existing_filenames = {os.path.basename(fp) for fp in filepaths}
+        removed_filenames = [filename for filename in self.entries if filename not in existing_filenames]
+        for filename in removed_filenames:
+            del self.entries[filename]
+
+        to_parse = [fp for fp in to_update if fp not in loaded_transcripts]
+        parsed = load_transcripts_from_filepaths(to_parse, workers=workers, use_cache=use_cache)
+        filepath_to_transcript = dict(zip(to_parse, parsed))
+
+        for filepath in to_update:
+            transcript = loaded_transcripts.get(filepath, None)
+            if transcript is None:
+                transcript = filepath_to_transcript[filepath]
+            self.add_transcript(filepath, transcript)
+
+        if save and (len(to_update) > 0 or len(removed_filenames) > 0):
+            self.save()
+
+        logging.info(
+            "TranscriptSessionIndex: %i entries (%i updated, %i removed) in %s",
+            len(self.entries), len(to_update), len(removed_filenames), self.index_fp)
+        return len(to_update)
+
+    def add_transcript(self, filepath: str, transcript: SessionTranscript):
+        """
+        Adds (or replaces) index entry for given XML file and its parsed transcript.
+        """
+        file_stat = os.stat(filepath)
+
+        speakers = set()
+        utt_counts = {
+            'norm': 0,
+            'reaction': 0,
+            'interrupt': 0,
+        }
+        for session_speech in transcript.session_content:
+            speakers.add(session_speech.speaker)
+            for speech_content in session_speech.content:
+                if isinstance(speech_content, str):
+                    utt_counts['norm'] += 1
+                elif isinstance(speech_content, SpeechReaction):
+                    utt_counts['reaction'] += 1
+                elif isinstance(speech_content, SpeechInterruption):
+                    utt_counts['interrupt'] += 1
+
+        self.entries[os.path.basename(filepath)] = {
+            'size': file_stat.st_size,
+            'mtime_ns': file_stat.st_mtime_ns,
+            'session_date': transcript.session_date,
+            'session_no': transcript.session_no,
+            'term_no': transcript.term_no,
+            'speakers': sorted(speakers),
+            'speech_count': len(transcript.session_content),
+            'utt_counts': utt_counts,
+        }
+
+    def get_entry(self, filepath: str) -> Optional[dict]:
+        return self.entries.get(os.path.basename(filepath), None)
+
+    def find_filepaths(
+            self,
+            date_from: Optional[Union[str, date]] = None,
+            date_to: Optional[Union[str, date]] = None,
+            speakers: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Returns paths to XML files (sorted by filename) which meet all given criteria:
+        - date_from, date_to - session date in range (both ends inclusive, str or date)
+        - speakers - at least one of given (raw) speaker names has a speech in the session
+        """
+        date_from_txt = date_obj_unk_to_text(date_from)
+        date_to_txt = date_obj_unk_to_text(date_to)
+        speakers_set = None
+        if speakers is not None:
+            speakers_set = {s for s in speakers}
+
+        result = []
+        for filename, entry in sorted(self.entries.items()):
+            session_date = entry['session_date']
+            if date_from_txt is not None and (session_date is None or session_date < date_from_txt):
+                continue
+            if date_to_txt is not None and (session_date is None or session_date > date_to_txt):
+                continue
+            if speakers_set is not None and speakers_set.isdisjoint(entry['speakers']):
+                continue
+            result.append(os.path.join(self.transcripts_dir, filename))
+        return result
+
+    def save(self):
+        index_dir = os.path.dirname(self.index_fp)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+
+        tmp_fp = f"{self.index_fp}.{os.getpid()}.tmp"
+        with open(tmp_fp, "w", encoding='utf8') as f:
+            json.dump({
+                'version': self.INDEX_FORMAT_VERSION,
+                'transcripts_dir': os.path.abspath(self.transcripts_dir),
+                'entries': self.entries,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_fp, self.index_fp)
+
+    def _load(self):
+        if not os.path.isfile(self.index_fp):
+            return
+
+        with open(self.index_fp, "r", encoding='utf8') as f:
+            data = json.load(f)
+
+        if data.get('version') != self.INDEX_FORMAT_VERSION:
+            logging.info("TranscriptSessionIndex: index %s has old format, it will be rebuilt", self.index_fp)
+            return
+
+        self.entries = data['entries']
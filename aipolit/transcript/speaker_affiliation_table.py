@@ -0,0 +1,71 @@
+from datetime import date
+from typing import Optional, Iterable
+from hipisejm.stenparser.transcript import SessionTranscript
+
+
+class SpeakerAffiliationTable:
+    """
+    Table of resolved affiliations for raw speaker names (as they appear in transcripts).
+
+    For each speaker name the name matching (TranscriptSpeakerAffiliation.normalize_name) is run only once,
+    so getting affiliation for given speech is a dict lookup plus Person.get_club (bisect on few dates).
+
+    Table is filled for all speakers of given transcripts (add_transcripts) or lazily on first lookup of the speaker.
+    """
+    def __init__(self, transcript_speaker_affiliation):
+        """
+        transcript_speaker_affiliation - TranscriptSpeakerAffiliation used to resolve speaker names
+        """
+        self.transcript_speaker_affiliation = transcript_speaker_affiliation
+
+        # speaker_name -> (canon_name, person) or None if speaker can't be assigned to any person
+        self.speaker_to_entry = dict()
+
+    def add_transcripts(self, transcripts: Iterable[SessionTranscript]):
+        for transcript in transcripts:
+            self.add_speakers(session_speech.speaker for session_speech in transcript.session_content)
+
+    def add_speakers(self, speaker_names: Iterable[str]):
+        for speaker_name in speaker_names:
+            if speaker_name not in self.speaker_to_entry:
+                self.speaker_to_entry[speaker_name] = self._resolve(speaker_name)
+
+    def count(self) -> int:
+        return len(self.speaker_to_entry)
+
+    def get_canon_name(self, speaker_name: str) -> Optional[str]:
+        """
+        Returns name as it is returned by TranscriptSpeakerAffiliation.normalize_name
+        (only for speakers which can be assigned to the person, None otherwise).
+        """
+        entry = self._get_entry(speaker_name)
+        if entry is None:
+            return None
+        return entry[0]
+
+    def get_affiliation(self, speaker_name: str, when: date) -> Optional[str]:
+        """
+        Returns the same as TranscriptSpeakerAffiliation.assign_affiliation(speaker_name, when=when)
+        """
+        entry = self._get_entry(speaker_name)
+        if entry is None:
+            return None
+        return entry[1].get_club(when)
+
+    def _get_entry(self, speaker_name: str):
+        if speaker_name in self.speaker_to_entry:
+            return self.speaker_to_entry[speaker_name]
+        entry = self._resolve(speaker_name)
+        self.speaker_to_entry[speaker_name] = entry
+        return entry
+
+    def _resolve(self, speaker_name: str):
+        canon_name = self.transcript_speaker_affiliation.normalize_name(speaker_name)
+        if canon_name is None:
+            return None
+
+        person = self.transcript_speaker_affiliation.person_affiliation.get_person_by_name(canon_name)
+        if person is None:
+            return None
+
+        return (canon_name, person)
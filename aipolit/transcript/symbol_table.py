@@ -0,0 +1,50 @@
+from typing import Iterable, Optional
+from hipisejm.stenparser.transcript import SessionTranscript, SpeechInterruption
+from aipolit.utils.string_pool import StringPool
+
+
+class TranscriptSymbolTable:
+    """
+    Shared integer ids for strings which repeat across the whole corpus:
+    - speakers - raw speaker names (as they appear in transcripts, also names of interrupting persons)
+    - canon_names - canon names of persons (as returned by TranscriptSpeakerAffiliation.normalize_name)
+    - clubs - affiliations (clubs) of persons
+
+    Result structures (PhraseOccurrence, entries of create_affiliation_to_utts_from_transcripts, ColumnarTranscriptStore)
+    carry these ids, so group-bys are done on integers and each string is kept in memory only once.
+    Ids are valid only for given table, so the same table should be shared by all results which are compared.
+    Missing values (None) get NO_ID.
+    """
+    def __init__(self):
+        self.speakers = StringPool()
+        self.canon_names = StringPool()
+        self.clubs = StringPool()
+
+    def add_transcripts(self, transcripts: Iterable[SessionTranscript]):
+        """
+        Assigns ids to all speakers of given transcripts (speech speakers and interrupting persons).
+        """
+        for transcript in transcripts:
+            for session_speech in transcript.session_content:
+                self.speakers.add(session_speech.speaker)
+                for utt in session_speech.content:
+                    if isinstance(utt, SpeechInterruption):
+                        self.speakers.add_optional(utt.interrupted_by_speaker)
+
+    def get_speaker_id(self, speaker_name: Optional[str]) -> int:
+        return self.speakers.add_optional(speaker_name)
+
+    def get_canon_id(self, canon_name: Optional[str]) -> int:
+        return self.canon_names.add_optional(canon_name)
+
+    def get_club_id(self, club: Optional[str]) -> int:
+        return self.clubs.add_optional(club)
+
+    def get_speaker(self, speaker_id: int) -> Optional[str]:
+        return self.speakers.get_string(speaker_id)
+
+    def get_canon_name(self, canon_id: int) -> Optional[str]:
+        return self.canon_names.get_string(canon_id)
+
+    def get_club(self, club_id: int) -> Optional[str]:
+        return self.clubs.get_string(club_id)
@@ -0,0 +1,109 @@
+import os
+import pickle
+import hashlib
+import logging
+from typing import Optional
+
+from aipolit.utils.globals import AIPOLIT_CACHE_DIR
+from hipisejm.stenparser.transcript import SessionTranscript
+
+
+class TranscriptCache:
+    """
+    Persistent on-disk cache of parsed transcripts (SessionTranscript objects).
+    Stores one pickle file per source XML file in AIPOLIT_CACHE_DIR.
+
+    Entry is valid if size and mtime of XML file did not change.
+    If they changed, then md5 hash of the content is compared, so files which were only touched
+    (or copied) are not parsed again.
+
+    Remark: pickled entries depend on hipisejm classes, so if hipisejm changes its transcript model
+    please run .clear() (or bump CACHE_FORMAT_VERSION).
+    """
+    MY_CACHE_DIR = "parsed-transcripts"
+    CACHE_FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = os.path.join(AIPOLIT_CACHE_DIR, self.MY_CACHE_DIR)
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, filepath: str) -> Optional[SessionTranscript]:
+        """
+        Returns cached transcript or None if there is no valid entry for given XML file.
+        """
+        entry_fp = self._get_entry_filepath(filepath)
+        file_stat = os.stat(filepath)
+
+        meta = None
+        transcript = None
+        if os.path.isfile(entry_fp):
+            try:
+                with open(entry_fp, "rb") as f:
+                    meta = pickle.load(f)
+                    if self._is_entry_valid(meta, filepath, file_stat):
+                        transcript = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+                logging.warning("TranscriptCache: broken cache entry %s for %s (%s)", entry_fp, filepath, e)
+
+        if transcript is None:
+            self.misses += 1
+            logging.debug("TranscriptCache: MISS %s", filepath)
+            return None
+
+        if meta['size'] != file_stat.st_size or meta['mtime_ns'] != file_stat.st_mtime_ns:
+            # content is the same, but stats changed, so refresh them
+            self.put(filepath, transcript, content_hash=meta['content_hash'])
+
+        self.hits += 1
+        logging.debug("TranscriptCache: HIT %s", filepath)
+        return transcript
+
+    def put(self, filepath: str, transcript: SessionTranscript, content_hash: Optional[str] = None):
+        file_stat = os.stat(filepath)
+        if content_hash is None:
+            content_hash = self._get_content_hash(filepath)
+
+        meta = {
+            'version': self.CACHE_FORMAT_VERSION,
+            'filepath': os.path.abspath(filepath),
+            'size': file_stat.st_size,
+            'mtime_ns': file_stat.st_mtime_ns,
+            'content_hash': content_hash,
+        }
+
+        entry_fp = self._get_entry_filepath(filepath)
+        tmp_fp = f"{entry_fp}.{os.getpid()}.tmp"
+        with open(tmp_fp, "wb") as f:
+            pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(transcript, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_fp, entry_fp)
+
+    def clear(self):
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".pickle"):
+                os.remove(os.path.join(self.cache_dir, filename))
+
+    def log_stats(self):
+        logging.info("TranscriptCache: %i hits, %i misses (cache dir: %s)", self.hits, self.misses, self.cache_dir)
+
+    def _is_entry_valid(self, meta, filepath, file_stat) -> bool:
+        if meta.get('version') != self.CACHE_FORMAT_VERSION:
+            return False
+        if meta['size'] != file_stat.st_size:
+            return False
+        if meta['mtime_ns'] == file_stat.st_mtime_ns:
+            return True
+        return meta['content_hash'] == self._get_content_hash(filepath)
+
+    def _get_entry_filepath(self, filepath: str) -> str:
+        path_hash = hashlib.md5(os.path.abspath(filepath).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{path_hash}.pickle")
+
+    def _get_content_hash(self, filepath: str) -> str:
+        with open(filepath, "rb") as f:
+            return hashlib.md5(f.read()).hexdigest()
@@ -0,0 +1,433 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+from datetime import date
+from typing import Optional, List, Union, Iterable, Dict, Tuple
+import numpy as np
+
+from aipolit.utils.globals import AIPOLIT_CACHE_DIR
+from aipolit.utils.phrase_matcher import lower_keep_length
+from aipolit.utils.string_pool import NO_ID
+from aipolit.transcript.utils import list_transcript_filepaths, load_transcripts_from_filepaths
+from aipolit.transcript.columnar_store import (
+    ColumnarTranscriptStore, UTT_TYPE_NAMES, UTT_TYPE_NORM, UTT_TYPE_INTERRUPT, date_range_mask, utt_type_mask)
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from hipisejm.stenparser.transcript import SessionTranscript
+
+
+TOKEN_REGEX = re.compile(r"\w+")
+
+
+def tokenize_with_offsets(text: str) -> List[Tuple[str, int]]:
+    """
+    Returns list of (lowercased token, start offset in text) for all words (regex \\w+) of the text.
+    """
+    return [(m.group(0), m.start()) for m in TOKEN_REGEX.finditer(lower_keep_length(text))]
+
+
+class TranscriptIndexHit:
+    """
+    Single match of the query in the transcripts.
+
+    utt_row - row of the utt in the index
+    source_file - path to XML file of the session
+    session_date - date of the session (YYYY-MM-DD or None)
+    speech_index - index of the speech in transcript session_content
+    utt_index - index of the utt in speech content
+    utt_type - 'norm', 'reaction' or 'interrupt'
+    speaker - who said the matched text (speech speaker, person who interrupted or None for reaction)
+    start, end - character offsets of matched text in the utt text
+    """
+    def __init__(self, utt_row, source_file, session_date, speech_index, utt_index, utt_type, speaker, start, end):
+        self.utt_row = utt_row
+        self.source_file = source_file
+        self.session_date = session_date
+        self.speech_index = speech_index
+        self.utt_index = utt_index
+        self.utt_type = utt_type
+        self.speaker = speaker
+        self.start = start
+        self.end = end
+
+    def __str__(self):
+        return f"{self.session_date} {os.path.basename(self.source_file)} #{self.speech_index}/{self.utt_index} {self.speaker}: [{self.start}:{self.end}]"
+
+
+class TranscriptIndex:
+    """
+    Persistent inverted index of words used in transcript utts.
+
+    For each word (lowercased token, check tokenize_with_offsets) index keeps posting list of (utt row, token position, char offset),
+    where utt row points to the utt table (session, speech index, utt index, utt type, speaker who said the utt).
+    Allows to search for words and phrases (consecutive tokens, punctuation between tokens is ignored)
+    of speakers / affiliations / dates without scanning (and sentence splitting) the whole corpus.
+
+    Index is stored in directory (by default in AIPOLIT_CACHE_DIR, unique for transcripts_dir) as .npy arrays,
+    which are opened with mmap (so only used parts of posting lists are read), vocabulary and metadata are in meta.json,
+    texts of utts are kept in texts.bin (UTF-8) to show the matched context.
+    Index is built again if any XML file was added, removed or changed (check update).
+
+    Optionally (with_lemmas) index keeps also posting lists of lemmas, computed once per distinct utt text
+    with PLLemmatizer (spaCy nlp.pipe in worker processes) when index is built, so lemma queries do not run spaCy
+    on the corpus (only on the query).
+    """
+    MY_CACHE_DIR = "transcript-index"
+    INDEX_FORMAT_VERSION = 2
+    ARRAY_NAMES = [
+        'session_dates',
+        'utt_session', 'utt_speech_index', 'utt_index', 'utt_type', 'utt_speaker', 'utt_text',
+        'text_offsets',
+        'term_starts', 'postings_utt', 'postings_position', 'postings_offset',
+    ]
+    LEMMA_ARRAY_NAMES = [
+        'lemma_term_starts', 'lemma_postings_utt', 'lemma_postings_position', 'lemma_postings_offset', 'lemma_postings_length',
+    ]
+
+    def __init__(self, transcripts_dir: str, index_dir: Optional[str] = None, with_lemmas: bool = False):
+        """
+        Params:
+        - transcripts_dir - directory with transcript XML files
+        - index_dir - where index is stored, by default it is directory in AIPOLIT_CACHE_DIR (unique for transcripts_dir)
+        - with_lemmas - if True, then index keeps also posting lists of lemmas (computed with PLLemmatizer),
+                        so words can be searched regardless inflected form (check search with lemmas=True)
+        """
+        self.with_lemmas = with_lemmas
+        self.transcripts_dir = transcripts_dir
+        if index_dir is None:
+            dir_hash = hashlib.md5(os.path.abspath(transcripts_dir).encode('utf-8')).hexdigest()
+            index_dir = os.path.join(AIPOLIT_CACHE_DIR, self.MY_CACHE_DIR, dir_hash)
+        self.index_dir = index_dir
+
+        self.meta = None
+        self.arrays = dict()
+        self.texts = None
+        self.term_to_id = dict()
+        self.lemma_to_id = dict()
+        self.speakers = []
+        self.speaker_to_id = dict()
+        self._load()
+
+    def update(
+            self,
+            workers: Optional[int] = None,
+            use_cache: bool = False,
+            loaded_transcripts: Optional[Dict[str, SessionTranscript]] = None) -> bool:
+        """
+        Builds (and saves) index again if set of XML files (or their size / mtime) changed
+        (or lemmas are requested, but the index has none). Lemmas are kept if the previous index had them.
+
+        Params:
+        - workers, use_cache - how to parse transcripts (check load_transcripts),
+                               workers is also number of spaCy processes used to compute lemmas
+        - loaded_transcripts - dict filepath -> already parsed transcript, such files are not parsed again
+
+        Returns True if index was built.
+        """
+        filepaths = list_transcript_filepaths(self.transcripts_dir)
+        files = self._get_files_stats(filepaths)
+        with_lemmas = self.with_lemmas or (self.meta is not None and self.meta['with_lemmas'])
+        if self.meta is not None and self.meta['files'] == files and self.meta['with_lemmas'] == with_lemmas:
+            logging.info("TranscriptIndex: index is up to date (%i files) in %s", len(files), self.index_dir)
+            return False
+
+        if loaded_transcripts is None:
+            loaded_transcripts = dict()
+        to_parse = [fp for fp in filepaths if fp not in loaded_transcripts]
+        filepath_to_transcript = dict(zip(to_parse, load_transcripts_from_filepaths(to_parse, workers=workers, use_cache=use_cache)))
+        filepath_to_transcript.update(loaded_transcripts)
+        transcripts = [filepath_to_transcript[fp] for fp in filepaths]
+
+        store = ColumnarTranscriptStore.from_transcripts(transcripts, filepaths)
+        self._save(self._build(store, files, with_lemmas, workers))
+        self._load()
+        return True
+
+    def count_utts(self) -> int:
+        return len(self.arrays['utt_session'])
+
+    def count_terms(self) -> int:
+        return len(self.term_to_id)
+
+    def search(
+            self,
+            phrase: str,
+            speakers: Optional[Iterable[str]] = None,
+            affiliations: Optional[Iterable[str]] = None,
+            speaker_affiliation_table: Optional[SpeakerAffiliationTable] = None,
+            date_from: Optional[Union[str, date]] = None,
+            date_to: Optional[Union[str, date]] = None,
+            utt_types: Optional[Iterable[str]] = None,
+            limit: Optional[int] = None,
+            lemmas: bool = False) -> List[TranscriptIndexHit]:
+        """
+        Returns hits (in corpus order) of given word or phrase (case insensitive) which meet all given criteria:
+        - speakers - matched utt was said by one of given (raw) speaker names
+        - affiliations - person who said matched utt had one of given affiliations (in the session date),
+                         speaker_affiliation_table is required
+        - date_from, date_to - session date in range (both ends inclusive, str or date)
+        - utt_types - type of matched utt is one of given ('norm', 'reaction', 'interrupt')
+        - limit - if defined, then at most given number of hits is returned
+
+        If lemmas is True, then phrase is lemmatized and matched with lemmas of the utts (so e.g. "hańba" finds also
+        "hańbą" and "hańby"), index has to be built with_lemmas.
+        """
+        assert self.meta is not None, f"TranscriptIndex: index does not exist in {self.index_dir}, please run update()"
+        utt_rows, starts, ends = self._find_phrase(phrase, lemmas=lemmas)
+
+        mask = np.ones(len(utt_rows), dtype=bool)
+        if date_from is not None or date_to is not None:
+            session_mask = date_range_mask(self.arrays['session_dates'], date_from, date_to)
+            mask &= session_mask[self.arrays['utt_session'][utt_rows]]
+        if utt_types is not None:
+            mask &= utt_type_mask(utt_types)[self.arrays['utt_type'][utt_rows]]
+        if speakers is not None:
+            speaker_ids = [self.speaker_to_id[s] for s in speakers if s in self.speaker_to_id]
+            mask &= np.isin(self.arrays['utt_speaker'][utt_rows], speaker_ids)
+        if affiliations is not None:
+            assert speaker_affiliation_table is not None, "speaker_affiliation_table is required to filter by affiliations"
+            mask &= self._affiliation_mask(utt_rows, set(affiliations), speaker_affiliation_table)
+
+        utt_rows, starts, ends = utt_rows[mask], starts[mask], ends[mask]
+        if limit is not None:
+            utt_rows, starts, ends = utt_rows[:limit], starts[:limit], ends[:limit]
+        return [self._create_hit(utt_row, start, end) for utt_row, start, end in zip(utt_rows.tolist(), starts.tolist(), ends.tolist())]
+
+    def get_utt_text(self, utt_row: int) -> str:
+        text_id = self.arrays['utt_text'][utt_row]
+        text_offsets = self.arrays['text_offsets']
+        return bytes(self.texts[text_offsets[text_id]:text_offsets[text_id + 1]]).decode('utf-8')
+
+    def _find_phrase(self, phrase, lemmas=False):
+        if lemmas:
+            assert self.meta['with_lemmas'], f"TranscriptIndex: index in {self.index_dir} has no lemmas, please run update() with with_lemmas=True"
+            terms = [lemma for lemma, _, _ in self._get_lemmatizer().lemmatize_many_with_offsets([phrase])[0]]
+            return self._find_terms(terms, self.lemma_to_id, 'lemma_')
+        terms = [token for token, _ in tokenize_with_offsets(phrase)]
+        return self._find_terms(terms, self.term_to_id, '')
+
+    def _find_terms(self, terms, term_to_id, prefix):
+        if len(terms) == 0 or any(term not in term_to_id for term in terms):
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, empty
+
+        utt_rows, positions, starts, ends = self._get_postings(terms[0], term_to_id, prefix)
+        for term_index, term in enumerate(terms[1:], 1):
+            term_utt_rows, term_positions, _, term_ends = self._get_postings(term, term_to_id, prefix)
+            term_keys = self._posting_keys(term_utt_rows, term_positions)
+            keys = self._posting_keys(utt_rows, positions + term_index)
+            # postings are sorted by (utt row, position), so keys are sorted too
+            found = np.minimum(np.searchsorted(term_keys, keys), max(0, len(term_keys) - 1))
+            matched = term_keys[found] == keys if len(term_keys) > 0 else np.zeros(len(keys), dtype=bool)
+            utt_rows, positions, starts = utt_rows[matched], positions[matched], starts[matched]
+            ends = term_ends[found[matched]]
+        return utt_rows, starts, ends
+
+    def _get_postings(self, term, term_to_id, prefix):
+        """
+        Returns (utt rows, positions, start offsets, end offsets) of the term.
+        """
+        term_id = term_to_id[term]
+        term_starts = self.arrays[f"{prefix}term_starts"]
+        start, end = term_starts[term_id], term_starts[term_id + 1]
+        offsets = self.arrays[f"{prefix}postings_offset"][start:end].astype(np.int64)
+        if f"{prefix}postings_length" in self.arrays:
+            ends = offsets + self.arrays[f"{prefix}postings_length"][start:end]
+        else:
+            ends = offsets + len(term)
+        return (
+            self.arrays[f"{prefix}postings_utt"][start:end].astype(np.int64),
+            self.arrays[f"{prefix}postings_position"][start:end],
+            offsets,
+            ends)
+
+    @staticmethod
+    def _get_lemmatizer():
+        # spaCy model is loaded only in lemma mode
+        from aipolit.preprocessors.lemmatizer import PLLemmatizer
+        return PLLemmatizer.get_instance()
+
+    @staticmethod
+    def _posting_keys(utt_rows, positions):
+        return (np.asarray(utt_rows, dtype=np.int64) << 32) | np.asarray(positions, dtype=np.int64)
+
+    def _affiliation_mask(self, utt_rows, affiliations_set, speaker_affiliation_table):
+        speaker_ids = self.arrays['utt_speaker'][utt_rows]
+        sessions = self.arrays['utt_session'][utt_rows]
+        sessions_count = max(1, len(self.arrays['session_dates']))
+        pair_keys = speaker_ids.astype(np.int64) * sessions_count + sessions
+        unique_keys, inverse = np.unique(pair_keys, return_inverse=True)
+        unique_matched = np.zeros(len(unique_keys), dtype=bool)
+        for i, pair_key in enumerate(unique_keys.tolist()):
+            speaker_id, session_idx = divmod(pair_key, sessions_count)
+            if speaker_id == NO_ID or speaker_id < 0:
+                continue
+            session_date = self.arrays['session_dates'][session_idx].tolist()
+            # affiliation is unknown for session without date (get_club(None) would return current club)
+            if session_date is None:
+                continue
+            affiliation = speaker_affiliation_table.get_affiliation(self.speakers[speaker_id], session_date)
+            unique_matched[i] = affiliation in affiliations_set
+        return unique_matched[inverse.reshape(-1)]
+
+    def _create_hit(self, utt_row, start, end):
+        session_idx = self.arrays['utt_session'][utt_row]
+        session_date = self.arrays['session_dates'][session_idx]
+        speaker_id = self.arrays['utt_speaker'][utt_row]
+        return TranscriptIndexHit(
+            utt_row,
+            os.path.join(self.transcripts_dir, self.meta['session_filenames'][session_idx]),
+            None if np.isnat(session_date) else str(session_date),
+            int(self.arrays['utt_speech_index'][utt_row]),
+            int(self.arrays['utt_index'][utt_row]),
+            UTT_TYPE_NAMES[self.arrays['utt_type'][utt_row]],
+            None if speaker_id == NO_ID else self.speakers[speaker_id],
+            start,
+            end)
+
+    def _build(self, store: ColumnarTranscriptStore, files: Dict[str, dict], with_lemmas: bool, workers: Optional[int]) -> dict:
+        # who said the utt (the same as get_speaker_for_utt)
+        utt_speaker = np.where(
+            store.utt_type == UTT_TYPE_NORM,
+            store.utt_speaker,
+            np.where(store.utt_type == UTT_TYPE_INTERRUPT, store.utt_interrupted_by, NO_ID)).astype(np.int32)
+
+        # each distinct text is tokenized once
+        text_tokens = [
+            [(token, offset, offset + len(token)) for token, offset in tokenize_with_offsets(text)]
+            for text in store.texts.strings]
+        postings_arrays, terms = self._build_postings(text_tokens, store.utt_text, '', with_lengths=False)
+
+        encoded_texts = [text.encode('utf-8') for text in store.texts.strings]
+        text_offsets = np.zeros(len(encoded_texts) + 1, dtype=np.int64)
+        text_offsets[1:] = np.cumsum([len(t) for t in encoded_texts])
+
+        speech_first_utt = store.speech_first_utt[store.utt_speech]
+        arrays = {
+            'session_dates': store.session_dates,
+            'utt_session': store.utt_session.astype(np.int32),
+            'utt_speech_index': store.utt_speech_index,
+            'utt_index': (np.arange(store.count_utts()) - speech_first_utt).astype(np.int32),
+            'utt_type': store.utt_type,
+            'utt_speaker': utt_speaker,
+            'utt_text': store.utt_text,
+            'text_offsets': text_offsets,
+        }
+        arrays.update(postings_arrays)
+        meta = {
+            'version': self.INDEX_FORMAT_VERSION,
+            'transcripts_dir': os.path.abspath(self.transcripts_dir),
+            'files': files,
+            'session_filenames': store.session_filenames,
+            'speakers': store.names.strings,
+            'terms': terms,
+            'with_lemmas': with_lemmas,
+        }
+        if with_lemmas:
+            lemma_tokens = self._get_lemmatizer().lemmatize_many_with_offsets(store.texts.strings, n_process=workers)
+            lemma_postings_arrays, meta['lemmas'] = self._build_postings(lemma_tokens, store.utt_text, 'lemma_', with_lengths=True)
+            arrays.update(lemma_postings_arrays)
+        logging.info(
+            "TranscriptIndex: built index of %i utts, %i terms, %i postings",
+            store.count_utts(), len(terms), len(postings_arrays['postings_utt']))
+        return {'meta': meta, 'arrays': arrays, 'texts': b"".join(encoded_texts)}
+
+    @staticmethod
+    def _build_postings(text_tokens, utt_text, prefix, with_lengths):
+        """
+        Returns (dict of arrays, list of terms) for posting lists of utts,
+        text_tokens are (term, start, end) for each distinct text, utt_text is text id of each utt.
+        """
+        term_to_id = dict()
+        encoded_tokens = []
+        for tokens in text_tokens:
+            encoded_tokens.append((
+                np.array([term_to_id.setdefault(term, len(term_to_id)) for term, _, _ in tokens], dtype=np.int32),
+                np.array([start for _, start, _ in tokens], dtype=np.int32),
+                np.array([end - start for _, start, end in tokens], dtype=np.int32)))
+
+        columns = ([], [], [], [], [])
+        for utt_row, text_id in enumerate(utt_text.tolist()):
+            term_ids, offsets, lengths = encoded_tokens[text_id]
+            columns[0].append(term_ids)
+            columns[1].append(np.full(len(term_ids), utt_row, dtype=np.int32))
+            columns[2].append(np.arange(len(term_ids), dtype=np.int32))
+            columns[3].append(offsets)
+            columns[4].append(lengths)
+        postings_term, postings_utt, postings_position, postings_offset, postings_length = [
+            np.concatenate(column) if column else np.array([], dtype=np.int32) for column in columns]
+
+        # stable sort by term keeps (utt row, position) order in each posting list
+        order = np.argsort(postings_term, kind='stable')
+        term_starts = np.zeros(len(term_to_id) + 1, dtype=np.int64)
+        term_starts[1:] = np.cumsum(np.bincount(postings_term, minlength=len(term_to_id)))
+
+        arrays = {
+            f"{prefix}term_starts": term_starts,
+            f"{prefix}postings_utt": postings_utt[order],
+            f"{prefix}postings_position": postings_position[order],
+            f"{prefix}postings_offset": postings_offset[order],
+        }
+        if with_lengths:
+            arrays[f"{prefix}postings_length"] = postings_length[order]
+        return arrays, sorted(term_to_id, key=term_to_id.get)
+
+    def _save(self, index: dict):
+        parent_dir = os.path.dirname(os.path.abspath(self.index_dir))
+        os.makedirs(parent_dir, exist_ok=True)
+
+        # index is written to temporary directory and replaced at once
+        tmp_dir = f"{self.index_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, array in index['arrays'].items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, "texts.bin"), "wb") as f:
+            f.write(index['texts'])
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding='utf8') as f:
+            json.dump(index['meta'], f, ensure_ascii=False)
+
+        old_dir = f"{self.index_dir}.{os.getpid()}.old"
+        if os.path.isdir(self.index_dir):
+            os.replace(self.index_dir, old_dir)
+        os.replace(tmp_dir, self.index_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _load(self):
+        meta_fp = os.path.join(self.index_dir, "meta.json")
+        if not os.path.isfile(meta_fp):
+            return
+
+        with open(meta_fp, "r", encoding='utf8') as f:
+            meta = json.load(f)
+        if meta.get('version', None) != self.INDEX_FORMAT_VERSION:
+            logging.info("TranscriptIndex: index in %s has old format, it will be built again", self.index_dir)
+            return
+
+        array_names = self.ARRAY_NAMES + (self.LEMMA_ARRAY_NAMES if meta['with_lemmas'] else [])
+        self.arrays = {
+            name: np.load(os.path.join(self.index_dir, f"{name}.npy"), mmap_mode='r')
+            for name in array_names}
+        texts_fp = os.path.join(self.index_dir, "texts.bin")
+        if os.path.getsize(texts_fp) > 0:
+            self.texts = np.memmap(texts_fp, dtype=np.uint8, mode='r')
+        else:
+            self.texts = np.array([], dtype=np.uint8)
+        self.term_to_id = {term: term_id for term_id, term in enumerate(meta['terms'])}
+        self.lemma_to_id = {lemma: lemma_id for lemma_id, lemma in enumerate(meta.get('lemmas', []))}
+        self.speakers = meta['speakers']
+        self.speaker_to_id = {speaker: speaker_id for speaker_id, speaker in enumerate(self.speakers)}
+        self.meta = meta
+
+    @staticmethod
+    def _get_files_stats(filepaths: List[str]) -> Dict[str, dict]:
+        result = dict()
+        for filepath in filepaths:
+            file_stat = os.stat(filepath)
+            result[os.path.basename(filepath)] = {
+                'size': file_stat.st_size,
+                'mtime_ns': file_stat.st_mtime_ns,
+            }
+        return result
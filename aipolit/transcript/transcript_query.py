@@ -1,8 +1,15 @@
-from aipolit.transcript.utils import load_transcripts
+import sys
+from collections import Counter
+from aipolit.transcript.utils import load_transcripts_from_filepaths, iter_transcripts_from_filepaths, get_transcripts_dir, list_transcript_filepaths
+from aipolit.transcript.session_index import TranscriptSessionIndex
 from hipisejm.stenparser.transcript import SpeechReaction, SpeechInterruption
-from aipolit.transcript.transcript_speaker_affiliation import TranscriptSpeakerAffiliation
-from aipolit.transcript.person_affiliation import PersonAffiliation
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from aipolit.transcript.affiliation_snapshot import load_transcript_speaker_affiliation
+from aipolit.transcript.columnar_store import ColumnarTranscriptStore, AVAILABLE_DUMP_GROUP_BY
+from aipolit.transcript.symbol_table import TranscriptSymbolTable
 from aipolit.utils.date import text_to_date
+from aipolit.utils.output_sink import OutputSink, BufferedOutputSink, ListOutputSink
+from hipisejm.stenparser.transcript_utils import get_speaker_for_utt
 
 
 AVAILABLE_TO_DUMP = {
@@ -15,53 +22,279 @@ AVAILABLE_TO_DUMP = {
 }
 
 
+# number of transcripts converted at once to ColumnarTranscriptStore by TranscriptQuery.aggregate in streaming mode
+AGGREGATE_CHUNK_SIZE = 32
+
+
+def counter_to_ranking(counter, top_n=None):
+    """
+    Returns rows [*key values, count] from Counter of tuples (e.g. from TranscriptQuery.aggregate),
+    sorted by count (descending) and keys, limited to top_n rows (if defined).
+    """
+    ranking = sorted(counter.items(), key=lambda k_v: (-k_v[1], tuple(str(k) for k in k_v[0])))
+    if top_n is not None:
+        ranking = ranking[:top_n]
+    return [list(key) + [count] for key, count in ranking]
+
+
+def normalize_what_to_dump(what_to_dump):
+    """
+    Returns set of keys of AVAILABLE_TO_DUMP (what_to_dump can be str, list or set).
+    """
+    # workaround for argparse :)
+    if isinstance(what_to_dump, list):
+        what_to_dump = {k for k in what_to_dump}
+    elif isinstance(what_to_dump, str):
+        what_to_dump = {what_to_dump}
+
+    assert isinstance(what_to_dump, set), "what_to_dump should be set!"
+
+    for dump_type in what_to_dump:
+        assert dump_type in AVAILABLE_TO_DUMP
+    return what_to_dump
+
+
+class NamedQuery:
+    """
+    Single query of the batch (check TranscriptQuery.query_many), params are the same as in TranscriptQuery.query.
+    """
+    def __init__(
+            self,
+            name,
+            what_to_dump,
+            to_filehandle=None,
+            to_list=None,
+            to_sink=None,
+            restrict_speaker_affiliations=None,
+            date_from=None,
+            date_to=None,
+            speakers=None):
+        self.name = name
+        self.what_to_dump = normalize_what_to_dump(what_to_dump)
+        self.to_filehandle = to_filehandle
+        self.to_list = to_list
+        self.to_sink = to_sink
+        self.restrict_speaker_affiliations = restrict_speaker_affiliations
+        self.date_from = date_from
+        self.date_to = date_to
+        self.speakers = speakers
+
+    def has_session_criteria(self):
+        return self.date_from is not None or self.date_to is not None or self.speakers is not None
+
+
 class TranscriptQuery:
     """
     This class helps to dump specific parts of the transcripts.
     For example one can use it to dump all speaker names.
     """
 
-    def __init__(self, fixed_transcript_dir=None):
-        self.transcripts = load_transcripts(fixed_dir=fixed_transcript_dir)
+    def __init__(
+            self,
+            fixed_transcript_dir=None,
+            workers=None,
+            use_cache=False,
+            streaming=False,
+            session_index_fp=None,
+            columnar=False,
+            use_snapshot=False,
+            snapshot_cache_dir=None):
+        """
+        Params:
+        - fixed_transcript_dir - if defined, then loads transcripts from this dir (instead of default one)
+        - workers - if defined (and > 1), then transcripts are parsed in the pool of given number of processes
+        - use_cache - if True, then parsed transcripts are stored/taken from TranscriptCache (in AIPOLIT_CACHE_DIR)
+        - streaming - if True, then transcripts are not loaded at once, but each query parses (or takes from cache)
+                      transcripts one by one, so only single session is kept in memory (workers is ignored)
+        - session_index_fp - where TranscriptSessionIndex is stored (used by queries with date/speakers criteria),
+                             by default it is stored in AIPOLIT_CACHE_DIR, but only in streaming mode
+                             (otherwise transcripts are already loaded, so index is built in memory)
+        - columnar - if True, then loaded transcripts are converted to ColumnarTranscriptStore
+                     and queries are run with vectorised filters on its columns (ignored in streaming mode)
+        - use_snapshot - if True, then speaker affiliations are loaded from AffiliationSnapshot
+                         (JSON with affiliations is parsed only when it changes)
+        - snapshot_cache_dir - where AffiliationSnapshot is stored, by default it is in AIPOLIT_CACHE_DIR
+        """
+        self.transcripts_dir = get_transcripts_dir(fixed_dir=fixed_transcript_dir)
+        self.workers = workers
+        self.use_cache = use_cache
+        self.streaming = streaming
+        self.session_index_fp = session_index_fp
+        self.session_index = None
+
+        self.transcript_filepaths = None
+        self.transcripts = None
+        if not self.streaming:
+            self.transcript_filepaths = list_transcript_filepaths(self.transcripts_dir)
+            self.transcripts = load_transcripts_from_filepaths(self.transcript_filepaths, workers=workers, use_cache=use_cache)
 
-        person_affiliation = PersonAffiliation()
-        self.transcript_speaker_affiliation = TranscriptSpeakerAffiliation(person_affiliation)
+        self.transcript_speaker_affiliation = load_transcript_speaker_affiliation(
+            use_snapshot=use_snapshot, snapshot_cache_dir=snapshot_cache_dir)
+
+        # resolved once per corpus load and reused in all queries (in streaming mode it is filled lazily)
+        self.speaker_affiliation_table = SpeakerAffiliationTable(self.transcript_speaker_affiliation)
+        # ids of speakers, canon names and clubs shared by results of this query object
+        self.symbol_table = TranscriptSymbolTable()
+        if self.transcripts is not None:
+            self.speaker_affiliation_table.add_transcripts(self.transcripts)
+            self.symbol_table.add_transcripts(self.transcripts)
+
+        self.columnar_store = None
+        if columnar and not self.streaming:
+            self.columnar_store = ColumnarTranscriptStore.from_transcripts(
+                self.transcripts, self.transcript_filepaths, symbol_table=self.symbol_table)
+        # built on first usage of aggregate (when not in columnar or streaming mode)
+        self.aggregation_store = None
 
         self.cache = {}
         self._clear_cache()
 
-    def query(self, what_to_dump, to_filehandle=None, to_list=None, restrict_speaker_affiliations=None):
+    def query(
+            self,
+            what_to_dump,
+            to_filehandle=None,
+            to_list=None,
+            to_sink=None,
+            restrict_speaker_affiliations=None,
+            date_from=None,
+            date_to=None,
+            speakers=None):
         """
         Queries Transcripts.
         By default dumps to stdout.
+        Lines are buffered and written in batches, buffers are flushed (but filehandles are not closed) at the end of the query.
 
         Params:
         - what_to_dump - one of choices from AVAILABLE_TO_DUMP, refers to particular tags of the XML transcript file (check hipisejm README for details)
         - to_filehandle - if defined, then uses this filehandle to save dumped parts
         - to_list - if defined then each dumped txt is appended to given list (ignored if to_filehandle is defined)
+        - to_sink - if defined, then dumped txts are put to this OutputSink (to_filehandle and to_list are ignored),
+                    sink with with_meta=True gets also metadata of each txt: dumped_as (key of AVAILABLE_TO_DUMP),
+                    speaker, date and affiliation of the speaker (check open_output_sink for JSONL and compressed files)
         - restrict_speaker_affiliations - if defined, then limits processed speakers to affiliation from given list of parties (is applied only to speech by tag)
+        - date_from, date_to - if defined, then processes only sessions from given date range (both ends inclusive, str or date)
+        - speakers - if defined, then processes only speeches of given (raw) speaker names
+
+        Criteria date_from, date_to and speakers are resolved using TranscriptSessionIndex,
+        so non-matching transcripts are skipped without opening XML files (in streaming mode).
+        In columnar mode all criteria are boolean masks on ColumnarTranscriptStore columns (session index is not used).
+        """
+        self.query_many([NamedQuery(
+            'query',
+            what_to_dump,
+            to_filehandle=to_filehandle,
+            to_list=to_list,
+            to_sink=to_sink,
+            restrict_speaker_affiliations=restrict_speaker_affiliations,
+            date_from=date_from,
+            date_to=date_to,
+            speakers=speakers)])
+
+    def query_many(self, named_queries):
         """
-        # workaround for argparse :)
-        if isinstance(what_to_dump, list):
-            what_to_dump = {k for k in what_to_dump}
-        elif isinstance(what_to_dump, str):
-            what_to_dump = {what_to_dump}
+        Runs batch of queries (list of NamedQuery, each with own what_to_dump, criteria and output) in single pass:
+        transcripts are iterated (and parsed in streaming mode) only once and affiliation of the speech speaker
+        is resolved once for all queries which restrict affiliations.
+        Each query gets exactly the same results as from separate TranscriptQuery.query call.
 
-        assert isinstance(what_to_dump, set), "what_to_dump should be set!"
+        In columnar mode each query is a vectorised filter, affiliations of speeches are resolved once (cached in the store).
+        """
+        names = [named_query.name for named_query in named_queries]
+        assert len(names) == len(set(names)), f"names of queries should be unique: {names}"
 
         self._clear_cache()
-        self.cache['out_file'] = to_filehandle
-        self.cache['out_list'] = to_list
+        self.cache['query_runs'] = [_QueryRun(named_query, self) for named_query in named_queries]
+
+        try:
+            if self.columnar_store is not None:
+                for query_run in self.cache['query_runs']:
+                    self._dump_columnar(query_run)
+            else:
+                self._dump_matching(self.cache['query_runs'])
+        finally:
+            for query_run in self.cache['query_runs']:
+                query_run.out_sink.flush()
+
+    def aggregate(
+            self,
+            what_to_dump,
+            group_by,
+            restrict_speaker_affiliations=None,
+            date_from=None,
+            date_to=None,
+            speakers=None):
+        """
+        Counts strings which would be dumped by the query with the same params (what_to_dump and criteria) grouped by
+        given keys (from AVAILABLE_DUMP_GROUP_BY: text, dumped_as, speaker, canon_name, affiliation, session, date, month).
+        Returns Counter: tuple of key values (in group_by order) -> count, use counter_to_ranking to get top N rows.
+
+        E.g. ranking of who interrupts the most (without dumping all names and sort | uniq -c):
+            counter_to_ranking(transcript_query.aggregate('utt_interrupt_by', ['text']), top_n=20)
+
+        Counting is done on interned ids of ColumnarTranscriptStore. Without columnar mode loaded transcripts are converted
+        to the store on first aggregation, in streaming mode matching transcripts are converted in chunks
+        of AGGREGATE_CHUNK_SIZE transcripts.
+        """
+        what_to_dump = normalize_what_to_dump(what_to_dump)
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        for key in group_by:
+            assert key in AVAILABLE_DUMP_GROUP_BY, f"Unknown group_by key: {key}"
 
-        for dump_type in what_to_dump:
-            assert dump_type in AVAILABLE_TO_DUMP
+        named_query = NamedQuery(
+            'aggregate',
+            what_to_dump,
+            restrict_speaker_affiliations=restrict_speaker_affiliations,
+            date_from=date_from,
+            date_to=date_to,
+            speakers=speakers)
 
-        matching_transcripts = self.transcripts
-        self._dump_matching(matching_transcripts, what_to_dump, restrict_speaker_affiliations)
+        if self.columnar_store is not None:
+            return self._aggregate_store(self.columnar_store, named_query, group_by)
+
+        if not self.streaming:
+            # loaded transcripts are converted only once (on first aggregation)
+            if self.aggregation_store is None:
+                self.aggregation_store = ColumnarTranscriptStore.from_transcripts(
+                    self.transcripts, self.transcript_filepaths, symbol_table=self.symbol_table)
+            return self._aggregate_store(self.aggregation_store, named_query, group_by)
+
+        result = Counter()
+        chunk_filepaths = []
+        chunk_transcripts = []
+        for filepath, transcript in self._iter_filepaths_with_transcripts(self._find_matching_filepaths(named_query)):
+            chunk_filepaths.append(filepath)
+            chunk_transcripts.append(transcript)
+            if len(chunk_transcripts) >= AGGREGATE_CHUNK_SIZE:
+                result.update(self._aggregate_transcripts(chunk_transcripts, chunk_filepaths, named_query, group_by))
+                chunk_filepaths = []
+                chunk_transcripts = []
+        if len(chunk_transcripts) > 0:
+            result.update(self._aggregate_transcripts(chunk_transcripts, chunk_filepaths, named_query, group_by))
+        return result
 
     def count_transcripts(self):
+        if self.streaming:
+            return len(list_transcript_filepaths(self.transcripts_dir))
         return len(self.transcripts)
 
+    def get_session_index(self) -> TranscriptSessionIndex:
+        """
+        Returns TranscriptSessionIndex for queried transcripts (it is updated on first usage).
+        Index is saved only in streaming mode or if session_index_fp is given.
+        """
+        if self.session_index is None:
+            self.session_index = TranscriptSessionIndex(self.transcripts_dir, index_fp=self.session_index_fp)
+            loaded_transcripts = None
+            if not self.streaming:
+                loaded_transcripts = dict(zip(self.transcript_filepaths, self.transcripts))
+            self.session_index.update(
+                workers=self.workers,
+                use_cache=self.use_cache,
+                loaded_transcripts=loaded_transcripts,
+                save=self.streaming or self.session_index_fp is not None)
+        return self.session_index
+
     def assign_speakers_to_affiliations(self):
         """
         Collects all unique speakers from "speech" tags, and for all of them tries to assign affiliation.
@@ -75,7 +308,7 @@ class TranscriptQuery:
 
         speaker_name_to_entry = dict()
 
-        for transcript in self.transcripts:
+        for _, transcript in self._iter_filepaths_with_transcripts():
             transcript_when = text_to_date(transcript.session_date)
 
             for session_speech in transcript.session_content:
@@ -88,58 +321,195 @@ class TranscriptQuery:
                     }
 
                 entry = speaker_name_to_entry[speaker_name]
-                speaker_affiliation = self.transcript_speaker_affiliation.assign_affiliation(
-                    speaker_name, when=transcript_when)
+                speaker_affiliation = self.speaker_affiliation_table.get_affiliation(
+                    speaker_name, transcript_when)
 
                 if speaker_affiliation:
                     entry['affiliations'].add(speaker_affiliation)
-                    canon = self.transcript_speaker_affiliation.normalize_name(speaker_name)
+                    canon = self.speaker_affiliation_table.get_canon_name(speaker_name)
                     entry['canon_name'] = canon
 
         return speaker_name_to_entry
 
+    def _find_matching_filepaths(self, named_query):
+        """
+        Returns set of XML filepaths matching session criteria of the query (using TranscriptSessionIndex)
+        or None if query has no such criteria.
+        """
+        if not named_query.has_session_criteria():
+            return None
+        return set(self.get_session_index().find_filepaths(
+            date_from=named_query.date_from, date_to=named_query.date_to, speakers=named_query.speakers))
+
+    def _iter_filepaths_with_transcripts(self, matching_filepaths=None):
+        """
+        Iterates over pairs (filepath, transcript), in streaming mode transcripts are parsed one by one.
+        If matching_filepaths is defined, then other transcripts are skipped (without parsing in streaming mode).
+        """
+        if self.streaming:
+            filepaths = list_transcript_filepaths(self.transcripts_dir)
+            if matching_filepaths is not None:
+                filepaths = [fp for fp in filepaths if fp in matching_filepaths]
+            return zip(filepaths, iter_transcripts_from_filepaths(filepaths, use_cache=self.use_cache))
+
+        pairs = zip(self.transcript_filepaths, self.transcripts)
+        if matching_filepaths is None:
+            return pairs
+        return ((fp, t) for fp, t in pairs if fp in matching_filepaths)
+
     def _clear_cache(self):
         self.cache = dict()
-        self.cache['out_file'] = None
-        self.cache['out_list'] = None
+        self.cache['query_runs'] = []
 
-    def _dump_matching(self, matching_transcripts, what_to_dump, restrict_speaker_affiliations):
-        restrict_speaker_affiliations_set = set()
-        if restrict_speaker_affiliations is not None:
-            restrict_speaker_affiliations_set = {r for r in restrict_speaker_affiliations}
+    @staticmethod
+    def _create_sink(to_filehandle, to_list, to_sink) -> OutputSink:
+        if to_sink is not None:
+            return to_sink
+        if to_filehandle is not None:
+            return BufferedOutputSink(to_filehandle)
+        if to_list is not None:
+            return ListOutputSink(to_list)
+        return BufferedOutputSink(sys.stdout)
 
-        for transcript in matching_transcripts:
+    def _create_meta(self, dumped_as, speaker, when):
+        affiliation = None
+        if speaker is not None and when is not None:
+            affiliation = self.speaker_affiliation_table.get_affiliation(speaker, when)
+        return {
+            'dumped_as': dumped_as,
+            'speaker': speaker,
+            'date': when,
+            'affiliation': affiliation,
+        }
+
+    def _dump_matching(self, query_runs):
+        for query_run in query_runs:
+            query_run.matching_filepaths = self._find_matching_filepaths(query_run.named_query)
+
+        # transcripts needed by any query
+        all_matching_filepaths = set()
+        for query_run in query_runs:
+            if query_run.matching_filepaths is None:
+                all_matching_filepaths = None
+                break
+            all_matching_filepaths.update(query_run.matching_filepaths)
+
+        for filepath, transcript in self._iter_filepaths_with_transcripts(all_matching_filepaths):
             transcript_when = text_to_date(transcript.session_date)
+            active_runs = [
+                query_run for query_run in query_runs
+                if query_run.matching_filepaths is None or filepath in query_run.matching_filepaths]
 
             for session_speech in transcript.session_content:
-                if restrict_speaker_affiliations is not None:
-                    speaker_affiliation = self.transcript_speaker_affiliation.assign_affiliation(
-                        session_speech.speaker, when=transcript_when)
-                    if speaker_affiliation not in restrict_speaker_affiliations_set:
+                # resolved on first usage, shared by all queries
+                speaker_affiliation = None
+                is_affiliation_resolved = False
+
+                for query_run in active_runs:
+                    if query_run.restrict_speakers_set is not None and session_speech.speaker not in query_run.restrict_speakers_set:
                         continue
 
-                if 'speech_speaker' in what_to_dump:
-                    self._put_to_dump(session_speech.speaker)
-
-                for speech_content in session_speech.content:
-                    if isinstance(speech_content, str):
-                        if 'utt' in what_to_dump or 'utt_norm' in what_to_dump:
-                            self._put_to_dump(speech_content)
-                    else:
-                        if isinstance(speech_content, SpeechReaction):
-                            if 'utt' in what_to_dump or 'utt_reaction' in what_to_dump:
-                                self._put_to_dump(speech_content.reaction_text)
-                        elif isinstance(speech_content, SpeechInterruption):
-                            if 'utt_interrupt_by' in what_to_dump:
-                                self._put_to_dump(speech_content.interrupted_by_speaker)
-                            if 'utt' in what_to_dump or 'utt_interrupt' in what_to_dump:
-                                self._put_to_dump(speech_content.text)
-
-    def _put_to_dump(self, txt):
-        if self.cache['out_file'] is not None:
-            self.cache['out_file'].write(txt)
-            self.cache['out_file'].write("\n")
-        elif self.cache['out_list'] is not None:
-            self.cache['out_list'].append(txt)
-        else:
-            print(txt)
+                    if query_run.restrict_speaker_affiliations_set is not None:
+                        if not is_affiliation_resolved:
+                            speaker_affiliation = self.speaker_affiliation_table.get_affiliation(
+                                session_speech.speaker, transcript_when)
+                            is_affiliation_resolved = True
+                        if speaker_affiliation not in query_run.restrict_speaker_affiliations_set:
+                            continue
+
+                    query_run.dump_speech(session_speech, transcript.session_date)
+
+    def _dump_columnar(self, query_run):
+        named_query = query_run.named_query
+        speech_mask = self.columnar_store.select_speeches(
+            date_from=named_query.date_from,
+            date_to=named_query.date_to,
+            speakers=named_query.speakers,
+            affiliations=named_query.restrict_speaker_affiliations,
+            speaker_affiliation_table=self.speaker_affiliation_table)
+
+        out_sink = query_run.out_sink
+        if not out_sink.with_meta:
+            out_sink.put_many(self.columnar_store.iter_dump(named_query.what_to_dump, speech_mask))
+            return
+
+        for txt, dumped_as, speaker, when in self.columnar_store.iter_dump_records(named_query.what_to_dump, speech_mask):
+            out_sink.put(txt, self._create_meta(dumped_as, speaker, when))
+
+    def _aggregate_transcripts(self, transcripts, filepaths, named_query, group_by):
+        store = ColumnarTranscriptStore.from_transcripts(transcripts, filepaths, symbol_table=self.symbol_table)
+        return self._aggregate_store(store, named_query, group_by)
+
+    def _aggregate_store(self, store, named_query, group_by):
+        speech_mask = store.select_speeches(
+            date_from=named_query.date_from,
+            date_to=named_query.date_to,
+            speakers=named_query.speakers,
+            affiliations=named_query.restrict_speaker_affiliations,
+            speaker_affiliation_table=self.speaker_affiliation_table)
+        return store.group_count_dump(
+            named_query.what_to_dump, group_by, speech_mask, speaker_affiliation_table=self.speaker_affiliation_table)
+
+
+class _QueryRun:
+    """
+    State of the single NamedQuery during TranscriptQuery.query_many.
+    """
+    def __init__(self, named_query, transcript_query):
+        self.named_query = named_query
+        self.transcript_query = transcript_query
+        self.out_sink = transcript_query._create_sink(named_query.to_filehandle, named_query.to_list, named_query.to_sink)
+        # filled by TranscriptQuery._dump_matching
+        self.matching_filepaths = None
+
+        self.restrict_speaker_affiliations_set = None
+        if named_query.restrict_speaker_affiliations is not None:
+            self.restrict_speaker_affiliations_set = {r for r in named_query.restrict_speaker_affiliations}
+        self.restrict_speakers_set = None
+        if named_query.speakers is not None:
+            self.restrict_speakers_set = {s for s in named_query.speakers}
+
+        what_to_dump = named_query.what_to_dump
+        self.dump_speech_speaker = 'speech_speaker' in what_to_dump
+        self.dump_norm = 'utt' in what_to_dump or 'utt_norm' in what_to_dump
+        self.dump_reaction = 'utt' in what_to_dump or 'utt_reaction' in what_to_dump
+        self.dump_interrupt = 'utt' in what_to_dump or 'utt_interrupt' in what_to_dump
+        self.dump_interrupt_by = 'utt_interrupt_by' in what_to_dump
+
+    def dump_speech(self, session_speech, session_date):
+        put = self.out_sink.put
+        if not self.out_sink.with_meta:
+            if self.dump_speech_speaker:
+                put(session_speech.speaker)
+
+            for speech_content in session_speech.content:
+                if isinstance(speech_content, str):
+                    if self.dump_norm:
+                        put(speech_content)
+                elif isinstance(speech_content, SpeechReaction):
+                    if self.dump_reaction:
+                        put(speech_content.reaction_text)
+                elif isinstance(speech_content, SpeechInterruption):
+                    if self.dump_interrupt_by:
+                        put(speech_content.interrupted_by_speaker)
+                    if self.dump_interrupt:
+                        put(speech_content.text)
+            return
+
+        create_meta = self.transcript_query._create_meta
+        if self.dump_speech_speaker:
+            put(session_speech.speaker, create_meta('speech_speaker', session_speech.speaker, session_date))
+
+        for speech_content in session_speech.content:
+            speaker = get_speaker_for_utt(speech_content, session_speech)
+            if isinstance(speech_content, str):
+                if self.dump_norm:
+                    put(speech_content, create_meta('utt_norm', speaker, session_date))
+            elif isinstance(speech_content, SpeechReaction):
+                if self.dump_reaction:
+                    put(speech_content.reaction_text, create_meta('utt_reaction', speaker, session_date))
+            elif isinstance(speech_content, SpeechInterruption):
+                if self.dump_interrupt_by:
+                    put(speech_content.interrupted_by_speaker, create_meta('utt_interrupt_by', speaker, session_date))
+                if self.dump_interrupt:
+                    put(speech_content.text, create_meta('utt_interrupt', speaker, session_date))
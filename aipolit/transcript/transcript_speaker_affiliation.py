@@ -1,28 +1,62 @@
 import re
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterable, Iterator, Tuple, Union
 from collections import defaultdict
 from datetime import date
+import numpy as np
 from aipolit.transcript.person_affiliation import PersonAffiliation
-from aipolit.utils.date import date_to_text, text_to_date
+from aipolit.transcript.multi_term_affiliation import MultiTermPersonAffiliation
+from aipolit.utils.date import text_to_date
 from aipolit.transcript.utils import check_is_speaker_marszalek
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from aipolit.transcript.symbol_table import TranscriptSymbolTable
+from aipolit.transcript.columnar_store import ColumnarTranscriptStore, UTT_TYPE_NORM
+from aipolit.utils.string_pool import NO_ID
 from hipisejm.stenparser.transcript import SessionTranscript
 from hipisejm.stenparser.transcript_utils import leave_only_specific_type_utt
 
 
+def iter_affiliation_batches(entries: Iterable[dict], batch_size: int) -> Iterator[Tuple[str, List[dict]]]:
+    """
+    Groups stream of entries (e.g. from TranscriptSpeakerAffiliation.iter_affiliation_utts_from_transcripts)
+    into batches of entries of the same affiliation, so they can be passed directly to models
+    (e.g. SentimentModel.compute_sentiment or KeyBertLLMCached.extract_keywords on utts_raw of the batch).
+
+    Yields (affiliation, list of entries) when batch of the affiliation is full and not full batches at the end,
+    so only not full batches are kept in memory.
+    """
+    affiliation_to_batch = dict()
+    for entry in entries:
+        batch = affiliation_to_batch.setdefault(entry['affiliation'], [])
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            yield entry['affiliation'], batch
+            affiliation_to_batch[entry['affiliation']] = []
+
+    for affiliation, batch in affiliation_to_batch.items():
+        if len(batch) > 0:
+            yield affiliation, batch
+
+
 class TranscriptSpeakerAffiliation:
     """
     Assigns party to given transcript speaker.
+
+    Persons are taken from PersonAffiliation (single term) or MultiTermPersonAffiliation (many terms of Sejm).
     """
-    def __init__(self, person_affiliation: PersonAffiliation):
+    def __init__(self, person_affiliation: Union[PersonAffiliation, MultiTermPersonAffiliation]):
         self.person_affiliation = person_affiliation
 
-        self.all_names_regex = None
-        self.all_names_with_potential_2nd_name_regex = None
-        self.all_names_only_one_f_name_regex = None
+        # set of lowercased names (all names from PersonAffiliation)
+        self.lower_names = set()
+        self.max_name_length = 0
+        # lowercased "first_name last_name" for names with 2nd name (3+ tokens)
+        self.lower_names_only_one_f_name = set()
+        # (lowercased first_name, lowercased last_name) for names with 2 tokens
+        self.lower_names_with_potential_2nd_name = set()
 
         self.name_cut_to_only_f_name_to_original_names = dict()
 
-        self._create_all_names_regex()
+        self._create_all_names_index()
 
     def assign_affiliation(
             self,
@@ -50,8 +84,7 @@ class TranscriptSpeakerAffiliation:
             return None
 
         if when is not None:
-            when_txt = date_to_text(when)
-
+            return person.get_club(when)
         return person.get_club(when_txt)
 
     def normalize_name(self, speaker_name: str) -> Optional[str]:
@@ -59,35 +92,55 @@ class TranscriptSpeakerAffiliation:
         Tries to normalize name using database of persons in affilaitions.
         Returns name as it appears in affiliations data (if found)
         or None if cant find such person in our data.
-        """
-        match = self.all_names_regex.search(speaker_name)
-        if not match:
-            # 2nd try - maybe transcript omits 2nd name?
-            match_without_2nd_name = self.all_names_only_one_f_name_regex.search(speaker_name)
-            if match_without_2nd_name:
-                matched_name_without_2nd = match_without_2nd_name.group(1)
-
-                original_name = self.name_cut_to_only_f_name_to_original_names.get(matched_name_without_2nd, None)
-                return original_name
 
-            # 3rd try - maybe DB which we are using doesn't contain 2nd name?
-            match_with_additional_2nd_name = self.all_names_with_potential_2nd_name_regex.search(speaker_name)
-            if match_with_additional_2nd_name:
-                matched_name = match_with_additional_2nd_name.group(1)
-                name_tokens = re.split(r"\s+", matched_name)
-                db_name = f"{name_tokens[0]} {name_tokens[-1]}"
-                return db_name
-
-            return None
+        Name is matched as the (case insensitive) suffix of the speaker_name which starts at word boundary,
+        e.g. "Poseł Jan Kowalski" -> "Jan Kowalski". Only few last tokens of speaker_name are checked
+        (using hash lookups), so it does not depend on number of persons in PersonAffiliation.
+        """
+        # the same as for regex "$" - it matches also before final new line
+        text = speaker_name[:-1] if speaker_name.endswith("\n") else speaker_name
+
+        min_start = max(0, len(text) - self.max_name_length)
+        for start in self._iter_word_starts(speaker_name, min_start, len(text)):
+            candidate = text[start:]
+            if candidate.lower() in self.lower_names:
+                return candidate
+
+        # 2nd try - maybe transcript omits 2nd name?
+        last_space_run_start, last_space_run_end = self._find_last_space_run(text, len(text))
+        if last_space_run_start is not None:
+            prev_space_run_start, prev_space_run_end = self._find_last_space_run(text, last_space_run_start)
+            min_start = prev_space_run_end if prev_space_run_start is not None else 0
+            for start in self._iter_word_starts(speaker_name, min_start, last_space_run_start):
+                candidate = text[start:]
+                candidate_key = candidate[:last_space_run_start - start] + " " + candidate[last_space_run_end - start:]
+                if candidate_key.lower() in self.lower_names_only_one_f_name:
+                    return self.name_cut_to_only_f_name_to_original_names.get(candidate, None)
+
+        # 3rd try - maybe DB which we are using doesn't contain 2nd name?
+        min_start = self._find_start_of_last_tokens(text, 3)
+        if min_start is not None:
+            for start in self._iter_word_starts(speaker_name, min_start, len(text)):
+                name_tokens = re.split(r"\s+", text[start:])
+                if len(name_tokens) != 3:
+                    continue
+                if (name_tokens[0].lower(), name_tokens[-1].lower()) in self.lower_names_with_potential_2nd_name:
+                    db_name = f"{name_tokens[0]} {name_tokens[-1]}"
+                    return db_name
 
-        matched_name = match.group(1)
-        return matched_name
+        return None
 
-    def create_affiliation_to_utts_from_transcripts(self, transcripts: List[SessionTranscript], only_process_parties: List[str] = None) -> defaultdict:
+    def create_affiliation_to_utts_from_transcripts(
+            self,
+            transcripts: Iterable[SessionTranscript],
+            only_process_parties: List[str] = None,
+            symbol_table: Optional[TranscriptSymbolTable] = None) -> defaultdict:
         """
         Creates dict which assigns affiliation to speeches from persons of the given affiliation.
         Useful to analyse text with respect to speaker affiliation.
 
+        transcripts can be any iterable, e.g. generator from iter_transcripts (so whole corpus is not kept in memory).
+
         Returns dict which is:
            key - affiliation (str)
            value - list of entries, where each entry is dict with following keys:
@@ -109,8 +162,28 @@ class TranscriptSpeakerAffiliation:
         Optional args:
 
         - only_process_parties - list of strings with parties to be included in the final result (if not defined - returns all which occur)
+        - symbol_table - if defined, then each entry has also keys 'speaker_id', 'canon_id' and 'affiliation_id'
+                         (ids in TranscriptSymbolTable) and names in entries are strings kept in the table
         """
         affiliation_to_entries = defaultdict(list)
+        for entry in self.iter_affiliation_utts_from_transcripts(transcripts, only_process_parties, symbol_table):
+            affiliation_to_entries[entry['affiliation']].append(entry)
+        return affiliation_to_entries
+
+    def iter_affiliation_utts_from_transcripts(
+            self,
+            transcripts: Iterable[SessionTranscript],
+            only_process_parties: List[str] = None,
+            symbol_table: Optional[TranscriptSymbolTable] = None) -> Iterator[dict]:
+        """
+        Yields entries of create_affiliation_to_utts_from_transcripts one by one (in order of transcripts and speeches),
+        so they can be processed (e.g. with iter_affiliation_batches) without keeping all of them in memory.
+
+        Entry is yielded when it can't be merged with next speeches anymore (next speaker is other than Marszałek
+        and the speaker of the entry). Utts of merged speeches are collected as list of fragments,
+        so utts_raw is built (and whitespaces are normalized) only once per entry.
+        """
+        speaker_affiliation_table = SpeakerAffiliationTable(self)
         only_process_parties_set = None
         if only_process_parties is not None:
             only_process_parties_set = {p for p in only_process_parties}
@@ -120,63 +193,190 @@ class TranscriptSpeakerAffiliation:
             when = text_to_date(when_txt)
 
             prev_speaker_name = None
-            prev_entry = None
+            # entry which may be merged with the next speech and its utts
+            pending_entry = None
+            pending_fragments = None
             for speech in transcript.session_content:
 
                 # this will merge multiple utts, if they are split by "Marszałek" (it sometimes happens that Marszałek interrupts longer speech)
                 # of course merge is possible only if prev speaker is the same as current (prev_speaker is not updated for marszałek)
-                should_merge_utts_with_prev = False
                 speaker_name = speech.speaker
-                if prev_speaker_name is not None and prev_speaker_name == speaker_name:
-                    should_merge_utts_with_prev = True
+                should_merge_utts_with_prev = prev_speaker_name is not None and prev_speaker_name == speaker_name
 
                 if check_is_speaker_marszalek(speaker_name):
                     continue
 
                 prev_speaker_name = speaker_name
+                if not should_merge_utts_with_prev and pending_entry is not None:
+                    yield self._finish_utts_entry(pending_entry, pending_fragments)
+                    pending_entry = None
 
-                speaker_affiliation = self.assign_affiliation(speaker_name, when)
+                speaker_affiliation = speaker_affiliation_table.get_affiliation(speaker_name, when)
                 if speaker_affiliation is not None and (only_process_parties_set is None or speaker_affiliation in only_process_parties_set):
-                    canon_name = self.normalize_name(speaker_name)
+                    canon_name = speaker_affiliation_table.get_canon_name(speaker_name)
                     if canon_name is not None:
                         utts = leave_only_specific_type_utt(speech.content, str)
-                        utts_raw = " ".join(utts)
-                        utts_raw = re.sub(r"\s+", " ", utts_raw)
-
-                        if should_merge_utts_with_prev:
-                            prev_entry['utts_raw'] += ' ' + utts_raw
+                        if pending_entry is not None:
+                            pending_fragments.extend(utts)
                         else:
-                            entry = {
-                                'speaker_name': speaker_name,
-                                'canon_name': canon_name,
-                                'affiliation': speaker_affiliation,
-                                'utts_raw': utts_raw,
-                                'when': when,
-                            }
-                            prev_entry = entry
-                            affiliation_to_entries[speaker_affiliation].append(entry)
+                            pending_entry = self._create_utts_entry(
+                                speaker_name, canon_name, speaker_affiliation, None, when, symbol_table)
+                            pending_fragments = list(utts)
+
+            if pending_entry is not None:
+                yield self._finish_utts_entry(pending_entry, pending_fragments)
 
+    def create_affiliation_to_utts_from_store(self, store: ColumnarTranscriptStore, only_process_parties: List[str] = None) -> defaultdict:
+        """
+        The same as create_affiliation_to_utts_from_transcripts, but runs on ColumnarTranscriptStore.
+        Marszałek speakers and affiliations are resolved once per distinct name (and session),
+        speeches are selected (and merged) with masks on store columns, so only selected speeches are visited.
+        Entries have also ids from the symbol table of the store (check symbol_table param of create_affiliation_to_utts_from_transcripts).
+        """
+        affiliation_to_entries = defaultdict(list)
+        for entry in self.iter_affiliation_utts_from_store(store, only_process_parties):
+            affiliation_to_entries[entry['affiliation']].append(entry)
         return affiliation_to_entries
 
-    def _create_all_names_regex(self):
-        regex_chunks = []
-        regex_chunks_only_one_f_name = []
-        regex_chunks_with_potential_2nd_name = []
+    def iter_affiliation_utts_from_store(self, store: ColumnarTranscriptStore, only_process_parties: List[str] = None) -> Iterator[dict]:
+        """
+        The same as iter_affiliation_utts_from_transcripts, but runs on ColumnarTranscriptStore
+        (check create_affiliation_to_utts_from_store).
+        """
+        speaker_affiliation_table = SpeakerAffiliationTable(self)
 
+        name_is_marszalek = np.array(
+            [bool(check_is_speaker_marszalek(name)) for name in store.names.strings], dtype=bool)
+        not_marszalek_rows = np.flatnonzero(~name_is_marszalek[store.speech_speaker])
+
+        sessions = store.speech_session[not_marszalek_rows]
+        speakers = store.speech_speaker[not_marszalek_rows]
+        # prev speech (skipping marszałek) in the same session has the same speaker
+        merge_with_prev = np.zeros(len(not_marszalek_rows), dtype=bool)
+        merge_with_prev[1:] = (sessions[1:] == sessions[:-1]) & (speakers[1:] == speakers[:-1])
+
+        club_ids = store.get_speech_affiliation_ids(speaker_affiliation_table)[not_marszalek_rows]
+        selected = club_ids != NO_ID
+        if only_process_parties is not None:
+            selected &= np.isin(club_ids, store.clubs.find_ids(only_process_parties))
+
+        pending_entry = None
+        pending_fragments = None
+        for i in np.flatnonzero(selected).tolist():
+            speech_row = not_marszalek_rows[i]
+            speaker_name = store.names.get_string(speakers[i])
+            canon_name = speaker_affiliation_table.get_canon_name(speaker_name)
+            if canon_name is None:
+                continue
+
+            first_utt = store.speech_first_utt[speech_row]
+            utt_rows = np.arange(first_utt, first_utt + store.speech_utt_count[speech_row])
+            utt_rows = utt_rows[store.utt_type[utt_rows] == UTT_TYPE_NORM]
+            utts = [store.texts.get_string(text_id) for text_id in store.utt_text[utt_rows].tolist()]
+
+            if merge_with_prev[i] and pending_entry is not None:
+                pending_fragments.extend(utts)
+                continue
+
+            if pending_entry is not None:
+                yield self._finish_utts_entry(pending_entry, pending_fragments)
+            speaker_affiliation = store.clubs.get_string(club_ids[i])
+            pending_entry = self._create_utts_entry(
+                speaker_name, canon_name, speaker_affiliation, None,
+                store.get_session_date(sessions[i]), store.symbol_table)
+            pending_fragments = utts
+
+        if pending_entry is not None:
+            yield self._finish_utts_entry(pending_entry, pending_fragments)
+
+    @staticmethod
+    def _finish_utts_entry(entry, fragments):
+        entry['utts_raw'] = re.sub(r"\s+", " ", " ".join(fragments))
+        return entry
+
+    @staticmethod
+    def _create_utts_entry(speaker_name, canon_name, affiliation, utts_raw, when, symbol_table):
+        if symbol_table is None:
+            return {
+                'speaker_name': speaker_name,
+                'canon_name': canon_name,
+                'affiliation': affiliation,
+                'utts_raw': utts_raw,
+                'when': when,
+            }
+
+        speaker_id = symbol_table.get_speaker_id(speaker_name)
+        canon_id = symbol_table.get_canon_id(canon_name)
+        affiliation_id = symbol_table.get_club_id(affiliation)
+        return {
+            'speaker_name': symbol_table.get_speaker(speaker_id),
+            'canon_name': symbol_table.get_canon_name(canon_id),
+            'affiliation': symbol_table.get_club(affiliation_id),
+            'utts_raw': utts_raw,
+            'when': when,
+            'speaker_id': speaker_id,
+            'canon_id': canon_id,
+            'affiliation_id': affiliation_id,
+        }
+
+    def _create_all_names_index(self):
         for name in sorted(self.person_affiliation.name_to_entry.keys(), key=lambda n: -len(n)):
-            regex_chunks.append(name)
+            self.lower_names.add(name.lower())
+            self.max_name_length = max(self.max_name_length, len(name))
 
             name_tokens = re.split(r"\s+", name)
             if len(name_tokens) > 2:
                 name_reduced_to_1_name = f"{name_tokens[0]} {name_tokens[-1]}"
-                name_reduced_to_1_name_regex = f"{name_tokens[0]} +{name_tokens[-1]}"
-                regex_chunks_only_one_f_name.append(name_reduced_to_1_name_regex)
+                self.lower_names_only_one_f_name.add(name_reduced_to_1_name.lower())
                 self.name_cut_to_only_f_name_to_original_names[name_reduced_to_1_name] = name
             elif len(name_tokens) == 2:
                 # need to add version where potential 2nd name is added (but it is not present in DB)
-                regex_chunks_with_potential_2nd_name.append(f"{name_tokens[0]}\\s+[^ ]+\\s+{name_tokens[-1]}")
+                self.lower_names_with_potential_2nd_name.add((name_tokens[0].lower(), name_tokens[-1].lower()))
 
-        self.all_names_regex = re.compile(r"\b(" + "|".join(regex_chunks) + ")$", re.IGNORECASE)
+    @staticmethod
+    def _is_word_char(c: str) -> bool:
+        # the same as regex \w
+        return c.isalnum() or c == '_'
 
-        self.all_names_with_potential_2nd_name_regex = re.compile(r"\b(" + "|".join(regex_chunks_with_potential_2nd_name) + ")$", re.IGNORECASE)
-        self.all_names_only_one_f_name_regex = re.compile(r"\b(" + "|".join(regex_chunks_only_one_f_name) + ")$", re.IGNORECASE)
+    @classmethod
+    def _iter_word_starts(cls, text: str, min_start: int, max_start: int):
+        """
+        Yields (in ascending order) positions from [min_start, max_start) where regex \b is matched.
+        """
+        prev_is_word = min_start > 0 and cls._is_word_char(text[min_start - 1])
+        for i in range(min_start, max_start):
+            is_word = cls._is_word_char(text[i])
+            if is_word != prev_is_word:
+                yield i
+            prev_is_word = is_word
+
+    @staticmethod
+    def _find_last_space_run(text: str, end: int):
+        """
+        Returns (start, end) of the last sequence of spaces in text[:end], or (None, None) if there is no space.
+        """
+        run_end = text.rfind(" ", 0, end)
+        if run_end < 0:
+            return None, None
+        run_start = run_end
+        while run_start > 0 and text[run_start - 1] == " ":
+            run_start -= 1
+        return run_start, run_end + 1
+
+    @staticmethod
+    def _find_start_of_last_tokens(text: str, tokens_count: int) -> Optional[int]:
+        """
+        Returns position where the last tokens_count tokens (separated by whitespaces) start
+        (or None if text has less tokens).
+        """
+        i = len(text)
+        start = None
+        for _ in range(tokens_count):
+            while i > 0 and text[i - 1].isspace():
+                i -= 1
+            if i == 0:
+                return None
+            while i > 0 and not text[i - 1].isspace():
+                i -= 1
+            start = i
+        return start
@@ -1,34 +1,210 @@
 import os
 import re
+import xml.etree.ElementTree as ET
+from datetime import date
+from typing import List, Optional, Union, Iterator, Iterable
+from concurrent.futures import ProcessPoolExecutor
 
 from aipolit.utils.globals import AIPOLIT_10TERM_SEJM_TRANSCRIPTS_DIR
+from aipolit.utils.date import date_obj_unk_to_text
+from aipolit.transcript.transcript_cache import TranscriptCache
 from hipisejm.stenparser.transcript import SessionTranscript
 
 
+def get_transcripts_dir(
+        fixed_dir=None,
+        transcript_type='sejm') -> str:
+    """
+    Returns directory with transcripts XML files.
+
+    If fixed_dir is not None, then returns this dir
+    Otherwise it uses: default AIPOLIT_10TERM_SEJM_TRANSCRIPTS_DIR
+    """
+    if fixed_dir is not None:
+        return fixed_dir
+    return os.path.join(AIPOLIT_10TERM_SEJM_TRANSCRIPTS_DIR, transcript_type)
+
+
+def list_transcript_filepaths(processing_dir: str) -> List[str]:
+    """
+    Returns paths to all transcript XML files from the given directory (sorted by filename).
+    """
+    result = []
+    for filename in sorted(os.listdir(processing_dir)):
+        if re.match(r"^.*\.xml$", filename):
+            result.append(os.path.join(processing_dir, filename))
+    return result
+
+
+def load_transcript_from_xml(filepath: str) -> SessionTranscript:
+    """
+    Loads single transcript from hipisejm XML file.
+    """
+    transcript = SessionTranscript()
+    transcript.load_from_xml(filepath)
+    return transcript
+
+
+def parse_transcript_files(
+        filepaths: List[str],
+        workers: Optional[int] = None) -> List[SessionTranscript]:
+    """
+    Parses given XML files (in the pool of processes if workers > 1).
+    Returns transcripts in the same order as filepaths.
+    """
+    if workers is not None and workers > 1 and len(filepaths) > 1:
+        chunksize = max(1, len(filepaths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(load_transcript_from_xml, filepaths, chunksize=chunksize))
+
+    return [load_transcript_from_xml(filepath) for filepath in filepaths]
+
+
 def load_transcripts(
         fixed_dir=None,
-        transcript_type='sejm'):
+        transcript_type='sejm',
+        workers: Optional[int] = None,
+        use_cache: bool = False,
+        cache_dir: Optional[str] = None):
     """
     Loads transcripts from given directory.
 
     If fixed_dir is not None, then uses this dir with files
     Otherwise it uses: default AIPOLIT_10TERM_SEJM_TRANSCRIPTS_DIR
+
+    If workers > 1, then XML files are parsed in the pool of given number of processes.
+    Order of returned transcripts is the same as in serial mode (sorted by filename).
+
+    If use_cache is True, then parsed transcripts are taken from TranscriptCache
+    (only new or changed files are parsed). cache_dir overrides default cache location.
     """
-    processing_dir = fixed_dir
-    if processing_dir is None:
-        processing_dir=os.path.join(AIPOLIT_10TERM_SEJM_TRANSCRIPTS_DIR, transcript_type)
+    processing_dir = get_transcripts_dir(fixed_dir=fixed_dir, transcript_type=transcript_type)
+    filepaths = list_transcript_filepaths(processing_dir)
+    return load_transcripts_from_filepaths(filepaths, workers=workers, use_cache=use_cache, cache_dir=cache_dir)
 
-    transcripts = []
-    for filename in sorted(os.listdir(processing_dir)):
-        if re.match(r"^.*\.xml$", filename):
-            filepath = os.path.join(processing_dir, filename)
-            transcript = SessionTranscript()
-            transcript.load_from_xml(filepath)
-            transcripts.append(transcript)
 
+def load_transcripts_from_filepaths(
+        filepaths: List[str],
+        workers: Optional[int] = None,
+        use_cache: bool = False,
+        cache_dir: Optional[str] = None) -> List[SessionTranscript]:
+    """
+    Loads transcripts from given XML files (in the same order).
+    Check load_transcripts for params description.
+    """
+    if not use_cache:
+        return parse_transcript_files(filepaths, workers=workers)
+
+    transcript_cache = TranscriptCache(cache_dir=cache_dir)
+    transcripts = [transcript_cache.get(filepath) for filepath in filepaths]
+
+    missing_indexes = [i for i, transcript in enumerate(transcripts) if transcript is None]
+    parsed = parse_transcript_files([filepaths[i] for i in missing_indexes], workers=workers)
+    for i, transcript in zip(missing_indexes, parsed):
+        transcript_cache.put(filepaths[i], transcript)
+        transcripts[i] = transcript
+
+    transcript_cache.log_stats()
     return transcripts
 
 
+def read_transcript_session_date(filepath: str) -> Optional[str]:
+    """
+    Returns session date (string) of the transcript XML file without parsing the whole file
+    (only <meta> tag at the beginning of the file is read).
+    Returns None if session date is not defined.
+    """
+    for _, elem in ET.iterparse(filepath, events=("end",)):
+        if elem.tag == "session_date":
+            return elem.text
+        if elem.tag == "meta":
+            break
+    return None
+
+
+def iter_transcript_filepaths(
+        fixed_dir=None,
+        transcript_type='sejm',
+        date_from: Optional[Union[str, date]] = None,
+        date_to: Optional[Union[str, date]] = None,
+        filename_regex: Optional[str] = None) -> Iterator[str]:
+    """
+    Yields paths to transcript XML files (sorted by filename) which meet given criteria:
+    - date_from, date_to - session date should be in range (both ends inclusive, str or date)
+    - filename_regex - filename should match given regex (re.search)
+
+    Filters are applied before parsing of the transcripts (only <meta> tag is read to check date).
+    """
+    date_from_txt = date_obj_unk_to_text(date_from)
+    date_to_txt = date_obj_unk_to_text(date_to)
+
+    processing_dir = get_transcripts_dir(fixed_dir=fixed_dir, transcript_type=transcript_type)
+    for filepath in list_transcript_filepaths(processing_dir):
+        if filename_regex is not None:
+            if not re.search(filename_regex, os.path.basename(filepath)):
+                continue
+
+        if date_from_txt is not None or date_to_txt is not None:
+            session_date = read_transcript_session_date(filepath)
+            if session_date is None:
+                continue
+            if date_from_txt is not None and session_date < date_from_txt:
+                continue
+            if date_to_txt is not None and session_date > date_to_txt:
+                continue
+
+        yield filepath
+
+
+def iter_transcripts(
+        fixed_dir=None,
+        transcript_type='sejm',
+        date_from: Optional[Union[str, date]] = None,
+        date_to: Optional[Union[str, date]] = None,
+        filename_regex: Optional[str] = None,
+        use_cache: bool = False,
+        cache_dir: Optional[str] = None) -> Iterator[SessionTranscript]:
+    """
+    Lazy version of load_transcripts. Yields transcripts one by one (sorted by filename),
+    so only single parsed session is kept in memory at once.
+
+    Check iter_transcript_filepaths for filter params (they are applied before parsing)
+    and load_transcripts for cache params.
+    """
+    filepaths = iter_transcript_filepaths(
+        fixed_dir=fixed_dir,
+        transcript_type=transcript_type,
+        date_from=date_from,
+        date_to=date_to,
+        filename_regex=filename_regex)
+    return iter_transcripts_from_filepaths(filepaths, use_cache=use_cache, cache_dir=cache_dir)
+
+
+def iter_transcripts_from_filepaths(
+        filepaths: Iterable[str],
+        use_cache: bool = False,
+        cache_dir: Optional[str] = None) -> Iterator[SessionTranscript]:
+    """
+    Yields transcripts from given XML files one by one (in the same order).
+    """
+    transcript_cache = None
+    if use_cache:
+        transcript_cache = TranscriptCache(cache_dir=cache_dir)
+
+    for filepath in filepaths:
+        if transcript_cache is None:
+            yield load_transcript_from_xml(filepath)
+        else:
+            transcript = transcript_cache.get(filepath)
+            if transcript is None:
+                transcript = load_transcript_from_xml(filepath)
+                transcript_cache.put(filepath, transcript)
+            yield transcript
+
+    if transcript_cache is not None:
+        transcript_cache.log_stats()
+
+
 def check_is_speaker_marszalek(speaker_name: str) -> bool:
     """
     Returns true if speaker seems to be Marszałek or Vice
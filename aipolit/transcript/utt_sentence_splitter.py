@@ -1,7 +1,13 @@
-from typing import Union, List, Tuple
+import os
+import re
+import sqlite3
+import hashlib
+from array import array
+from typing import Union, List, Tuple, Optional, Iterable, Dict
 from hipisejm.stenparser.transcript import SpeechReaction, SpeechInterruption
 from hipisejm.stenparser.transcript_utils import get_utt_text
 from sentence_splitter import SentenceSplitter
+from aipolit.utils.globals import AIPOLIT_CACHE_DIR
 
 
 class UttSentenceSplitter:
@@ -9,23 +15,73 @@ class UttSentenceSplitter:
     Splits <utt> objects of the speech to sentences.
     Uses SentenceSplitter module for segmentation.
 
-    WARNING: Due to limitations of SentenceSplitter assumes that text splitted is normalized in terms of spaces, so there are NO:
-    - spaces in the beginning or ending
-    - double/triple etc. spaces
-
-    If such thing will occur then sentence_int positions will be computed incorrectly :(
+    Sentences are kept as (start, end) character offsets in the text (SentenceSplitter output is aligned to the text
+    in one pass, check align_sentences_to_text), so sentence positions are exact also for not normalized spaces.
+    Use split_utt_to_spans / split_many_to_spans to get the offsets, sentences are text[start:end]
+    with runs of spaces collapsed (as in SentenceSplitter output).
+    If use_cache is True, then offsets are stored in persistent cache (sqlite file in AIPOLIT_CACHE_DIR)
+    with md5 hash of the text as a key, so each text is segmented only once (also between runs and processes).
     """
-    def __init__(self):
+    MY_CACHE_DIR = "sentence-spans"
+    CACHE_FORMAT_VERSION = 1
+
+    def __init__(self, use_cache: bool = False, cache_fp: Optional[str] = None):
+        """
+        Params:
+        - use_cache - if True, then sentence offsets are stored in persistent cache
+        - cache_fp - sqlite file with cache, by default file in AIPOLIT_CACHE_DIR
+        """
         self.splitter = SentenceSplitter(language='pl')
 
+        self.use_cache = use_cache
+        if cache_fp is None:
+            cache_fp = os.path.join(AIPOLIT_CACHE_DIR, self.MY_CACHE_DIR, f"pl-v{self.CACHE_FORMAT_VERSION}.sqlite")
+        self.cache_fp = cache_fp
+        # connection is opened lazily (so the splitter can be created before worker processes are forked)
+        self.cache_connection = None
+
     def split_utt_to_sentences(self, utt: Union[str, SpeechReaction, SpeechInterruption]) -> List[str]:
         """
         Returns list of splited sentences (strings).
         """
         return self.split_string_to_sentences(get_utt_text(utt))
 
+    def split_many(self, utts: Iterable[Union[str, SpeechReaction, SpeechInterruption]]) -> List[List[str]]:
+        """
+        Batch version of split_utt_to_sentences (e.g. for all utts of the speech).
+        Returns list of sentences for each utt (in the same order).
+        """
+        texts = [get_utt_text(utt) for utt in utts]
+        all_spans = self._get_spans_many(texts)
+        return [self.spans_to_sentences(text, spans) for text, spans in zip(texts, all_spans)]
+
+    def split_utt_to_spans(self, utt: Union[str, SpeechReaction, SpeechInterruption]) -> List[Tuple[int, int]]:
+        """
+        Returns list of (start, end) character offsets of sentences in the utt text.
+        """
+        return self.split_string_to_spans(get_utt_text(utt))
+
+    def split_string_to_spans(self, text: str) -> List[Tuple[int, int]]:
+        return self._get_spans_many([text])[0]
+
+    def split_many_to_spans(self, utts: Iterable[Union[str, SpeechReaction, SpeechInterruption]]) -> List[List[Tuple[int, int]]]:
+        """
+        Batch version of split_utt_to_spans.
+        """
+        return self._get_spans_many([get_utt_text(utt) for utt in utts])
+
     def estimate_start_index_of_each_sentence_matching(self, utt: Union[str, SpeechReaction, SpeechInterruption], raw_split: List[str]) -> List[int]:
+        """
+        Left for compatibility, use split_utt_to_spans instead.
+        Returns start index of each sentence (from raw_split) in the utt text.
+        """
         text = get_utt_text(utt)
+        try:
+            return [start for start, _ in align_sentences_to_text(text, raw_split)]
+        except ValueError:
+            # raw_split is not SentenceSplitter output for this text
+            pass
+
         current_index = 0
         result = []
         for sent in raw_split[:-1]:
@@ -39,4 +95,119 @@ class UttSentenceSplitter:
         return result
 
     def split_string_to_sentences(self, text: str) -> List[str]:
-        return self.splitter.split(text=text)
+        return self.spans_to_sentences(text, self._get_spans_many([text])[0])
+
+    def _get_spans_many(self, texts: List[str]) -> List[List[Tuple[int, int]]]:
+        if not self.use_cache:
+            return [self._compute_spans(text) for text in texts]
+
+        text_hashes = [hashlib.md5(text.encode('utf-8')).digest() for text in texts]
+        hash_to_spans = self._read_cached_spans(set(text_hashes))
+
+        to_store = dict()
+        result = []
+        for text, text_hash in zip(texts, text_hashes):
+            spans = hash_to_spans.get(text_hash, None)
+            if spans is None:
+                spans = self._compute_spans(text)
+                hash_to_spans[text_hash] = spans
+                to_store[text_hash] = spans
+            result.append(spans)
+
+        if len(to_store) > 0:
+            self._store_spans(to_store)
+        return result
+
+    def _compute_spans(self, text: str) -> List[Tuple[int, int]]:
+        return align_sentences_to_text(text, self.splitter.split(text=text))
+
+    @staticmethod
+    def spans_to_sentences(text: str, spans: List[Tuple[int, int]]) -> List[str]:
+        result = []
+        for start, end in spans:
+            sentence = text[start:end]
+            if '  ' in sentence:
+                # the same normalization as in SentenceSplitter
+                sentence = re.sub(' +', ' ', sentence)
+            result.append(sentence)
+        return result
+
+    def _get_cache_connection(self) -> sqlite3.Connection:
+        if self.cache_connection is None:
+            cache_dir = os.path.dirname(self.cache_fp)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            self.cache_connection = sqlite3.connect(self.cache_fp, timeout=60)
+            self.cache_connection.execute("PRAGMA journal_mode=WAL")
+            self.cache_connection.execute(
+                "CREATE TABLE IF NOT EXISTS spans (text_hash BLOB PRIMARY KEY, offsets BLOB NOT NULL)")
+            self.cache_connection.commit()
+        return self.cache_connection
+
+    def _read_cached_spans(self, text_hashes: Iterable[bytes]) -> Dict[bytes, List[Tuple[int, int]]]:
+        connection = self._get_cache_connection()
+        text_hashes = list(text_hashes)
+        result = dict()
+        # sqlite limits number of query params
+        batch_size = 500
+        for i in range(0, len(text_hashes), batch_size):
+            batch = text_hashes[i:i + batch_size]
+            query = f"SELECT text_hash, offsets FROM spans WHERE text_hash IN ({','.join('?' * len(batch))})"
+            for text_hash, offsets_blob in connection.execute(query, batch):
+                offsets = array('I')
+                offsets.frombytes(offsets_blob)
+                result[text_hash] = list(zip(offsets[0::2], offsets[1::2]))
+        return result
+
+    def _store_spans(self, hash_to_spans: Dict[bytes, List[Tuple[int, int]]]):
+        rows = []
+        for text_hash, spans in hash_to_spans.items():
+            offsets = array('I', [offset for span in spans for offset in span])
+            rows.append((text_hash, offsets.tobytes()))
+
+        connection = self._get_cache_connection()
+        connection.executemany("INSERT OR REPLACE INTO spans (text_hash, offsets) VALUES (?, ?)", rows)
+        connection.commit()
+
+    def __getstate__(self):
+        # sqlite connection can't be pickled (e.g. to worker process), it will be opened again
+        state = self.__dict__.copy()
+        state['cache_connection'] = None
+        return state
+
+
+def align_sentences_to_text(text: str, sentences: List[str]) -> List[Tuple[int, int]]:
+    """
+    Returns (start, end) offsets in the text for each sentence returned by SentenceSplitter (in one pass over the text).
+
+    SentenceSplitter changes only whitespaces: runs of spaces are collapsed to single space,
+    spaces around line breaks are removed and the whole text is stripped,
+    so sentence can be matched to the text word by word (single space in sentence matches run of spaces in text).
+    """
+    result = []
+    text_len = len(text)
+    pos = 0
+    while pos < text_len and text[pos].isspace():
+        pos += 1
+
+    for sentence in sentences:
+        # separators between sentences
+        while pos < text_len and (text[pos] == ' ' or text[pos] == '\n'):
+            pos += 1
+
+        start = pos
+        if text.startswith(sentence, pos):
+            pos += len(sentence)
+        else:
+            for word_index, word in enumerate(sentence.split(' ')):
+                if word_index > 0:
+                    if pos >= text_len or text[pos] != ' ':
+                        raise ValueError(f"Can't align sentence '{sentence}' to text '{text}'")
+                    while pos < text_len and text[pos] == ' ':
+                        pos += 1
+                if not text.startswith(word, pos):
+                    raise ValueError(f"Can't align sentence '{sentence}' to text '{text}'")
+                pos += len(word)
+        result.append((start, pos))
+
+    return result
@@ -1,9 +1,10 @@
 from aipolit.utils.text import read_tsv
-from aipolit.utils.date import text_to_datetime
+from aipolit.utils.date import texts_to_datetimes
 
 
 def load_tt_tsv_file(filepath):
     data = read_tsv(filepath)
-    for entry in data:
-        entry['datetime'] = text_to_datetime(entry['datetime'])
+    all_datetimes = texts_to_datetimes(entry['datetime'] for entry in data)
+    for entry, entry_datetime in zip(data, all_datetimes):
+        entry['datetime'] = entry_datetime
     return data
@@ -1,31 +1,120 @@
 import logging
-from collections import defaultdict
-from aipolit.utils.text import read_tsv
+from typing import Optional, List
+import numpy as np
+import pandas as pd
+from aipolit.utils.text import read_tsv, iter_tsv_values
+from aipolit.utils.date import texts_to_datetimes
 from aipolit.ttdata.loader import load_tt_tsv_file
-from aipolit.preprocessors.tweet_cleaners import remove_users_from_beg
+from aipolit.preprocessors.tweet_cleaners import remove_users_from_beg, remove_users_from_beg_column
+
+
+def get_text_dtype() -> str:
+    """
+    Returns pandas dtype for text columns: Arrow strings if pyarrow is installed (pip install pyarrow),
+    otherwise pandas strings (the same API, but each string is separate Python object).
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        return "string"
+    return "string[pyarrow]"
 
 
 class PolitTweetsData:
     """
     This class manages tweets from politics.
+
+    By default tweets are kept in tweets_data as list of OrderedDict (one per tweet).
+    In columnar mode tweets are kept in tweets_frame (pandas DataFrame) with typed columns:
+    categorical username, club and party, datetime64 datetime and string (Arrow if available) text columns,
+    so it needs much less memory for big dumps of tweets (and filtering is vectorised, check PolitTweetsFilter).
     """
 
     AIPOLIT_USER_NAME_NONE = 'brak'
 
-    def __init__(self):
+    # columns added to tweets in columnar mode (not present in tweets_data)
+    COLUMNAR_METADATA_COLUMNS = ['club', 'party']
+
+    # number of tweets converted to columns at once in columnar mode
+    LOAD_CHUNK_SIZE = 100000
+
+    def __init__(self, columnar: bool = False):
+        """
+        Params:
+        - columnar - if True, then tweets are loaded to tweets_frame instead of tweets_data
+        """
+        self.columnar = columnar
         self.tt_user_name_to_metadata = dict()
         self.tweets_data = list()
+        self.tweets_frame = None
+        # columns of tweets_data converted for get_tweets_frame (not columnar mode), built once per column
+        self.converted_columns = dict()
 
     def load_data(self, input_tweets_fp, input_users_fp):
+        self.converted_columns = dict()
         user_data = read_tsv(input_users_fp)
         self._parse_user_data(user_data)
-        tweets_data = load_tt_tsv_file(input_tweets_fp)
-        self._parse_tweets_data(tweets_data)
+        if self.columnar:
+            tweets_count = self._load_tweets_frame(input_tweets_fp)
+        else:
+            tweets_data = load_tt_tsv_file(input_tweets_fp)
+            self._parse_tweets_data(tweets_data)
+            tweets_count = len(tweets_data)
         logging.info(
             "PolitTweetsData: loaded %i tweets for %i politicians",
-            len(tweets_data),
+            tweets_count,
             len(self.tt_user_name_to_metadata))
 
+    def count(self) -> int:
+        """
+        Returns number of tweets of politicians (in both modes).
+        """
+        if self.columnar:
+            return len(self.tweets_frame)
+        return len(self.tweets_data)
+
+    def get_tweets_columns(self):
+        """
+        Returns names of tweet fields (as in tweets_data entries: columns of input TSV file and raw_text).
+        """
+        if self.columnar:
+            return [c for c in self.tweets_frame.columns if c not in self.COLUMNAR_METADATA_COLUMNS]
+        if len(self.tweets_data) == 0:
+            return []
+        return list(self.tweets_data[0].keys())
+
+    def get_tweets_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Returns tweets as DataFrame with club and party columns (used by criteria of PolitTweetsFilter).
+        In columnar mode it is tweets_frame, otherwise it is built from tweets_data
+        with given columns only (all columns if not defined).
+        Columns of tweets_data are converted only on first use (check converted_columns),
+        so next calls (e.g. next filters on the same data) do not copy tweets_data again.
+        """
+        if self.columnar:
+            return self.tweets_frame
+
+        if columns is None:
+            columns = self.get_tweets_columns() + self.COLUMNAR_METADATA_COLUMNS
+
+        frame_columns = dict()
+        for column in columns:
+            if column not in self.converted_columns:
+                self.converted_columns[column] = self._convert_column(column)
+            frame_columns[column] = self.converted_columns[column]
+        return pd.DataFrame(frame_columns, index=pd.RangeIndex(len(self.tweets_data)), copy=False)
+
+    def _convert_column(self, column: str) -> pd.Series:
+        if column in self.COLUMNAR_METADATA_COLUMNS:
+            values = [self.tt_user_name_to_metadata[e['username']][column] for e in self.tweets_data]
+        else:
+            values = [e[column] for e in self.tweets_data]
+
+        if column == 'datetime':
+            return pd.Series(np.array(values, dtype='datetime64[s]'))
+        # object dtype, so strings are not converted (it is much faster than inferring string dtype)
+        return pd.Series(values, dtype=object)
+
     def _parse_user_data(self, user_data):
         for entry in user_data:
             tt_user_name = entry['tt_user_name']
@@ -49,3 +138,54 @@ class PolitTweetsData:
                 entry['text'] = text
                 entry['raw_text'] = raw_text
                 self.tweets_data.append(entry)
+
+    def _load_tweets_frame(self, input_tweets_fp) -> int:
+        """
+        Loads tweets of politicians to tweets_frame, returns number of all tweets in the file.
+        Lines are parsed as in read_tsv (so values are the same as in tweets_data, NONE_STRING is missing value),
+        but only tweets of politicians are kept and they are converted to columns in chunks of LOAD_CHUNK_SIZE tweets.
+        """
+        text_dtype = get_text_dtype()
+        rows = iter_tsv_values(input_tweets_fp)
+        header = next(rows, [])
+        username_index = header.index('username')
+
+        all_tweets_count = 0
+        chunks = []
+        chunk_columns = [[] for _ in header]
+        for values in rows:
+            all_tweets_count += 1
+            if values[username_index] not in self.tt_user_name_to_metadata:
+                continue
+            for column_values, value in zip(chunk_columns, values):
+                column_values.append(value)
+            if len(chunk_columns[username_index]) >= self.LOAD_CHUNK_SIZE:
+                chunks.append(self._columns_to_frame(header, chunk_columns, text_dtype))
+                chunk_columns = [[] for _ in header]
+        chunks.append(self._columns_to_frame(header, chunk_columns, text_dtype))
+
+        frame = pd.concat(chunks, ignore_index=True)
+        frame['username'] = frame['username'].astype('category')
+        frame['raw_text'] = frame['text']
+        frame['text'] = remove_users_from_beg_column(frame['raw_text'])
+
+        # metadata is mapped for categories of username only (not for each tweet), then codes are just reindexed
+        username_codes = frame['username'].cat.codes.to_numpy()
+        for column in self.COLUMNAR_METADATA_COLUMNS:
+            values = [self.tt_user_name_to_metadata[u][column] for u in frame['username'].cat.categories]
+            categories = sorted({v for v in values if v is not None})
+            value_to_code = {v: i for i, v in enumerate(categories)}
+            codes_by_username = np.array([value_to_code.get(v, -1) for v in values], dtype=np.int32)
+            frame[column] = pd.Categorical.from_codes(codes_by_username[username_codes], categories=categories)
+
+        self.tweets_frame = frame
+        return all_tweets_count
+
+    def _columns_to_frame(self, header, columns, text_dtype) -> pd.DataFrame:
+        frame_columns = dict()
+        for key, values in zip(header, columns):
+            if key == 'datetime':
+                frame_columns[key] = texts_to_datetimes(values, as_numpy=True)
+            else:
+                frame_columns[key] = pd.Series(values, dtype=text_dtype)
+        return pd.DataFrame(frame_columns)
@@ -1,49 +1,121 @@
 import logging
+from typing import List
+import numpy as np
 from aipolit.utils.text import save_tsv
+from aipolit.ttdata.tweet_criteria import TweetCriterion, LengthCriterion, ClubCriterion
 
 
 class PolitTweetsFilter:
     """
     Processes tweets in PolitTweetsData and creates only tweets which meet given critera.
     Can dump list to TSV file.
+
+    Criteria (check aipolit.ttdata.tweet_criteria) are computed as boolean masks on columns of tweets
+    (check filter_mask). For columnar PolitTweetsData filter_data returns DataFrame with tweets which meet them,
+    otherwise list of entries from tweets_data.
+
+    After filtering selectivity of each criterion is kept in stats (and logged).
     """
 
-    def __init__(self, polit_tweets_data):
+    def __init__(self, polit_tweets_data, criteria: List[TweetCriterion] = None):
+        """
+        Params:
+        - polit_tweets_data - PolitTweetsData with tweets to filter
+        - criteria - tweets have to meet all of them (more criteria can be added with add_criterion)
+        """
         self.polit_tweets_data = polit_tweets_data
+        self.criteria = list(criteria) if criteria is not None else []
 
-        # filters
+        # filters (shortcuts for LengthCriterion and ClubCriterion)
 
         # Min character length (excluding sequence of user names in TT responses)
         self.min_char_length = None
         # Take only tweets from given club
         self.fixed_club = None
 
+        # stats of the last filter_mask call, for each criterion dict with keys:
+        #    'criterion' - description of the criterion
+        #    'selected' - number of tweets which meet the criterion
+        #    'selectivity' - fraction of all tweets which meet the criterion
+        #    'selected_cumulative' - number of tweets which meet the criterion and all previous criteria
+        self.stats = []
+
+    def add_criterion(self, criterion: TweetCriterion):
+        self.criteria.append(criterion)
+
+    def get_criteria(self) -> List[TweetCriterion]:
+        criteria = list(self.criteria)
+        if self.min_char_length:
+            criteria.append(LengthCriterion(min_length=self.min_char_length))
+        if self.fixed_club:
+            criteria.append(ClubCriterion([self.fixed_club]))
+        return criteria
+
     def dump_to_file(self, fp):
-        header = self.polit_tweets_data.tweets_data[0].keys()
+        header = self.polit_tweets_data.get_tweets_columns()
         filtered_data = self.filter_data()
-        logging.info("PolitTweetsFilter: after filtering we got %i out of %i tweets", len(filtered_data), len(self.polit_tweets_data.tweets_data))
-        save_tsv(fp, filtered_data, header)
+        logging.info("PolitTweetsFilter: after filtering we got %i out of %i tweets", len(filtered_data), self.polit_tweets_data.count())
+        if self.polit_tweets_data.columnar:
+            self._save_frame_as_tsv(fp, filtered_data, header)
+        else:
+            save_tsv(fp, filtered_data, header)
 
     def filter_data(self):
-        filtered_data = list()
+        mask = self.filter_mask()
+        if self.polit_tweets_data.columnar:
+            return self.polit_tweets_data.tweets_frame[mask]
 
-        for e in self.polit_tweets_data.tweets_data:
-            if self.should_be_removed(e):
-                continue
+        tweets_data = self.polit_tweets_data.tweets_data
+        return [tweets_data[i] for i in np.flatnonzero(mask)]
 
-            filtered_data.append(e)
+    def filter_mask(self) -> np.ndarray:
+        """
+        Returns boolean mask of tweets (rows of tweets_frame in columnar PolitTweetsData or entries of tweets_data)
+        which meet all the criteria. Each criterion is computed on whole columns at once.
+        """
+        self.stats = []
+        if self.polit_tweets_data.count() == 0:
+            return np.zeros(0, dtype=bool)
 
-        return filtered_data
+        criteria = self.get_criteria()
+        # in not columnar mode only columns used by criteria are converted (once per PolitTweetsData)
+        columns = sorted({column for criterion in criteria for column in criterion.get_columns()})
+        frame = self.polit_tweets_data.get_tweets_frame(columns=columns)
+        mask = np.ones(len(frame), dtype=bool)
 
-    def should_be_removed(self, e):
-        if self.min_char_length:
-            if len(e['text']) < self.min_char_length:
-                return True
+        for criterion in criteria:
+            criterion_mask = criterion.compute_mask(frame)
+            mask &= criterion_mask
+            selected = int(criterion_mask.sum())
+            self.stats.append({
+                'criterion': criterion.describe(),
+                'selected': selected,
+                'selectivity': selected / len(frame) if len(frame) > 0 else 0.0,
+                'selected_cumulative': int(mask.sum()),
+            })
 
-        if self.fixed_club:
-            username = e['username']
-            club = self.polit_tweets_data.tt_user_name_to_metadata[username]['club']
-            if club != self.fixed_club:
-                return True
+        self.log_stats()
+        return mask
+
+    def log_stats(self):
+        for entry in self.stats:
+            logging.info(
+                "PolitTweetsFilter: %s: %i tweets (%.2f%%), %i after all criteria so far",
+                entry['criterion'], entry['selected'], 100.0 * entry['selectivity'], entry['selected_cumulative'])
+
+    def _save_frame_as_tsv(self, fp, frame, header):
+        """
+        Saves tweets from DataFrame in the same format as save_tsv saves tweets_data entries.
+        """
+        columns = []
+        for key in header:
+            column = frame[key]
+            # the same as str() of values from tweets_data (missing values are None)
+            columns.append([str(v) for v in column.astype(object).where(column.notna(), None).tolist()])
 
-        return False
+        with open(fp, "w") as f:
+            f.write("\t".join(header))
+            f.write("\n")
+            for row in zip(*columns):
+                f.write("\t".join(row))
+                f.write("\n")
@@ -0,0 +1,276 @@
+"""
+Criteria of PolitTweetsFilter.
+
+Each criterion computes boolean mask (numpy array) over columns of tweets (pandas DataFrame with columns
+as in tweets_frame of columnar PolitTweetsData), so whole column is checked at once.
+Criteria can be composed with AllCriteria, AnyCriteria and NotCriterion.
+"""
+import re
+from typing import List, Optional, Iterable
+import numpy as np
+import pandas as pd
+from aipolit.utils.date import text_to_date
+
+
+HASHTAG_REGEX = r"#\w+"
+MENTION_REGEX = r"@\w+"
+
+LANGUAGE_PL = 'pl'
+LANGUAGE_EN = 'en'
+LANGUAGE_UNKNOWN = 'unknown'
+AVAILABLE_LANGUAGES = [LANGUAGE_PL, LANGUAGE_EN, LANGUAGE_UNKNOWN]
+
+# heuristic: Polish diacritics or frequent Polish words, otherwise frequent English words
+POLISH_LANGUAGE_REGEX = r"(?i)[ąćęłńóśźż]|\b(?:nie|się|jest|że|na|w|z|do|oraz|jak|ale|czy|już|dla|od|po|przez|tylko)\b"
+ENGLISH_LANGUAGE_REGEX = r"(?i)\b(?:the|and|is|are|of|for|you|that|with|this|we|have|will|be|not)\b"
+
+
+def _series_to_mask(series: pd.Series) -> np.ndarray:
+    # missing values never meet the criterion
+    return series.to_numpy(dtype=bool, na_value=False)
+
+
+def _contains_regex(texts: pd.Series, pattern: str, flags: int = 0) -> np.ndarray:
+    # matched with Python re, because Arrow strings use RE2 (where \w and \b are ASCII only, e.g. #Łódź
+    # is not a hashtag) and it does not support whole Python syntax (e.g. lookbehind)
+    regex = re.compile(pattern, flags)
+    # missing values (None or NA) never match
+    return np.array([isinstance(text, str) and regex.search(text) is not None for text in texts.astype(object)], dtype=bool)
+
+
+def detect_language_column(texts: pd.Series) -> pd.Series:
+    """
+    Returns categorical Series with language of each text (one of AVAILABLE_LANGUAGES).
+
+    It is only heuristic (Polish diacritics and frequent words), but it is enough to remove
+    tweets which are not in Polish (e.g. in English).
+    """
+    is_polish = _contains_regex(texts, POLISH_LANGUAGE_REGEX)
+    is_english = _contains_regex(texts, ENGLISH_LANGUAGE_REGEX)
+    codes = np.full(len(texts), AVAILABLE_LANGUAGES.index(LANGUAGE_UNKNOWN), dtype=np.int8)
+    codes[is_english] = AVAILABLE_LANGUAGES.index(LANGUAGE_EN)
+    codes[is_polish] = AVAILABLE_LANGUAGES.index(LANGUAGE_PL)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=AVAILABLE_LANGUAGES), index=texts.index)
+
+
+class TweetCriterion:
+    """
+    Base class of criteria. Tweet meets the criterion if its value in the mask is True.
+    """
+    def compute_mask(self, frame: pd.DataFrame) -> np.ndarray:
+        raise NotImplementedError()
+
+    def get_columns(self) -> List[str]:
+        """
+        Returns columns of tweets used by the criterion.
+        """
+        raise NotImplementedError()
+
+    def describe(self) -> str:
+        raise NotImplementedError()
+
+
+class DateRangeCriterion(TweetCriterion):
+    """
+    Tweets from date_from to date_to (YYYY-MM-DD, both inclusive, any of them can be None).
+    """
+    def __init__(self, date_from: Optional[str] = None, date_to: Optional[str] = None):
+        assert date_from is not None or date_to is not None, "one of date_from or date_to should be defined"
+        self.date_from = date_from
+        self.date_to = date_to
+
+    def compute_mask(self, frame: pd.DataFrame) -> np.ndarray:
+        datetimes = frame['datetime'].to_numpy(dtype='datetime64[s]')
+        mask = np.ones(len(frame), dtype=bool)
+        if self.date_from is not None:
+            mask &= datetimes >= np.datetime64(text_to_date(self.date_from), 's')
+        if self.date_to is not None:
+            mask &= datetimes < np.datetime64(text_to_date(self.date_to), 's') + np.timedelta64(1, 'D')
+        return mask
+
+    def get_columns(self) -> List[str]:
+        return ['datetime']
+
+    def describe(self) -> str:
+        return f"date from {self.date_from} to {self.date_to}"
+
+
+class ValueInCriterion(TweetCriterion):
+    """
+    Tweets with value of given column (e.g. club or party) in given values.
+    """
+    def __init__(self, column: str, values: Iterable[str]):
+        self.column = column
+        self.values = list(values)
+
+    def compute_mask(self, frame: pd.DataFrame) -> np.ndarray:
+        return _series_to_mask(frame[self.column].isin(self.values))
+
+    def get_columns(self) -> List[str]:
+        return [self.column]
+
+    def describe(self) -> str:
+        return f"{self.column} in {', '.join(self.values)}"
+
+
+class ClubCriterion(ValueInCriterion):
+    def __init__(self, clubs: Iterable[str]):
+        super().__init__('club', clubs)
+
+
+class PartyCriterion(ValueInCriterion):
+    def __init__(self, parties: Iterable[str]):
+        super().__init__('party', parties)
+
+
+class LengthCriterion(TweetCriterion):
+    """
+    Tweets with number of characters of text (without user names at the beginning) from min_length to max_length
+    (both inclusive, any of them can be None).
+    """
+    def __init__(self, min_length: Optional[int] = None, max_length: Optional[int] = None, column: str = 'text'):
+        assert min_length is not None or max_length is not None, "one of min_length or max_length should be defined"
+        self.min_length = min_length
+        self.max_length = max_length
+        self.column = column
+
+    def compute_mask(self, frame: pd.DataFrame) -> np.ndarray:
+        lengths = frame[self.column].str.len()
+        mask = np.ones(len(frame), dtype=bool)
+        if self.min_length is not None:
+            mask &= _series_to_mask(lengths >= self.min_length)
+        if self.max_length is not None:
+            mask &= _series_to_mask(lengths <= self.max_length)
+        return mask
+
+    def get_columns(self) -> List[str]:
+        return [self.column]
+
+    def describe(self) -> str:
+        return f"length of {self.column} from {self.min_length} to {self.max_length}"
+
+
+class RegexCriterion(TweetCriterion):
+    """
+    Tweets which contain match of the regex (anywhere in the text).
+    If present is False, then tweets which do not contain it.
+    """
+    def __init__(self, pattern: str, ignore_case: bool = False, present: bool = True, column: str = 'text'):
+        # fail fast on wrong pattern (before any tweet is checked)
+        re.compile(pattern)
+        self.pattern = pattern
+        self.ignore_case = ignore_case
+        self.present = present
+        self.column = column
+
+    def compute_mask(self, frame: pd.DataFrame) -> np.ndarray:
+        flags = re.IGNORECASE if self.ignore_case else 0
+        mask = _contains_regex(frame[self.column], self.pattern, flags=flags)
+        if not self.present:
+            mask = ~mask
+        return mask
+
+    def get_columns(self) -> List[str]:
+        return [self.column]
+
+    def describe(self) -> str:
+        return f"{self.column} {'contains' if self.present else 'does not contain'} /{self.pattern}/"
+
+
+class HashtagCriterion(RegexCriterion):
+    """
+    Tweets with (or without if present is False) at least one hashtag.
+    """
+    def __init__(self, present: bool = True):
+        super().__init__(HASHTAG_REGEX, present=present)
+
+    def describe(self) -> str:
+        return f"{'with' if self.present else 'without'} hashtags"
+
+
+class MentionCriterion(RegexCriterion):
+    """
+    Tweets with (or without if present is False) at least one mention of other user
+    (user names at the beginning of responses are not counted, they are removed from the text).
+    """
+    def __init__(self, present: bool = True):
+        super().__init__(MENTION_REGEX, present=present)
+
+    def describe(self) -> str:
+        return f"{'with' if self.present else 'without'} mentions"
+
+
+class LanguageCriterion(TweetCriterion):
+    """
+    Tweets in one of given languages (check detect_language_column).
+    """
+    def __init__(self, languages: Iterable[str]):
+        self.languages = list(languages)
+        for language in self.languages:
+            assert language in AVAILABLE_LANGUAGES, f"Unknown language: {language}"
+
+    def compute_mask(self, frame: pd.DataFrame) -> np.ndarray:
+        return _series_to_mask(detect_language_column(frame['text']).isin(self.languages))
+
+    def get_columns(self) -> List[str]:
+        return ['text']
+
+    def describe(self) -> str:
+        return f"language in {', '.join(self.languages)}"
+
+
+class AllCriteria(TweetCriterion):
+    """
+    Tweets which meet all given criteria.
+    """
+    def __init__(self, criteria: List[TweetCriterion]):
+        self.criteria = criteria
+
+    def compute_mask(self, frame: pd.DataFrame) -> np.ndarray:
+        mask = np.ones(len(frame), dtype=bool)
+        for criterion in self.criteria:
+            mask &= criterion.compute_mask(frame)
+        return mask
+
+    def get_columns(self) -> List[str]:
+        return sorted({column for c in self.criteria for column in c.get_columns()})
+
+    def describe(self) -> str:
+        return "(" + " AND ".join(c.describe() for c in self.criteria) + ")"
+
+
+class AnyCriteria(TweetCriterion):
+    """
+    Tweets which meet at least one of given criteria.
+    """
+    def __init__(self, criteria: List[TweetCriterion]):
+        self.criteria = criteria
+
+    def compute_mask(self, frame: pd.DataFrame) -> np.ndarray:
+        mask = np.zeros(len(frame), dtype=bool)
+        for criterion in self.criteria:
+            mask |= criterion.compute_mask(frame)
+        return mask
+
+    def get_columns(self) -> List[str]:
+        return sorted({column for c in self.criteria for column in c.get_columns()})
+
+    def describe(self) -> str:
+        return "(" + " OR ".join(c.describe() for c in self.criteria) + ")"
+
+
+class NotCriterion(TweetCriterion):
+    """
+    Tweets which do not meet given criterion.
+    """
+    def __init__(self, criterion: TweetCriterion):
+        self.criterion = criterion
+
+    def compute_mask(self, frame: pd.DataFrame) -> np.ndarray:
+        return ~self.criterion.compute_mask(frame)
+
+    def get_columns(self) -> List[str]:
+        return self.criterion.get_columns()
+
+    def describe(self) -> str:
+        return f"NOT {self.criterion.describe()}"
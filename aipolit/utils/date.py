@@ -1,5 +1,22 @@
 from datetime import datetime, date, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Union, Dict
 import re
+import numpy as np
+
+
+# how many distinct date (datetime) strings are remembered by text_to_date (text_to_datetime)
+DATE_CACHE_SIZE = 4096
+
+# string layouts accepted by bulk parsing (texts_to_dates, texts_to_datetimes)
+ISO_DATE_LAYOUT = {
+    'width': 10,
+    'separators': {4: '-', 7: '-'},
+}
+ISO_DATETIME_LAYOUT = {
+    'width': 19,
+    'separators': {4: '-', 7: '-', 10: ' ', 13: ':', 16: ':'},
+}
 
 
 def get_elapsed_date_from_now(reference_datetime):
@@ -21,7 +38,14 @@ def get_yesterday_text():
     return date_to_text(yesterday)
 
 
+@lru_cache(maxsize=DATE_CACHE_SIZE)
 def text_to_date(date_str):
+    # fast path for the ISO format (YYYY-MM-DD), strptime only for other (e.g. not zero padded) strings
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        try:
+            return date.fromisoformat(date_str)
+        except ValueError:
+            pass
     return datetime.strptime(date_str, '%Y-%m-%d').date()
 
 
@@ -29,11 +53,84 @@ def date_to_text(date_obj):
     return date_obj.strftime("%Y-%m-%d")
 
 
+@lru_cache(maxsize=DATE_CACHE_SIZE)
 def text_to_datetime(datetime_str):
+    # fast path for YYYY-MM-DD HH:MM:SS (optionally with microseconds which are dropped)
+    if len(datetime_str) >= 19 and datetime_str[10] == ' ' and datetime_str[13] == ':' and datetime_str[16] == ':':
+        rest = datetime_str[19:]
+        if rest == '' or (len(rest) >= 7 and rest[1:].isdecimal()):
+            try:
+                return datetime.fromisoformat(datetime_str[:19])
+            except ValueError:
+                pass
     datetime_str = re.sub(r".\d\d\d\d\d\d+$", "", datetime_str)
     return datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S")
 
 
+def texts_to_dates(date_strs: Iterable[str], as_numpy: bool = False) -> Union[List[date], np.ndarray]:
+    """
+    Bulk version of text_to_date, parses whole column at once (through NumPy datetime64).
+
+    Returns list of date objects or (if as_numpy) array of datetime64[D].
+    If any string is not in YYYY-MM-DD format, then column is parsed string by string with text_to_date
+    (so errors are the same as for text_to_date).
+    """
+    date_strs = list(date_strs)
+    parsed = _parse_iso_column(date_strs, 'datetime64[D]', ISO_DATE_LAYOUT)
+    if parsed is None:
+        parsed = np.array([text_to_date(s) for s in date_strs], dtype='datetime64[D]')
+
+    if as_numpy:
+        return parsed
+    return parsed.tolist()
+
+
+def texts_to_datetimes(datetime_strs: Iterable[str], as_numpy: bool = False) -> Union[List[datetime], np.ndarray]:
+    """
+    Bulk version of text_to_datetime, parses whole column at once (through NumPy datetime64).
+
+    Returns list of datetime objects or (if as_numpy) array of datetime64[s].
+    If any string is not in YYYY-MM-DD HH:MM:SS format, then column is parsed string by string with text_to_datetime.
+    """
+    datetime_strs = list(datetime_strs)
+    parsed = _parse_iso_column(datetime_strs, 'datetime64[s]', ISO_DATETIME_LAYOUT)
+    if parsed is None:
+        parsed = np.array([text_to_datetime(s) for s in datetime_strs], dtype='datetime64[s]')
+
+    if as_numpy:
+        return parsed
+    return parsed.tolist()
+
+
+def _parse_iso_column(strs: List[str], dtype: str, layout: Dict):
+    """
+    Returns parsed array or None if NumPy can't parse the column exactly as strptime would.
+    NumPy is more liberal (e.g. accepts NaT, empty strings, 'T' separator or shorter dates),
+    so only strings of exact length, with separators on positions given in layout and digits elsewhere are parsed here.
+    """
+    width = layout['width']
+    if len(strs) == 0:
+        return np.array([], dtype=dtype)
+
+    input_array = np.array(strs, dtype=str)
+    if input_array.dtype.itemsize != 4 * width or (np.char.str_len(input_array) != width).any():
+        return None
+
+    chars = input_array.view(np.uint32).reshape(-1, width)
+    separators = layout['separators']
+    for position in range(width):
+        if position in separators:
+            if (chars[:, position] != ord(separators[position])).any():
+                return None
+        elif ((chars[:, position] < ord('0')) | (chars[:, position] > ord('9'))).any():
+            return None
+
+    try:
+        return np.array(input_array, dtype=dtype)
+    except ValueError:
+        return None
+
+
 def datetime_to_text(datetime_obj, ignore_none=True, return_for_none=None):
     """
     If ignore_none == True then returns value 'return_for_none' if datetime_obj is None
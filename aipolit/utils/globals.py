@@ -88,6 +88,9 @@ AIPOLIT_SEJM2023_ELECTION_VOTING_PLACE_RAW_DATA_FP = os.path.join(AIPOLIT_SEJM20
 
 AIPOLIT_10TERM_SEJM_TRANSCRIPTS_DIR = os.path.join(AIPOLIT_DATA_DIR, 'hipisejm-transcripts')
 
+# outputs of incremental processing of transcripts (check aipolit-transcript-ingest.py)
+AIPOLIT_10TERM_SEJM_INGESTED_DIR = os.path.join(AIPOLIT_DATA_DIR, 'hipisejm-transcripts-ingested')
+
 #====================================
 # Cache dir
 #====================================
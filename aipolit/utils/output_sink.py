@@ -0,0 +1,161 @@
+import io
+import sys
+import gzip
+import json
+from typing import Iterable, List, Optional, TextIO
+
+
+# number of lines kept in memory before they are written with single writelines call
+DEFAULT_BUFFER_LINES = 1024
+
+
+class OutputSink:
+    """
+    Destination of dumped lines (e.g. TranscriptQuery dump).
+
+    Each line is a text with optional metadata (dict), metadata is kept only by sinks with with_meta=True
+    (for other sinks callers do not need to compute it at all).
+    """
+    def __init__(self, with_meta: bool = False):
+        self.with_meta = with_meta
+
+    def put(self, txt: str, meta: Optional[dict] = None):
+        raise NotImplementedError()
+
+    def put_many(self, txts: Iterable[str]):
+        """
+        The same as put for each text (without metadata), but faster for sinks which buffer lines.
+        """
+        for txt in txts:
+            self.put(txt)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ListOutputSink(OutputSink):
+    """
+    Appends texts to given list (or records {'text': txt, **meta} if with_meta=True).
+    """
+    def __init__(self, out_list: List, with_meta: bool = False):
+        super().__init__(with_meta=with_meta)
+        self.out_list = out_list
+
+    def put(self, txt: str, meta: Optional[dict] = None):
+        if self.with_meta:
+            self.out_list.append(make_record(txt, meta))
+        else:
+            self.out_list.append(txt)
+
+    def put_many(self, txts: Iterable[str]):
+        if self.with_meta:
+            super().put_many(txts)
+        else:
+            self.out_list.extend(txts)
+
+
+class BufferedOutputSink(OutputSink):
+    """
+    Writes lines to the text filehandle. Lines are accumulated in the buffer and written with single writelines call,
+    when buffer is full (and on flush / close).
+
+    If jsonl=True, then each line is JSON object {'text': txt, **meta} (so metadata is kept).
+    """
+    def __init__(
+            self,
+            filehandle: TextIO,
+            jsonl: bool = False,
+            buffer_lines: int = DEFAULT_BUFFER_LINES,
+            close_filehandle: bool = False):
+        """
+        Params:
+        - filehandle - where lines are written (opened in text mode)
+        - jsonl - if True, then lines are saved as JSON objects with metadata
+        - buffer_lines - max number of lines kept in the buffer (put_many may exceed it, all given lines are written at once)
+        - close_filehandle - if True, then filehandle is closed on close (otherwise it is only flushed)
+        """
+        super().__init__(with_meta=jsonl)
+        self.filehandle = filehandle
+        self.buffer_lines = buffer_lines
+        self.close_filehandle = close_filehandle
+        self.buffer = []
+
+    def put(self, txt: str, meta: Optional[dict] = None):
+        if self.with_meta:
+            self.buffer.append(json.dumps(make_record(txt, meta), ensure_ascii=False))
+        else:
+            self.buffer.append(txt)
+        if len(self.buffer) >= self.buffer_lines:
+            self._write_buffer()
+
+    def put_many(self, txts: Iterable[str]):
+        if self.with_meta:
+            super().put_many(txts)
+            return
+
+        self.buffer.extend(txts)
+        if len(self.buffer) >= self.buffer_lines:
+            self._write_buffer()
+
+    def flush(self):
+        self._write_buffer()
+        self.filehandle.flush()
+
+    def close(self):
+        self.flush()
+        if self.close_filehandle:
+            self.filehandle.close()
+
+    def _write_buffer(self):
+        # lines are joined once per buffer (much cheaper than separate write or concatenation for each line)
+        if len(self.buffer) > 0:
+            self.filehandle.writelines(["\n".join(self.buffer), "\n"])
+            self.buffer = []
+
+
+def make_record(txt: str, meta: Optional[dict]) -> dict:
+    record = {'text': txt}
+    if meta is not None:
+        record.update(meta)
+    return record
+
+
+def open_text_output(fp: str) -> TextIO:
+    """
+    Opens file to write text (utf8), files with .gz or .zst extensions are compressed.
+    Compression with .zst requires zstandard package (pip install zstandard).
+    """
+    if fp.endswith(".gz"):
+        # the same compression level as gzip command (default level 9 is much slower and gives only slightly smaller files)
+        return gzip.open(fp, "wt", encoding='utf8', compresslevel=6)
+
+    if fp.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard package is required to save .zst files (pip install zstandard)")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(fp, "wb"), closefd=True), encoding='utf8')
+
+    return open(fp, "w", encoding='utf8')
+
+
+def open_output_sink(
+        fp: Optional[str] = None,
+        jsonl: bool = False,
+        buffer_lines: int = DEFAULT_BUFFER_LINES) -> BufferedOutputSink:
+    """
+    Returns BufferedOutputSink writing to given file (compressed for .gz / .zst, check open_text_output)
+    or to stdout if fp is None. Use it as context manager (or call close), so the rest of the buffer is written.
+    """
+    if fp is None:
+        return BufferedOutputSink(sys.stdout, jsonl=jsonl, buffer_lines=buffer_lines)
+    return BufferedOutputSink(open_text_output(fp), jsonl=jsonl, buffer_lines=buffer_lines, close_filehandle=True)
@@ -0,0 +1,149 @@
+from typing import List, Tuple
+
+
+class _SimpleLowerTable(dict):
+    """
+    Translation table (for str.translate) which maps each character to its lowercase form
+    (one character for one character, so indexes in lowered text are the same as in original text).
+    """
+    def __missing__(self, ordinal):
+        lowered = chr(ordinal).lower()[0]
+        self[ordinal] = lowered
+        return lowered
+
+
+_LOWER_TABLE = _SimpleLowerTable()
+
+
+def lower_keep_length(text: str) -> str:
+    return text.translate(_LOWER_TABLE)
+
+
+def _is_word_char(c: str) -> bool:
+    # the same as regex \w
+    return c.isalnum() or c == '_'
+
+
+class PhraseMatcher:
+    """
+    Finds occurrences of many phrases in the text in one pass (Aho-Corasick automaton).
+
+    Matching is case insensitive and only whole words are matched,
+    so the results are the same as for the regex r"\\b(?:phrase1|phrase2|...)\\b" (with re.IGNORECASE)
+    searched again from the position next to the beginning of the previous match:
+    - at most one match for each start position,
+    - if more phrases match at the same position, then the one which is first on the list wins.
+
+    Phrases are literal strings (not regexes), they can't be empty.
+
+    Automaton transitions are computed lazily (and memoized), so building matcher for thousands of phrases
+    (e.g. all inflected forms of the words) is cheap.
+    """
+    def __init__(self, phrases: List[str]):
+        self.phrases = phrases
+
+        # state -> char -> state (trie edges at first, later also memoized failure transitions)
+        self.delta = [dict()]
+        # state -> failure state
+        self.fail = [0]
+        # state -> tuple of (phrase length, phrase index) for all phrases which end in this state
+        self.outputs = [tuple()]
+        self._build()
+
+    def find_all(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Returns list of (start, end, phrase_index) sorted by start.
+        """
+        lowered = lower_keep_length(text)
+        text_len = len(text)
+
+        # start -> (phrase_index, end)
+        best_at_start = dict()
+
+        delta = self.delta
+        outputs = self.outputs
+        state = 0
+        for i, c in enumerate(lowered):
+            next_state = delta[state].get(c)
+            if next_state is None:
+                next_state = self._compute_transition(state, c)
+            state = next_state
+
+            if outputs[state]:
+                end = i + 1
+                end_is_word = end < text_len and _is_word_char(text[end])
+                if end_is_word == _is_word_char(text[i]):
+                    continue
+                for phrase_len, phrase_index in outputs[state]:
+                    start = end - phrase_len
+                    start_is_word = start > 0 and _is_word_char(text[start - 1])
+                    if start_is_word == _is_word_char(text[start]):
+                        continue
+                    best = best_at_start.get(start, None)
+                    if best is None or phrase_index < best[0]:
+                        best_at_start[start] = (phrase_index, end)
+
+        return [(start, end, phrase_index) for start, (phrase_index, end) in sorted(best_at_start.items())]
+
+    def _build(self):
+        # lowered phrase -> index of the first phrase on the list
+        lowered_to_index = dict()
+        for phrase_index, phrase in enumerate(self.phrases):
+            if len(phrase) == 0:
+                raise ValueError("PhraseMatcher: empty phrase can't be matched")
+            lowered = lower_keep_length(phrase)
+            if lowered not in lowered_to_index:
+                lowered_to_index[lowered] = phrase_index
+
+        trie_edges = [dict()]
+        own_outputs = [None]
+        for lowered, phrase_index in lowered_to_index.items():
+            state = 0
+            for c in lowered:
+                next_state = trie_edges[state].get(c)
+                if next_state is None:
+                    next_state = len(trie_edges)
+                    trie_edges[state][c] = next_state
+                    trie_edges.append(dict())
+                    own_outputs.append(None)
+                state = next_state
+            own_outputs[state] = (len(lowered), phrase_index)
+
+        states_count = len(trie_edges)
+        self.delta = [dict(edges) for edges in trie_edges]
+        self.fail = [0] * states_count
+        self.outputs = [tuple()] * states_count
+
+        # BFS, so failure state of each state is processed before the state itself
+        queue = list(trie_edges[0].values())
+        for state in queue:
+            self.outputs[state] = self._merge_outputs(own_outputs[state], tuple())
+        pos = 0
+        while pos < len(queue):
+            state = queue[pos]
+            pos += 1
+            for c, child in trie_edges[state].items():
+                fail_state = self.fail[state]
+                while fail_state != 0 and c not in trie_edges[fail_state]:
+                    fail_state = self.fail[fail_state]
+                if c in trie_edges[fail_state]:
+                    fail_state = trie_edges[fail_state][c]
+                self.fail[child] = fail_state
+                self.outputs[child] = self._merge_outputs(own_outputs[child], self.outputs[fail_state])
+                queue.append(child)
+
+    @staticmethod
+    def _merge_outputs(own_output, fail_outputs):
+        if own_output is None:
+            return fail_outputs
+        return (own_output,) + fail_outputs
+
+    def _compute_transition(self, state: int, c: str) -> int:
+        if state == 0:
+            next_state = 0
+        else:
+            next_state = self.delta[self.fail[state]].get(c)
+            if next_state is None:
+                next_state = self._compute_transition(self.fail[state], c)
+        self.delta[state][c] = next_state
+        return next_state
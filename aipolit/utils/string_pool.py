@@ -0,0 +1,73 @@
+from typing import Iterable, List, Optional
+
+
+# id returned for strings which are not in the pool (and used in id columns as "no value")
+NO_ID = -1
+
+
+class StringPool:
+    """
+    Assigns consecutive integer ids to strings (each distinct string is stored only once).
+    Useful for columnar data, where columns keep only ids and strings are taken from the pool.
+    """
+    def __init__(self, strings: Optional[Iterable[str]] = None):
+        # id -> string
+        self.strings = []
+        # string -> id
+        self.string_to_id = dict()
+        if strings is not None:
+            for s in strings:
+                self.add(s)
+
+    def add(self, s: str) -> int:
+        """
+        Returns id of the string (string is added if it is not in the pool yet).
+        """
+        string_id = self.string_to_id.get(s, None)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(s)
+            self.string_to_id[s] = string_id
+        return string_id
+
+    def add_optional(self, s: Optional[str]) -> int:
+        """
+        The same as add, but returns NO_ID for None.
+        """
+        if s is None:
+            return NO_ID
+        return self.add(s)
+
+    def intern(self, s: Optional[str]) -> Optional[str]:
+        """
+        Returns string object kept in the pool (equal to s), so equal strings from many places share one object.
+        """
+        if s is None:
+            return None
+        return self.strings[self.add(s)]
+
+    def find_id(self, s: str) -> int:
+        """
+        Returns id of the string or NO_ID if string is not in the pool (pool is not changed).
+        """
+        return self.string_to_id.get(s, NO_ID)
+
+    def find_ids(self, strings: Iterable[str]) -> List[int]:
+        """
+        Returns ids of given strings which are in the pool (strings not in the pool are skipped).
+        """
+        return [self.string_to_id[s] for s in strings if s in self.string_to_id]
+
+    def get_string(self, string_id: int) -> Optional[str]:
+        """
+        Returns string for given id or None for NO_ID.
+        """
+        if string_id == NO_ID:
+            return None
+        return self.strings[string_id]
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, s):
+        return s in self.string_to_id
@@ -92,24 +92,36 @@ def load_dict_from_tsv(fp):
 
 
 def read_tsv(fp, header=None):
-    result = []
+    rows = iter_tsv_values(fp, header=header)
+    header = next(rows, None)
+    return [OrderedDict(zip(header, values)) for values in rows]
+
+
+def iter_tsv_values(fp, header=None):
+    """
+    Yields rows of TSV file as lists of values (one value per column of header), parsed as in read_tsv:
+    lines are rstripped, missing values are "", extra values are ignored and NONE_STRING is None.
+    First yielded list is header (first line of the file if header is not given).
+    """
     with open(fp, "r") as f:
+        if header:
+            yield list(header)
         for line in f:
             line = line.rstrip()
             tokens = line.split("\t")
             if not header:
                 header = tokens
+                yield header
             else:
-                entry = OrderedDict()
-                for i, key in enumerate(header):
+                values = []
+                for i in range(len(header)):
                     value = ""
                     if i < len(tokens):
                         value = tokens[i]
                     if value == NONE_STRING:
                         value = None
-                    entry[key] = value
-                result.append(entry)
-    return result
+                    values.append(value)
+                yield values
 
 def save_tsv(fp, data, header, labels=None):
     """
@@ -1,18 +1,33 @@
 #!/usr/bin/env python3
 
 import argparse
+from argparse import RawTextHelpFormatter
 import logging
 logging.basicConfig(level=logging.DEBUG, format='[%(levelname)s] %(asctime)s\t%(message)s')
 
 
 from aipolit.ttdata.polit_tweets_data import PolitTweetsData
 from aipolit.ttdata.polit_tweets_filter import PolitTweetsFilter
+from aipolit.ttdata.tweet_criteria import DateRangeCriterion, ClubCriterion, PartyCriterion, LengthCriterion, \
+    RegexCriterion, HashtagCriterion, MentionCriterion, LanguageCriterion, AVAILABLE_LANGUAGES
 
 
 def parse_arguments():
     """parse command line arguments"""
     parser = argparse.ArgumentParser(
-        description='Reads political tweets and info about authors to fiter only those tweets which meets given criteria'
+        description="""Reads political tweets and info about authors to fiter only those tweets which meets given criteria.
+
+Tweets have to meet all given criteria. Number of tweets which meet each criterion is logged (selectivity stats).
+
+Useful use cases:
+
+    - Tweets of KO and Lewica MPs from 2023 with hashtags
+    ./bin/aipolit-polittweets-filter-data.py -it tweets.tsv -iu users.tsv -o filtered.tsv -cl KO Lewica -df 2023-01-01 -dt 2023-12-31 -wh
+
+    - Polish tweets (heuristic) about inflation, from 40 to 200 chars, without mentions of other users
+    ./bin/aipolit-polittweets-filter-data.py -it tweets.tsv -iu users.tsv -o filtered.tsv -lang pl -re 'inflacj' -ic -mcl 40 -xcl 200 -wom
+        """,
+        formatter_class=RawTextHelpFormatter
     )
 
     parser.add_argument(
@@ -40,21 +55,112 @@ def parse_arguments():
         type=int,
         help='Minimum number of chars for the tweet')
 
+    parser.add_argument(
+        '--max-char-length', '-xcl',
+        type=int,
+        help='Maximum number of chars for the tweet')
+
     parser.add_argument(
         '--fixed-club', '-fc',
         help='Take only tweets from this club')
 
+    parser.add_argument(
+        '--clubs', '-cl',
+        type=str,
+        nargs='+',
+        help='Take only tweets from one of given clubs (separate by space)')
+
+    parser.add_argument(
+        '--parties', '-pa',
+        type=str,
+        nargs='+',
+        help='Take only tweets from one of given parties (separate by space)')
+
+    parser.add_argument(
+        '--date-from', '-df',
+        help='Take only tweets from this date (YYYY-MM-DD, inclusive)')
+
+    parser.add_argument(
+        '--date-to', '-dt',
+        help='Take only tweets to this date (YYYY-MM-DD, inclusive)')
+
+    parser.add_argument(
+        '--regex', '-re',
+        help='Take only tweets which text contains match of given regex')
+
+    parser.add_argument(
+        '--ignore-case', '-ic',
+        action='store_true',
+        help='If set, then --regex is case insensitive')
+
+    parser.add_argument(
+        '--with-hashtags', '-wh',
+        action='store_true',
+        help='Take only tweets with hashtags')
+
+    parser.add_argument(
+        '--without-hashtags', '-woh',
+        action='store_true',
+        help='Take only tweets without hashtags')
+
+    parser.add_argument(
+        '--with-mentions', '-wm',
+        action='store_true',
+        help='Take only tweets with mentions of other users (user names at the beginning of responses are not counted)')
+
+    parser.add_argument(
+        '--without-mentions', '-wom',
+        action='store_true',
+        help='Take only tweets without mentions of other users')
+
+    parser.add_argument(
+        '--languages', '-lang',
+        type=str,
+        nargs='+',
+        choices=AVAILABLE_LANGUAGES,
+        help='Take only tweets in one of given languages (detected with simple heuristic)')
+
+    parser.add_argument(
+        '--columnar', '-col',
+        action='store_true',
+        help='If set, then tweets are loaded to typed columns (pandas DataFrame), needs much less memory for big files')
+
     args = parser.parse_args()
 
     return args
 
 
+def create_criteria(args):
+    criteria = []
+    if args.date_from is not None or args.date_to is not None:
+        criteria.append(DateRangeCriterion(args.date_from, args.date_to))
+    if args.clubs:
+        criteria.append(ClubCriterion(args.clubs))
+    if args.parties:
+        criteria.append(PartyCriterion(args.parties))
+    if args.max_char_length is not None:
+        criteria.append(LengthCriterion(max_length=args.max_char_length))
+    if args.regex:
+        criteria.append(RegexCriterion(args.regex, ignore_case=args.ignore_case))
+    if args.with_hashtags:
+        criteria.append(HashtagCriterion(present=True))
+    if args.without_hashtags:
+        criteria.append(HashtagCriterion(present=False))
+    if args.with_mentions:
+        criteria.append(MentionCriterion(present=True))
+    if args.without_mentions:
+        criteria.append(MentionCriterion(present=False))
+    if args.languages:
+        criteria.append(LanguageCriterion(args.languages))
+    return criteria
+
+
 def main():
     args = parse_arguments()
 
-    data = PolitTweetsData()
+    data = PolitTweetsData(columnar=args.columnar)
     data.load_data(args.input_tweets, args.input_users)
-    ttfilter = PolitTweetsFilter(data)
+    ttfilter = PolitTweetsFilter(data, criteria=create_criteria(args))
 
     ttfilter.min_char_length = args.min_char_length
     ttfilter.fixed_club = args.fixed_club
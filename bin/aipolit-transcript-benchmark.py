@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+logging.basicConfig(level=logging.DEBUG, format='[%(levelname)s] %(asctime)s\t%(message)s')
+
+
+import os
+import re
+import json
+import contextlib
+import shutil
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from aipolit.transcript.utils import load_transcripts, list_transcript_filepaths
+from aipolit.transcript.person_affiliation import PersonAffiliation
+from aipolit.transcript.transcript_speaker_affiliation import TranscriptSpeakerAffiliation
+from aipolit.transcript.affiliation_snapshot import AffiliationSnapshot
+from aipolit.transcript.multi_term_affiliation import MultiTermPersonAffiliation, SejmTerm
+from hipisejm.stenparser.transcript import SessionTranscript, SessionSpeech
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from aipolit.transcript.occurrence_counter import ListOccurrenceCounter, REGEX_SPECIAL_CHARS
+from aipolit.transcript.utt_sentence_splitter import UttSentenceSplitter, align_sentences_to_text
+from aipolit.transcript.transcript_query import TranscriptQuery, NamedQuery
+from aipolit.transcript.columnar_store import ColumnarTranscriptStore
+from aipolit.utils.output_sink import open_output_sink, open_text_output
+from aipolit.utils.date import text_to_date, date_to_text
+
+
+SAMPLE_TRANSCRIPT_DIR = "resources/test_data/transcripts_sejm"
+
+
+def parse_arguments():
+    """parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="""Benchmarks transcript processing on synthetic corpus.
+
+Synthetic corpus is created by copying sample transcripts from given dir (multiple times) to temporary directory.
+
+Available benchmarks:
+    - load - compares serial and parallel loading of the transcripts (load_transcripts)
+    - cache - compares loading of the transcripts without and with (warm) TranscriptCache
+    - affiliation - compares per speech cost of assign_affiliation and SpeakerAffiliationTable lookup
+    - names - throughput of speaker names matching (TranscriptSpeakerAffiliation.normalize_name)
+    - occurrences - compares regex and PhraseMatcher search in ListOccurrenceCounter for growing lists of phrases
+    - sentences - compares ListOccurrenceCounter without and with (warm) persistent sentence segmentation cache
+    - spans - compares old estimation of sentence start indexes with align_sentences_to_text on very long utt
+    - columnar - compares TranscriptQuery on transcript objects and on ColumnarTranscriptStore
+    - dump - compares writing TranscriptQuery utt dump line by line and with BufferedOutputSink (to file, gzip and stdout)
+    - merge - compares old string concatenation and fragment lists when speech is split many times by Marszałek (filibuster)
+    - aggregate - compares counting dumped strings with Counter and TranscriptQuery.aggregate (columnar and loaded)
+    - batch - compares separate TranscriptQuery.query calls and single pass TranscriptQuery.query_many (also in streaming mode)
+    - terms - per lookup cost of MultiTermPersonAffiliation with growing number of synthetic terms (and thousands of persons)
+    - startup - compares building TranscriptSpeakerAffiliation from PersonAffiliation JSON and loading it from AffiliationSnapshot
+        """,
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+
+    parser.add_argument(
+        '--what', '-w',
+        type=str,
+        nargs='+',
+        default=['load'],
+        help=f"Which benchmarks should be run. Any combination of: [{', '.join(sorted(BENCHMARKS))}]")
+
+    parser.add_argument(
+        '--sample-dir', '-sd',
+        default=SAMPLE_TRANSCRIPT_DIR,
+        help='Directory with sample transcripts used to build synthetic corpus')
+
+    parser.add_argument(
+        '--copies', '-c',
+        type=int,
+        default=20,
+        help='How many times sample transcripts are copied to create synthetic corpus')
+
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of processes used in parallel modes')
+
+    parser.add_argument(
+        '--repeat', '-r',
+        type=int,
+        default=3,
+        help='Each measurement is repeated given number of times (best time is reported)')
+
+    args = parser.parse_args()
+
+    return args
+
+
+def create_synthetic_corpus(sample_dir, copies, target_dir):
+    sample_filepaths = list_transcript_filepaths(sample_dir)
+    for i in range(copies):
+        for sample_fp in sample_filepaths:
+            target_filename = f"{i:05d}_{os.path.basename(sample_fp)}"
+            shutil.copyfile(sample_fp, os.path.join(target_dir, target_filename))
+    return len(sample_filepaths) * copies
+
+
+def measure(name, func, repeat):
+    best_time = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+    logging.info("%s: best of %i runs: %.3f s", name, repeat, best_time)
+    return best_time
+
+
+def bench_load(corpus_dir, args):
+    serial_time = measure(
+        "load_transcripts serial",
+        lambda: load_transcripts(fixed_dir=corpus_dir),
+        args.repeat)
+    parallel_time = measure(
+        f"load_transcripts workers={args.workers}",
+        lambda: load_transcripts(fixed_dir=corpus_dir, workers=args.workers),
+        args.repeat)
+    logging.info("load_transcripts speedup: %.2fx", serial_time / parallel_time)
+
+
+def bench_cache(corpus_dir, args):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        no_cache_time = measure(
+            "load_transcripts without cache",
+            lambda: load_transcripts(fixed_dir=corpus_dir),
+            args.repeat)
+        # warm up the cache
+        load_transcripts(fixed_dir=corpus_dir, use_cache=True, cache_dir=cache_dir)
+        cache_time = measure(
+            "load_transcripts with warm cache",
+            lambda: load_transcripts(fixed_dir=corpus_dir, use_cache=True, cache_dir=cache_dir),
+            args.repeat)
+    logging.info("load_transcripts cache speedup: %.2fx", no_cache_time / cache_time)
+
+
+def bench_affiliation(corpus_dir, args):
+    transcripts = load_transcripts(fixed_dir=corpus_dir)
+    speeches_with_dates = []
+    for transcript in transcripts:
+        when = text_to_date(transcript.session_date)
+        for session_speech in transcript.session_content:
+            speeches_with_dates.append((session_speech.speaker, when))
+    logging.info("Number of speeches: %i", len(speeches_with_dates))
+
+    transcript_speaker_affiliation = TranscriptSpeakerAffiliation(PersonAffiliation())
+
+    def run_assign_affiliation():
+        for speaker_name, when in speeches_with_dates:
+            transcript_speaker_affiliation.assign_affiliation(speaker_name, when=when)
+
+    def run_table():
+        table = SpeakerAffiliationTable(transcript_speaker_affiliation)
+        table.add_transcripts(transcripts)
+        for speaker_name, when in speeches_with_dates:
+            table.get_affiliation(speaker_name, when)
+
+    assign_time = measure("assign_affiliation", run_assign_affiliation, args.repeat)
+    table_time = measure("SpeakerAffiliationTable (including build)", run_table, args.repeat)
+    logging.info(
+        "per speech: assign_affiliation %.2f us, SpeakerAffiliationTable %.2f us (speedup: %.2fx)",
+        assign_time / len(speeches_with_dates) * 1e6,
+        table_time / len(speeches_with_dates) * 1e6,
+        assign_time / table_time)
+
+
+def bench_names(corpus_dir, args):
+    transcripts = load_transcripts(fixed_dir=corpus_dir)
+    speaker_names = [s.speaker for t in transcripts for s in t.session_content]
+
+    transcript_speaker_affiliation = TranscriptSpeakerAffiliation(PersonAffiliation())
+
+    def run_normalize_name():
+        for speaker_name in speaker_names:
+            transcript_speaker_affiliation.normalize_name(speaker_name)
+
+    normalize_time = measure("normalize_name", run_normalize_name, args.repeat)
+    logging.info(
+        "normalize_name throughput: %.0f speaker names / s (%.2f us per name, %i persons in PersonAffiliation)",
+        len(speaker_names) / normalize_time,
+        normalize_time / len(speaker_names) * 1e6,
+        transcript_speaker_affiliation.person_affiliation.count())
+
+
+def bench_occurrences(corpus_dir, args):
+    # each sample transcript once is enough, sentence splitting is not measured
+    transcripts = load_transcripts(fixed_dir=args.sample_dir)
+    utt_sentence_splitter = UttSentenceSplitter()
+    sentences = [
+        sentence
+        for transcript in transcripts
+        for session_speech in transcript.session_content
+        for utt in session_speech.content
+        for sentence in utt_sentence_splitter.split_utt_to_sentences(utt)]
+    all_words = sorted({
+        w.strip('.,;:!?"') for sentence in sentences for w in sentence.split()
+        if REGEX_SPECIAL_CHARS.isdisjoint(w)} - {''})
+    logging.info("Number of sentences: %i, number of distinct words: %i", len(sentences), len(all_words))
+
+    for tokens_count in [16, 128, 1024, len(all_words)]:
+        searched_tokens = all_words[::max(1, len(all_words) // tokens_count)][:tokens_count]
+        regex_counter = ListOccurrenceCounter(searched_tokens, use_phrase_matcher=False)
+        matcher_counter = ListOccurrenceCounter(searched_tokens, use_phrase_matcher=True)
+
+        regex_time = measure(
+            f"regex {len(searched_tokens)} tokens",
+            lambda: [regex_counter._find_matches_in_sentence(s) for s in sentences],
+            args.repeat)
+        matcher_time = measure(
+            f"PhraseMatcher {len(searched_tokens)} tokens",
+            lambda: [matcher_counter._find_matches_in_sentence(s) for s in sentences],
+            args.repeat)
+        logging.info("%i tokens: PhraseMatcher speedup: %.2fx", len(searched_tokens), regex_time / matcher_time)
+
+
+def bench_sentences(corpus_dir, args):
+    transcripts = load_transcripts(fixed_dir=corpus_dir)
+    searched_tokens = ['hańba', 'hańby', 'zdrada', 'zdrady']
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        no_cache_counter = ListOccurrenceCounter(searched_tokens)
+        cache_counter = ListOccurrenceCounter(searched_tokens, use_sentence_cache=True)
+        cache_counter.utt_sentence_splitter.cache_fp = os.path.join(cache_dir, "spans.sqlite")
+
+        no_cache_time = measure(
+            "ListOccurrenceCounter without sentence cache",
+            lambda: [no_cache_counter.run_count(t) for t in transcripts],
+            args.repeat)
+        # warm up the cache
+        [cache_counter.run_count(t) for t in transcripts]
+        cache_time = measure(
+            "ListOccurrenceCounter with warm sentence cache",
+            lambda: [cache_counter.run_count(t) for t in transcripts],
+            args.repeat)
+    logging.info("ListOccurrenceCounter sentence cache speedup: %.2fx", no_cache_time / cache_time)
+
+
+def old_estimate_start_index_of_each_sentence_matching(text, raw_split):
+    current_index = 0
+    result = []
+    for sent in raw_split[:-1]:
+        result.append(current_index)
+        current_leftover = text[current_index + len(sent):]
+        current_leftover_strip = current_leftover.lstrip()
+        current_index = current_index + len(sent) + (len(current_leftover) - len(current_leftover_strip))
+    if len(raw_split) > 0:
+        result.append(current_index)
+    return result
+
+
+def bench_spans(corpus_dir, args):
+    # one very long utt (like the longest speeches of budget debates), built from copies of sample transcripts
+    transcripts = load_transcripts(fixed_dir=corpus_dir)
+    text = " ".join(
+        utt
+        for transcript in transcripts
+        for session_speech in transcript.session_content
+        for utt in session_speech.content
+        if isinstance(utt, str))
+    sentences = UttSentenceSplitter().splitter.split(text=text)
+    logging.info("Long utt: %i chars, %i sentences", len(text), len(sentences))
+
+    estimate_time = measure(
+        "old estimate_start_index_of_each_sentence_matching",
+        lambda: old_estimate_start_index_of_each_sentence_matching(text, sentences),
+        args.repeat)
+    align_time = measure(
+        "align_sentences_to_text",
+        lambda: align_sentences_to_text(text, sentences),
+        args.repeat)
+    logging.info("align_sentences_to_text speedup: %.2fx", estimate_time / align_time)
+
+
+def bench_columnar(corpus_dir, args):
+    transcript_query = TranscriptQuery(fixed_transcript_dir=corpus_dir)
+    columnar_transcript_query = TranscriptQuery(fixed_transcript_dir=corpus_dir, columnar=True)
+    measure(
+        "ColumnarTranscriptStore build",
+        lambda: ColumnarTranscriptStore.from_transcripts(transcript_query.transcripts),
+        args.repeat)
+
+    queries = [
+        ("interruptions of all speakers", {'what_to_dump': ['utt_interrupt']}),
+        ("utts of KO and PiS speakers", {'what_to_dump': ['speech_speaker', 'utt_norm'], 'restrict_speaker_affiliations': ['KO', 'PiS']}),
+        ("speeches of single speaker", {'what_to_dump': ['utt'], 'speakers': ['Poseł Robert Telus']}),
+    ]
+    for query_name, query_params in queries:
+        objects_time = measure(
+            f"TranscriptQuery {query_name}",
+            lambda: transcript_query.query(to_list=[], **query_params),
+            args.repeat)
+        columnar_time = measure(
+            f"columnar TranscriptQuery {query_name}",
+            lambda: columnar_transcript_query.query(to_list=[], **query_params),
+            args.repeat)
+        logging.info("%s: columnar speedup: %.2fx", query_name, objects_time / columnar_time)
+
+
+class OldDumpWriter:
+    """
+    The same as TranscriptQuery._put_to_dump before output sinks (two write calls per line).
+    """
+    def __init__(self, filehandle):
+        self.cache = {'out_file': filehandle, 'out_list': None}
+
+    def _put_to_dump(self, txt):
+        if self.cache['out_file'] is not None:
+            self.cache['out_file'].write(txt)
+            self.cache['out_file'].write("\n")
+        elif self.cache['out_list'] is not None:
+            self.cache['out_list'].append(txt)
+        else:
+            print(txt)
+
+
+def bench_dump(corpus_dir, args):
+    transcript_query = TranscriptQuery(fixed_transcript_dir=corpus_dir)
+    dumped = []
+    transcript_query.query(what_to_dump=['utt'], to_list=dumped)
+    logging.info("Number of dumped lines: %i", len(dumped))
+
+    def run_old_dump(fp):
+        # fp None means stdout (redirected to os.devnull, so print is measured without terminal)
+        filehandle = open_text_output(fp) if fp is not None else None
+        old_dump_writer = OldDumpWriter(filehandle)
+        for txt in dumped:
+            old_dump_writer._put_to_dump(txt)
+        if filehandle is not None:
+            filehandle.close()
+
+    def run_sink_dump(fp):
+        with open_output_sink(fp) as out_sink:
+            put = out_sink.put
+            for txt in dumped:
+                put(txt)
+
+    def run_query(fp, jsonl=False):
+        with open_output_sink(fp, jsonl=jsonl) as out_sink:
+            transcript_query.query(what_to_dump=['utt'], to_sink=out_sink)
+
+    with tempfile.TemporaryDirectory() as out_dir, open(os.devnull, "w") as devnull:
+        for target_name, fp in [("file", os.path.join(out_dir, "dump.txt")), ("gzip", os.path.join(out_dir, "dump.txt.gz")), ("stdout", None)]:
+            with contextlib.redirect_stdout(devnull):
+                old_time = measure(f"old _put_to_dump to {target_name}", lambda: run_old_dump(fp), args.repeat)
+                sink_time = measure(f"BufferedOutputSink to {target_name}", lambda: run_sink_dump(fp), args.repeat)
+            logging.info("utt dump to %s: BufferedOutputSink speedup: %.2fx", target_name, old_time / sink_time)
+
+        measure(
+            "TranscriptQuery utt dump to file",
+            lambda: run_query(os.path.join(out_dir, "dump.txt")),
+            args.repeat)
+        measure(
+            "TranscriptQuery utt dump to JSONL file (with metadata)",
+            lambda: run_query(os.path.join(out_dir, "dump.jsonl"), jsonl=True),
+            args.repeat)
+
+
+def bench_batch(corpus_dir, args):
+    # rankings suggested in aipolit-transcript-query.py help
+    queries = [
+        ('interrupt_by', {'what_to_dump': ['utt_interrupt_by']}),
+        ('interrupt', {'what_to_dump': ['utt_interrupt']}),
+        ('reaction', {'what_to_dump': ['utt_reaction']}),
+        ('speech_speaker', {'what_to_dump': ['speech_speaker']}),
+        ('ko_utts', {'what_to_dump': ['utt_norm'], 'restrict_speaker_affiliations': ['KO']}),
+        ('pis_utts', {'what_to_dump': ['utt_norm'], 'restrict_speaker_affiliations': ['PiS']}),
+    ]
+
+    for streaming in [False, True]:
+        transcript_query = TranscriptQuery(fixed_transcript_dir=corpus_dir, streaming=streaming)
+        mode_name = "streaming" if streaming else "loaded"
+        separate_time = measure(
+            f"{len(queries)} separate queries ({mode_name})",
+            lambda: [transcript_query.query(to_list=[], **params) for _, params in queries],
+            args.repeat)
+        batch_time = measure(
+            f"query_many with {len(queries)} queries ({mode_name})",
+            lambda: transcript_query.query_many([NamedQuery(name, to_list=[], **params) for name, params in queries]),
+            args.repeat)
+        logging.info("%s: query_many speedup: %.2fx", mode_name, separate_time / batch_time)
+
+
+def bench_aggregate(corpus_dir, args):
+    transcript_query = TranscriptQuery(fixed_transcript_dir=corpus_dir)
+    columnar_transcript_query = TranscriptQuery(fixed_transcript_dir=corpus_dir, columnar=True)
+
+    def run_dump_and_count(what_to_dump):
+        dumped = []
+        transcript_query.query(what_to_dump=what_to_dump, to_list=dumped)
+        return Counter(dumped)
+
+    for what_to_dump in [['utt_interrupt_by'], ['speech_speaker'], ['utt']]:
+        dump_time = measure(
+            f"dump {what_to_dump} and Counter",
+            lambda: run_dump_and_count(what_to_dump),
+            args.repeat)
+        measure(
+            f"aggregate {what_to_dump} by text (loaded)",
+            lambda: transcript_query.aggregate(what_to_dump, ['text']),
+            args.repeat)
+        columnar_time = measure(
+            f"aggregate {what_to_dump} by text (columnar)",
+            lambda: columnar_transcript_query.aggregate(what_to_dump, ['text']),
+            args.repeat)
+        logging.info("%s: columnar aggregate speedup: %.2fx", what_to_dump, dump_time / columnar_time)
+
+
+def old_merge_speeches(speeches):
+    # the same as create_affiliation_to_utts_from_transcripts did before fragment lists (for speeches of the same speaker)
+    prev_entry = None
+    for speech in speeches:
+        utts_raw = re.sub(r"\s+", " ", " ".join(utt for utt in speech.content if isinstance(utt, str)))
+        if prev_entry is not None:
+            prev_entry['utts_raw'] += ' ' + utts_raw
+        else:
+            prev_entry = {'utts_raw': utts_raw}
+    return prev_entry
+
+
+def create_filibuster_transcript(utts, splits):
+    transcript = SessionTranscript()
+    transcript.session_date = "2024-02-21"
+    for _ in range(splits):
+        for speaker in ["Poseł Grzegorz Braun", "Marszałek Szymon Hołownia"]:
+            speech = SessionSpeech(speaker)
+            speech.content = utts
+            transcript.session_content.append(speech)
+    return transcript
+
+
+def bench_merge(corpus_dir, args):
+    transcripts = load_transcripts(fixed_dir=args.sample_dir)
+    utts = [utt for t in transcripts for s in t.session_content for utt in s.content if isinstance(utt, str)][:20]
+    transcript_speaker_affiliation = TranscriptSpeakerAffiliation(PersonAffiliation())
+
+    for splits in [100, 1000, 2000]:
+        transcript = create_filibuster_transcript(utts, splits)
+        speeches = [s for s in transcript.session_content if s.speaker == "Poseł Grzegorz Braun"]
+        old_time = measure(
+            f"old string concatenation, speech split {splits} times",
+            lambda: old_merge_speeches(speeches),
+            args.repeat)
+        new_time = measure(
+            f"iter_affiliation_utts_from_transcripts, speech split {splits} times",
+            lambda: list(transcript_speaker_affiliation.iter_affiliation_utts_from_transcripts([transcript])),
+            args.repeat)
+        logging.info("speech split %i times: fragment lists speedup: %.2fx", splits, old_time / new_time)
+
+
+def create_synthetic_terms(target_dir, terms_count, persons_per_term):
+    """
+    Creates JSON files of persons for synthetic terms (4 years each, ending with 10th term),
+    half of persons of each term were also in the previous term (and some of them changed club during the term).
+    """
+    terms = []
+    for term_index in range(terms_count):
+        term = 10 - terms_count + 1 + term_index
+        date_from = date(2023 - 4 * (terms_count - 1 - term_index), 11, 13)
+        persons = []
+        for i in range(persons_per_term):
+            person_number = term_index * persons_per_term // 2 + i
+            clubs = [{"club_name": f"K{person_number % 7}"}]
+            if i % 5 == 0:
+                change_date = date_to_text(date_from + timedelta(days=365 + i % 300))
+                clubs = [
+                    {"club_name": f"K{person_number % 7}", "to_date": change_date},
+                    {"club_name": f"K{(person_number + 1) % 7}", "from_date": change_date},
+                ]
+            persons.append({
+                "f_name": f"Imię{person_number % 97}",
+                "s_name": f"Nazwisko{person_number}",
+                "clubs": clubs,
+                "active": True,
+            })
+        data_fp = os.path.join(target_dir, f"sejm_term_{term}.json")
+        with open(data_fp, "w", encoding='utf8') as f:
+            json.dump({"poslowie": persons}, f, ensure_ascii=False)
+        terms.append(SejmTerm(term, date_from, data_fp))
+    return terms
+
+
+def bench_terms(corpus_dir, args):
+    persons_per_term = 1000
+    lookups_count = 100000
+    with tempfile.TemporaryDirectory() as terms_dir:
+        for terms_count in [1, 3, 10]:
+            terms = create_synthetic_terms(terms_dir, terms_count, persons_per_term)
+            multi_term_affiliation = MultiTermPersonAffiliation(terms=terms)
+            transcript_speaker_affiliation = TranscriptSpeakerAffiliation(multi_term_affiliation)
+
+            names = sorted(multi_term_affiliation.name_to_entry.keys())
+            first_ordinal = terms[0].date_from.toordinal()
+            days = date(2027, 11, 13).toordinal() - first_ordinal
+            lookups = [
+                (f"Poseł {names[i * 7919 % len(names)]}", date.fromordinal(first_ordinal + i * 31 % days))
+                for i in range(lookups_count)]
+
+            def run_lookups():
+                for speaker_name, when in lookups:
+                    transcript_speaker_affiliation.assign_affiliation(speaker_name, when=when)
+
+            lookup_time = measure(f"assign_affiliation, {terms_count} terms", run_lookups, args.repeat)
+            logging.info(
+                "%i terms, %i persons: %.2f us per assign_affiliation",
+                terms_count, multi_term_affiliation.count(), lookup_time / lookups_count * 1e6)
+
+
+def bench_startup(corpus_dir, args):
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        # first load creates the snapshot
+        AffiliationSnapshot(cache_dir=snapshot_dir).load()
+
+        json_time = measure(
+            "TranscriptSpeakerAffiliation from JSON",
+            lambda: TranscriptSpeakerAffiliation(PersonAffiliation()),
+            args.repeat)
+        snapshot_time = measure(
+            "TranscriptSpeakerAffiliation from AffiliationSnapshot",
+            lambda: AffiliationSnapshot(cache_dir=snapshot_dir).load(),
+            args.repeat)
+    logging.info("AffiliationSnapshot startup speedup: %.2fx", json_time / snapshot_time)
+
+
+BENCHMARKS = {
+    'load': bench_load,
+    'cache': bench_cache,
+    'affiliation': bench_affiliation,
+    'names': bench_names,
+    'occurrences': bench_occurrences,
+    'sentences': bench_sentences,
+    'spans': bench_spans,
+    'columnar': bench_columnar,
+    'dump': bench_dump,
+    'merge': bench_merge,
+    'aggregate': bench_aggregate,
+    'batch': bench_batch,
+    'terms': bench_terms,
+    'startup': bench_startup,
+}
+
+
+def main():
+    args = parse_arguments()
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        files_count = create_synthetic_corpus(args.sample_dir, args.copies, corpus_dir)
+        logging.info("Created synthetic corpus with %i transcript files in: %s", files_count, corpus_dir)
+
+        for bench_name in args.what:
+            assert bench_name in BENCHMARKS, f"Unknown benchmark: {bench_name}"
+            BENCHMARKS[bench_name](corpus_dir, args)
+
+
+if __name__ == '__main__':
+    main()
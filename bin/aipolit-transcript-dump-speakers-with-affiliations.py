@@ -18,6 +18,16 @@ def parse_arguments():
         '--fixed-dir', '-fd',
         help='Fixed directory to load transcripts, overrides defaults (useful for tests)')
 
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        help='If defined, then transcripts are parsed in parallel using given number of processes.')
+
+    parser.add_argument(
+        '--use-cache', '-uc',
+        action='store_true',
+        help='If set, then parsed transcripts are cached on disk (only new or changed XML files are parsed).')
+
     parser.add_argument(
         '--output', '-o',
         required=True,
@@ -37,7 +47,7 @@ def run_query(transcript_query, args, filehandle=None):
 def main():
     args = parse_arguments()
 
-    transcript_query = TranscriptQuery(fixed_transcript_dir=args.fixed_dir)
+    transcript_query = TranscriptQuery(fixed_transcript_dir=args.fixed_dir, workers=args.workers, use_cache=args.use_cache)
     logging.info("Loaded %i transcript files to query.", transcript_query.count_transcripts())
 
     with open(args.output, "w") as f:
@@ -80,4 +90,5 @@ def main():
         logging.info("-- with multiaffiliations: %i", with_multi_aff_count)
 
 
-main()
+if __name__ == '__main__':
+    main()
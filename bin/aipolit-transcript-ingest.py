@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import argparse
+from argparse import RawTextHelpFormatter
+import logging
+logging.basicConfig(level=logging.DEBUG, format='[%(levelname)s] %(asctime)s\t%(message)s')
+
+
+from aipolit.transcript.ingestion import TranscriptIngestion
+from aipolit.transcript.utils import get_transcripts_dir
+
+
+def parse_arguments():
+    """parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="""Incremental processing of transcripts: only new or changed XML files are processed.
+
+Manifest of processed files (with size / mtime) and their artefacts is kept in the output dir:
+    - speeches with resolved speaker affiliations
+    - sentence splits (kept in sentence splitter cache)
+    - occurrences of searched tokens (if --tokens are given)
+Results of processed files are merged into outputs (speeches.jsonl, speakers_with_affiliations.tsv,
+occurrences.jsonl, occurrence_counts.tsv), artefacts of removed files are dropped.
+
+Useful use cases:
+
+    - Process new transcripts (e.g. after downloading next session) and count 'hańba'
+    ./bin/aipolit-transcript-ingest.py -t hańba hańbą hańby
+
+    - The same and update search index (check aipolit-transcript-search.py)
+    ./bin/aipolit-transcript-ingest.py -t hańba hańbą hańby --update-index -j 8
+        """,
+        formatter_class=RawTextHelpFormatter
+    )
+
+    parser.add_argument(
+        '--fixed-dir', '-fd',
+        help='Fixed directory to load transcripts, overrides defaults (useful for tests)')
+
+    parser.add_argument(
+        '--output-dir', '-o',
+        help='Directory with manifest and outputs, by default AIPOLIT_10TERM_SEJM_INGESTED_DIR')
+
+    parser.add_argument(
+        '--tokens', '-t',
+        type=str,
+        nargs='+',
+        help='If defined, then occurrences of given tokens are counted (changing tokens processes all files again).')
+
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        help='If defined, then transcripts are parsed in parallel using given number of processes.')
+
+    parser.add_argument(
+        '--use-cache', '-uc',
+        action='store_true',
+        help='If set, then parsed transcripts are cached on disk.')
+
+    parser.add_argument(
+        '--sentence-cache-fp', '-sc',
+        help='Sqlite file with cache of sentence splits, by default it is in AIPOLIT_CACHE_DIR')
+
+    parser.add_argument(
+        '--update-index', '-ui',
+        action='store_true',
+        help='If set, then search index (TranscriptIndex) is updated too.')
+
+    parser.add_argument(
+        '--index-dir', '-id',
+        help='Directory where index is stored, by default it is in AIPOLIT_CACHE_DIR')
+
+    args = parser.parse_args()
+
+    return args
+
+
+def main():
+    args = parse_arguments()
+
+    ingestion = TranscriptIngestion(
+        get_transcripts_dir(fixed_dir=args.fixed_dir),
+        output_dir=args.output_dir,
+        searched_tokens=args.tokens,
+        sentence_cache_fp=args.sentence_cache_fp)
+    ingestion.run(
+        workers=args.workers,
+        use_cache=args.use_cache,
+        update_index=args.update_index,
+        index_dir=args.index_dir)
+
+
+if __name__ == '__main__':
+    main()
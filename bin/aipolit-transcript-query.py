@@ -6,7 +6,14 @@ import logging
 logging.basicConfig(level=logging.DEBUG, format='[%(levelname)s] %(asctime)s\t%(message)s')
 
 
-from aipolit.transcript.transcript_query import TranscriptQuery, AVAILABLE_TO_DUMP
+import os
+import json
+import contextlib
+
+from aipolit.transcript.transcript_query import TranscriptQuery, NamedQuery, AVAILABLE_TO_DUMP, counter_to_ranking
+from aipolit.transcript.columnar_store import AVAILABLE_DUMP_GROUP_BY
+from aipolit.utils.output_sink import open_output_sink
+from aipolit.utils.text import save_list_as_tsv
 
 
 def parse_arguments():
@@ -34,6 +41,25 @@ Useful use cases:
 
     - Utterances only from speakers of multiple political affiliations
     ./bin/aipolit-transcript-query.py -w utt_norm -sa KO PiS
+
+    - Utterances of KO speakers only from sessions in May 2024 (other sessions are skipped using session index)
+    ./bin/aipolit-transcript-query.py -w utt_norm -sa KO -df 2024-05-01 -dt 2024-05-31
+
+    - All utterances with speaker, date and affiliation (JSONL), compressed
+    ./bin/aipolit-transcript-query.py -w utt --jsonl -o utts.jsonl.gz
+
+    - The same rankings counted in-process (top 20 rows, TSV with header)
+    ./bin/aipolit-transcript-query.py -w utt_interrupt_by -g text -n 20
+    ./bin/aipolit-transcript-query.py -w speech_speaker -g text -n 20
+
+    - Number of interruptions per affiliation of the interrupting person per month, saved as TSV
+    ./bin/aipolit-transcript-query.py -w utt_interrupt -g affiliation month -o interruptions.tsv
+
+    - Many queries in single pass over transcripts (each query is saved to own file), e.g. rankings.jsonl:
+        {"name": "interrupt_by", "what": ["utt_interrupt_by"]}
+        {"name": "reactions", "what": ["utt_reaction"]}
+        {"name": "ko_pis_utts", "what": ["utt_norm"], "speaker_affiliation": ["KO", "PiS"], "output": "ko_pis.txt.gz"}
+    ./bin/aipolit-transcript-query.py --batch rankings.jsonl -bo rankings/
         """,
         formatter_class=RawTextHelpFormatter
     )
@@ -42,9 +68,34 @@ Useful use cases:
         '--fixed-dir', '-fd',
         help='Fixed directory to load transcripts, overrides defaults (useful for tests)')
 
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        help='If defined, then transcripts are parsed in parallel using given number of processes.')
+
+    parser.add_argument(
+        '--use-cache', '-uc',
+        action='store_true',
+        help='If set, then parsed transcripts are cached on disk (only new or changed XML files are parsed).')
+
+    parser.add_argument(
+        '--streaming', '-s',
+        action='store_true',
+        help='If set, then transcripts are processed one by one (lower memory usage, --workers is ignored).')
+
+    parser.add_argument(
+        '--columnar', '-col',
+        action='store_true',
+        help='If set, then transcripts are converted to columnar store and queries use vectorised filters (ignored with --streaming).')
+
     parser.add_argument(
         '--output', '-o',
-        help='If defined, then saves dump into given file.')
+        help='If defined, then saves dump into given file (compressed if file ends with .gz or .zst).')
+
+    parser.add_argument(
+        '--jsonl', '-jl',
+        action='store_true',
+        help='If set, then each dumped line is JSON object with text and its dumped_as, speaker, date and affiliation.')
 
     parser.add_argument(
         '--what', '-w',
@@ -52,37 +103,139 @@ Useful use cases:
         nargs='+',
         help=f"What should be dumped. Any combination of: [{', '.join(sorted(AVAILABLE_TO_DUMP))}]")
 
+    parser.add_argument(
+        '--group-by', '-g',
+        type=str,
+        nargs='+',
+        choices=sorted(AVAILABLE_DUMP_GROUP_BY),
+        help='''If defined, then dumped strings are not printed, but counted in groups by given keys (ranking is printed
+as TSV: keys and count, or saved to --output). Key text is the dumped string itself (the same as sort | uniq -c).''')
+
+    parser.add_argument(
+        '--top', '-n',
+        type=int,
+        help='If defined, then only given number of the most common groups are printed (with --group-by).')
+
+    parser.add_argument(
+        '--batch', '-b',
+        help='''If defined, then runs all queries from given JSONL file in single pass (--what and criteria params are ignored).
+Each line defines query: name, what and optional speaker_affiliation, date_from, date_to, speakers, output
+(by default output is <name>.txt, or <name>.jsonl with --jsonl, in --batch-output-dir).''')
+
+    parser.add_argument(
+        '--batch-output-dir', '-bo',
+        default='.',
+        help='Directory for outputs of batch queries (relative output paths are also resolved against it).')
+
     parser.add_argument(
         '--speaker_affiliation', '-sa',
         type=str,
         nargs="+",
         help='If defined, then processes only speakers with one of given affiliations (separate by space).')
 
+    parser.add_argument(
+        '--date-from', '-df',
+        help='If defined, then processes only sessions from this date (YYYY-MM-DD, inclusive).')
+
+    parser.add_argument(
+        '--date-to', '-dt',
+        help='If defined, then processes only sessions to this date (YYYY-MM-DD, inclusive).')
+
+    parser.add_argument(
+        '--speakers', '-sp',
+        type=str,
+        nargs="+",
+        help='If defined, then processes only speeches of given speakers (raw names as in transcripts).')
+
     args = parser.parse_args()
 
     return args
 
 
-def run_query(transcript_query, args, filehandle=None):
+def run_query(transcript_query, args, out_sink):
     transcript_query.query(
         args.what,
-        to_filehandle=filehandle,
+        to_sink=out_sink,
         restrict_speaker_affiliations=args.speaker_affiliation,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        speakers=args.speakers,
     )
 
 
+def run_aggregate(transcript_query, args):
+    counter = transcript_query.aggregate(
+        args.what,
+        args.group_by,
+        restrict_speaker_affiliations=args.speaker_affiliation,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        speakers=args.speakers)
+    ranking = counter_to_ranking(counter, top_n=args.top)
+    header = args.group_by + ['count']
+    logging.info("Counted %i strings in %i groups.", sum(counter.values()), len(counter))
+
+    if args.output:
+        logging.info("Saving ranking to file: %s", args.output)
+        save_list_as_tsv(args.output, ranking, header)
+        return
+
+    print("\t".join(header))
+    for row in ranking:
+        print("\t".join(str(x) for x in row))
+
+
+def load_batch(batch_fp):
+    with open(batch_fp, "r", encoding='utf8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_batch(transcript_query, args):
+    batch = load_batch(args.batch)
+    os.makedirs(args.batch_output_dir, exist_ok=True)
+    default_ext = "jsonl" if args.jsonl else "txt"
+
+    with contextlib.ExitStack() as exit_stack:
+        named_queries = []
+        for entry in batch:
+            output_fp = os.path.join(args.batch_output_dir, entry.get('output', f"{entry['name']}.{default_ext}"))
+            logging.info("Query %s: saving dump to file: %s", entry['name'], output_fp)
+            out_sink = exit_stack.enter_context(open_output_sink(output_fp, jsonl=args.jsonl))
+            named_queries.append(NamedQuery(
+                entry['name'],
+                entry['what'],
+                to_sink=out_sink,
+                restrict_speaker_affiliations=entry.get('speaker_affiliation', None),
+                date_from=entry.get('date_from', None),
+                date_to=entry.get('date_to', None),
+                speakers=entry.get('speakers', None)))
+        transcript_query.query_many(named_queries)
+
+
 def main():
     args = parse_arguments()
 
-    transcript_query = TranscriptQuery(fixed_transcript_dir=args.fixed_dir)
+    transcript_query = TranscriptQuery(
+        fixed_transcript_dir=args.fixed_dir,
+        workers=args.workers,
+        use_cache=args.use_cache,
+        streaming=args.streaming,
+        columnar=args.columnar)
     logging.info("Loaded %i transcript files to query.", transcript_query.count_transcripts())
 
+    if args.batch:
+        run_batch(transcript_query, args)
+        return
+
+    if args.group_by:
+        run_aggregate(transcript_query, args)
+        return
+
     if args.output:
         logging.info("Saving dump to file: %s", args.output)
-        with open(args.output, "w") as f:
-            run_query(transcript_query, args, f)
-    else:
-        run_query(transcript_query, args)
+    with open_output_sink(args.output, jsonl=args.jsonl) as out_sink:
+        run_query(transcript_query, args, out_sink)
 
 
-main()
+if __name__ == '__main__':
+    main()
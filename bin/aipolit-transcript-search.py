@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+import argparse
+from argparse import RawTextHelpFormatter
+import logging
+logging.basicConfig(level=logging.DEBUG, format='[%(levelname)s] %(asctime)s\t%(message)s')
+
+
+import sys
+
+from aipolit.transcript.transcript_index import TranscriptIndex
+from aipolit.transcript.utils import get_transcripts_dir
+from aipolit.transcript.affiliation_snapshot import load_transcript_speaker_affiliation
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from aipolit.transcript.columnar_store import UTT_TYPE_NAMES
+
+
+def parse_arguments():
+    """parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="""Searches words and phrases in transcripts using persistent inverted index (TranscriptIndex).
+
+Index is built on first run (and built again when transcript XML files change), next searches only read the index.
+Search is case insensitive, phrase matches consecutive words (punctuation between words is ignored).
+Each hit is printed as TSV: session date, speaker, affiliation of the speaker, XML file, matched text with context.
+
+Useful use cases:
+
+    - Every use of 'zdrada' by PiS MPs in 2024
+    ./bin/aipolit-transcript-search.py -q zdrada -sa PiS -df 2024-01-01 -dt 2024-12-31
+
+    - Interactive mode (queries are read from stdin, line by line)
+    ./bin/aipolit-transcript-search.py -sa KO PiS
+
+    - Who interrupts with 'hańba' the most
+    ./bin/aipolit-transcript-search.py -q hańba -ut interrupt | cut -f2 | sort | uniq -c | sort -nr
+
+    - All inflected forms of 'hańba' (lemmas are computed with spaCy once, when index is built)
+    ./bin/aipolit-transcript-search.py -q hańba --lemmas -j 8
+        """,
+        formatter_class=RawTextHelpFormatter
+    )
+
+    parser.add_argument(
+        '--fixed-dir', '-fd',
+        help='Fixed directory to load transcripts, overrides defaults (useful for tests)')
+
+    parser.add_argument(
+        '--index-dir', '-id',
+        help='Directory where index is stored, by default it is in AIPOLIT_CACHE_DIR')
+
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        help='If defined, then transcripts are parsed in parallel using given number of processes (when index is built).')
+
+    parser.add_argument(
+        '--use-cache', '-uc',
+        action='store_true',
+        help='If set, then parsed transcripts are cached on disk (when index is built).')
+
+    parser.add_argument(
+        '--lemmas', '-lem',
+        action='store_true',
+        help='If set, then queries are lemmatized and matched with lemmas of utts (index is built with lemmas if needed).')
+
+    parser.add_argument(
+        '--query', '-q',
+        type=str,
+        nargs='+',
+        help='Words or phrases to search (separate by space, use quotes for phrases). If not defined, then queries are read from stdin.')
+
+    parser.add_argument(
+        '--speaker_affiliation', '-sa',
+        type=str,
+        nargs="+",
+        help='If defined, then returns only hits of speakers with one of given affiliations (separate by space).')
+
+    parser.add_argument(
+        '--speakers', '-sp',
+        type=str,
+        nargs="+",
+        help='If defined, then returns only hits of given speakers (raw names as in transcripts).')
+
+    parser.add_argument(
+        '--date-from', '-df',
+        help='If defined, then returns only hits from sessions from this date (YYYY-MM-DD, inclusive).')
+
+    parser.add_argument(
+        '--date-to', '-dt',
+        help='If defined, then returns only hits from sessions to this date (YYYY-MM-DD, inclusive).')
+
+    parser.add_argument(
+        '--utt-types', '-ut',
+        type=str,
+        nargs="+",
+        choices=UTT_TYPE_NAMES,
+        help='If defined, then returns only hits in utts of given types.')
+
+    parser.add_argument(
+        '--limit', '-l',
+        type=int,
+        help='If defined, then prints at most given number of hits for each query.')
+
+    parser.add_argument(
+        '--context', '-c',
+        type=int,
+        default=60,
+        help='Number of characters printed before and after matched text.')
+
+    args = parser.parse_args()
+
+    return args
+
+
+def format_hit(transcript_index, speaker_affiliation_table, hit, context):
+    utt_text = transcript_index.get_utt_text(hit.utt_row)
+    left = utt_text[max(0, hit.start - context):hit.start]
+    right = utt_text[hit.end:hit.end + context]
+    matched_txt = f"{left}[{utt_text[hit.start:hit.end]}]{right}".replace("\n", " ").replace("\t", " ")
+
+    affiliation = None
+    if hit.speaker is not None and hit.session_date is not None:
+        affiliation = speaker_affiliation_table.get_affiliation(hit.speaker, hit.session_date)
+    return "\t".join([
+        str(hit.session_date),
+        str(hit.speaker),
+        str(affiliation),
+        hit.source_file,
+        matched_txt,
+    ])
+
+
+def run_search(transcript_index, speaker_affiliation_table, query, args):
+    hits = transcript_index.search(
+        query,
+        speakers=args.speakers,
+        affiliations=args.speaker_affiliation,
+        speaker_affiliation_table=speaker_affiliation_table,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        utt_types=args.utt_types,
+        limit=args.limit,
+        lemmas=args.lemmas)
+    for hit in hits:
+        print(format_hit(transcript_index, speaker_affiliation_table, hit, args.context))
+    logging.info("Query '%s': %i hits", query, len(hits))
+
+
+def main():
+    args = parse_arguments()
+
+    transcript_index = TranscriptIndex(
+        get_transcripts_dir(fixed_dir=args.fixed_dir),
+        index_dir=args.index_dir,
+        with_lemmas=args.lemmas)
+    transcript_index.update(workers=args.workers, use_cache=args.use_cache)
+    logging.info("Index of %i utts and %i distinct words.", transcript_index.count_utts(), transcript_index.count_terms())
+
+    speaker_affiliation_table = SpeakerAffiliationTable(load_transcript_speaker_affiliation())
+
+    if args.query:
+        for query in args.query:
+            run_search(transcript_index, speaker_affiliation_table, query, args)
+        return
+
+    if sys.stdin.isatty():
+        print("Type query and press enter (Ctrl-D to finish):", file=sys.stderr)
+    for line in sys.stdin:
+        query = line.strip()
+        if query:
+            run_search(transcript_index, speaker_affiliation_table, query, args)
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+logging.basicConfig(level=logging.DEBUG, format='[%(levelname)s] %(asctime)s\t%(message)s')
+
+
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from aipolit.utils.date import text_to_date, text_to_datetime, texts_to_dates, texts_to_datetimes
+
+
+def parse_arguments():
+    """parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="""Micro-benchmark of date parsing functions from aipolit.utils.date.
+
+Compares the old strptime based parsing with:
+    - text_to_date / text_to_datetime (ISO fast path + LRU cache)
+    - texts_to_dates / texts_to_datetimes (bulk parsing of whole column)
+
+Dates are sampled from given number of distinct days (transcripts have a lot of repeated dates),
+datetimes are (almost) unique as in tweets data.
+        """,
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+
+    parser.add_argument(
+        '--size', '-n',
+        type=int,
+        default=100000,
+        help='Number of strings to parse')
+
+    parser.add_argument(
+        '--distinct-days', '-dd',
+        type=int,
+        default=300,
+        help='Number of distinct dates in the sample of dates')
+
+    parser.add_argument(
+        '--repeat', '-r',
+        type=int,
+        default=3,
+        help='Each measurement is repeated given number of times (best time is reported)')
+
+    args = parser.parse_args()
+
+    return args
+
+
+def old_text_to_date(date_str):
+    return datetime.strptime(date_str, '%Y-%m-%d').date()
+
+
+def old_text_to_datetime(datetime_str):
+    datetime_str = re.sub(r".\d\d\d\d\d\d+$", "", datetime_str)
+    return datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S")
+
+
+def measure(name, func, repeat, size):
+    best_time = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+    logging.info("%s: best of %i runs: %.3f s (%.3f us per string)", name, repeat, best_time, best_time / size * 1e6)
+    return best_time
+
+
+def main():
+    args = parse_arguments()
+
+    rnd = random.Random(42)
+    start_datetime = datetime(2019, 11, 12)
+    all_days = [(start_datetime + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(args.distinct_days)]
+    date_strs = [rnd.choice(all_days) for _ in range(args.size)]
+    datetime_strs = [
+        (start_datetime + timedelta(seconds=rnd.randrange(4 * 365 * 24 * 3600))).strftime("%Y-%m-%d %H:%M:%S")
+        for _ in range(args.size)]
+
+    old_time = measure("strptime text_to_date", lambda: [old_text_to_date(s) for s in date_strs], args.repeat, args.size)
+    new_time = measure("text_to_date", lambda: [text_to_date(s) for s in date_strs], args.repeat, args.size)
+    bulk_time = measure("texts_to_dates", lambda: texts_to_dates(date_strs), args.repeat, args.size)
+    logging.info("dates speedup: text_to_date %.2fx, texts_to_dates %.2fx", old_time / new_time, old_time / bulk_time)
+
+    old_time = measure("strptime text_to_datetime", lambda: [old_text_to_datetime(s) for s in datetime_strs], args.repeat, args.size)
+    new_time = measure("text_to_datetime", lambda: [text_to_datetime(s) for s in datetime_strs], args.repeat, args.size)
+    bulk_time = measure("texts_to_datetimes", lambda: texts_to_datetimes(datetime_strs), args.repeat, args.size)
+    logging.info("datetimes speedup: text_to_datetime %.2fx, texts_to_datetimes %.2fx", old_time / new_time, old_time / bulk_time)
+
+
+if __name__ == '__main__':
+    main()
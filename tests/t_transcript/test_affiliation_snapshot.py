@@ -0,0 +1,104 @@
+import os
+import json
+import pickle
+import shutil
+import tempfile
+from aipolit.transcript import affiliation_snapshot
+from aipolit.transcript.affiliation_snapshot import AffiliationSnapshot, load_transcript_speaker_affiliation
+
+
+sample_data_fp = "resources/test_data/political-affiliation/sejm.json"
+
+
+def test_snapshot_equals_json():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        snapshot = AffiliationSnapshot(cache_dir=tmpdirname)
+        from_json = snapshot.load(fixed_filepath=sample_data_fp)
+        assert len(os.listdir(tmpdirname)) == 1, "snapshot should be saved on first load"
+
+        from_snapshot = snapshot.load(fixed_filepath=sample_data_fp)
+        assert from_snapshot is not from_json
+
+        person_affiliation = from_snapshot.person_affiliation
+        assert person_affiliation.count() == from_json.person_affiliation.count()
+        assert sorted(person_affiliation.name_to_entry) == sorted(from_json.person_affiliation.name_to_entry)
+
+        person = person_affiliation.get_person_by_name("Jan Nowak")
+        assert person.club_bounds is not None, "clubs should be already compiled"
+        assert person.get_club(when="2024-01-01") == "X"
+        assert person.get_club(when="2024-10-05") == "Y"
+        assert person.get_club(when="2024-11-03") == "Z"
+
+        assert from_snapshot.normalize_name("Poseł Jan Nowak") == "Jan Nowak"
+        assert from_snapshot.assign_affiliation("Poseł Jan Nowak", when_txt="2024-10-05") == "Y"
+
+
+def test_snapshot_invalidation():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        data_fp = os.path.join(tmpdirname, "sejm.json")
+        shutil.copyfile(sample_data_fp, data_fp)
+        snapshot = AffiliationSnapshot(cache_dir=os.path.join(tmpdirname, "snapshots"))
+        assert snapshot.load(fixed_filepath=data_fp).person_affiliation.get_person_by_name("Jan Nowak") is not None
+
+        with open(data_fp, "r") as f:
+            data = json.load(f)
+        for entry in data['poslowie']:
+            if entry['s_name'] == "Nowak":
+                entry['s_name'] = "Nowakowski"
+        with open(data_fp, "w") as f:
+            json.dump(data, f)
+
+        person_affiliation = snapshot.load(fixed_filepath=data_fp).person_affiliation
+        assert person_affiliation.get_person_by_name("Jan Nowak") is None, "snapshot should be built again from changed JSON"
+        assert person_affiliation.get_person_by_name("Jan Nowakowski") is not None
+
+
+def test_broken_snapshot():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        snapshot = AffiliationSnapshot(cache_dir=tmpdirname)
+        snapshot.load(fixed_filepath=sample_data_fp)
+        for filename in os.listdir(tmpdirname):
+            with open(os.path.join(tmpdirname, filename), "wb") as f:
+                f.write(b"broken")
+
+        transcript_speaker_affiliation = snapshot.load(fixed_filepath=sample_data_fp)
+        assert transcript_speaker_affiliation.normalize_name("Poseł Jan Nowak") == "Jan Nowak"
+
+
+def test_snapshot_invalidated_by_layout_change(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        snapshot = AffiliationSnapshot(cache_dir=tmpdirname)
+        snapshot.load(fixed_filepath=sample_data_fp)
+        snapshot_fp = os.path.join(tmpdirname, os.listdir(tmpdirname)[0])
+        mtime_ns = os.stat(snapshot_fp).st_mtime_ns
+
+        # e.g. Person got new attribute, but SNAPSHOT_FORMAT_VERSION was not bumped
+        monkeypatch.setattr(affiliation_snapshot, "_layout_hash", "other-layout")
+        transcript_speaker_affiliation = snapshot.load(fixed_filepath=sample_data_fp)
+        assert transcript_speaker_affiliation.normalize_name("Poseł Jan Nowak") == "Jan Nowak"
+        with open(snapshot_fp, "rb") as f:
+            assert pickle.load(f)['layout_hash'] == "other-layout", "snapshot should be built again"
+        assert os.stat(snapshot_fp).st_mtime_ns >= mtime_ns
+
+
+def test_not_writable_cache_dir():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        # cache dir can't be created, because its parent is a file
+        not_dir_fp = os.path.join(tmpdirname, "file")
+        with open(not_dir_fp, "w") as f:
+            f.write("not a dir")
+
+        snapshot = AffiliationSnapshot(cache_dir=os.path.join(not_dir_fp, "snapshots"))
+        transcript_speaker_affiliation = snapshot.load(fixed_filepath=sample_data_fp)
+        assert transcript_speaker_affiliation.normalize_name("Poseł Jan Nowak") == "Jan Nowak"
+
+
+def test_load_transcript_speaker_affiliation():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        load_transcript_speaker_affiliation(fixed_filepath=sample_data_fp, snapshot_cache_dir=tmpdirname)
+        assert os.listdir(tmpdirname) == [], "snapshot is not used by default"
+
+        transcript_speaker_affiliation = load_transcript_speaker_affiliation(
+            fixed_filepath=sample_data_fp, use_snapshot=True, snapshot_cache_dir=tmpdirname)
+        assert len(os.listdir(tmpdirname)) == 1
+        assert transcript_speaker_affiliation.normalize_name("Poseł Jan Nowak") == "Jan Nowak"
@@ -0,0 +1,117 @@
+import os
+import tempfile
+from collections import Counter
+from datetime import date
+from aipolit.transcript.columnar_store import ColumnarTranscriptStore
+from aipolit.transcript.occurrence_counter import get_utt_type
+from aipolit.transcript.person_affiliation import PersonAffiliation
+from aipolit.transcript.transcript_speaker_affiliation import TranscriptSpeakerAffiliation
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from aipolit.transcript.utils import load_transcripts, list_transcript_filepaths, load_transcripts_from_filepaths
+from aipolit.utils.string_pool import NO_ID
+from tests.t_transcript.test_utils import create_corpus_with_dates
+
+
+sample_transcript_dir = "resources/test_data/transcripts_sejm"
+transcripts = load_transcripts(fixed_dir=sample_transcript_dir)
+store = ColumnarTranscriptStore.from_transcripts(transcripts)
+speaker_affiliation_table = SpeakerAffiliationTable(TranscriptSpeakerAffiliation(PersonAffiliation()))
+
+
+def test_store_sizes():
+    assert store.count_sessions() == 1
+    assert store.count_speeches() == 318
+    assert store.count_utts() == 1103
+    assert len(store.texts) < store.count_utts(), "repeated texts (e.g. reactions) should be kept once"
+
+
+def test_store_rows_same_as_transcript():
+    utt_row = 0
+    for speech_row, speech in enumerate(transcripts[0].session_content):
+        assert store.names.get_string(store.speech_speaker[speech_row]) == speech.speaker
+        assert store.speech_first_utt[speech_row] == utt_row
+        for utt in speech.content:
+            assert store.utt_speech[utt_row] == speech_row
+            assert store.utt_speech_index[utt_row] == speech_row
+            assert store.utt_session_date[utt_row] == store.session_dates[0]
+            utt_type = get_utt_type(utt)
+            assert ['norm', 'reaction', 'interrupt'][store.utt_type[utt_row]] == utt_type
+            if utt_type == 'interrupt':
+                assert store.names.get_string(store.utt_interrupted_by[utt_row]) == utt.interrupted_by_speaker
+                assert store.texts.get_string(store.utt_text[utt_row]) == utt.text
+            else:
+                assert store.utt_interrupted_by[utt_row] == -1
+            utt_row += 1
+
+
+def test_select_utts_by_type():
+    assert store.select_utts(utt_types=['norm']).sum() == 614
+    assert store.select_utts(utt_types=['reaction', 'interrupt']).sum() == 266 + 223
+
+    speech_mask = store.select_speeches(speakers=['Poseł Robert Telus'])
+    assert speech_mask.sum() == 4
+    assert store.select_utts(speech_mask).sum() == store.speech_utt_count[speech_mask].sum()
+
+
+def test_select_speeches_by_affiliation():
+    speech_mask = store.select_speeches(affiliations=['PiS'], speaker_affiliation_table=speaker_affiliation_table)
+    for speech_row in speech_mask.nonzero()[0]:
+        speaker = store.names.get_string(store.speech_speaker[speech_row])
+        assert speaker_affiliation_table.get_affiliation(speaker, store.get_session_date(0)) == 'PiS'
+    assert speech_mask.sum() > 0
+
+
+def test_group_count():
+    utt_mask = store.select_utts(utt_types=['interrupt'])
+    per_interrupter = store.group_count(['interrupted_by'], utt_mask)
+    expected = Counter()
+    for speech in transcripts[0].session_content:
+        for utt in speech.content:
+            if get_utt_type(utt) == 'interrupt':
+                expected[(utt.interrupted_by_speaker,)] += 1
+    assert per_interrupter == expected
+
+    per_type = store.group_count(['utt_type', 'month'])
+    assert per_type == Counter({
+        ('norm', '2024-02'): 614,
+        ('reaction', '2024-02'): 266,
+        ('interrupt', '2024-02'): 223,
+    }), "Transcript from February 2024"
+
+    per_affiliation = store.group_count(['interrupted_by_affiliation', 'month'], utt_mask, speaker_affiliation_table)
+    assert sum(per_affiliation.values()) == 223
+    assert per_affiliation[('PiS', '2024-02')] > 0
+
+
+def test_group_count_sessions_and_dates():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        create_corpus_with_dates(tmpdirname, ["2024-01-05", "2024-02-01"])
+        filepaths = list_transcript_filepaths(tmpdirname)
+        dated_store = ColumnarTranscriptStore.from_transcripts(load_transcripts_from_filepaths(filepaths), filepaths)
+
+        assert dated_store.get_session_date(0) in (date(2024, 1, 5), date(2024, 2, 1))
+        per_month = dated_store.group_count(['month'], dated_store.select_utts(utt_types=['norm']))
+        assert per_month == Counter({('2024-01',): 614, ('2024-02',): 614})
+
+        per_session = dated_store.group_count(['session', 'date'])
+        assert sorted(per_session.values()) == [1103, 1103]
+        assert {key[0] for key in per_session} == {os.path.basename(fp) for fp in filepaths}
+
+        speech_mask = dated_store.select_speeches(date_from=date(2024, 1, 10))
+        assert speech_mask.sum() == 318
+
+
+def test_affiliation_of_session_without_date():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        create_corpus_with_dates(tmpdirname, ["2024-02-21", ""])
+        undated_store = ColumnarTranscriptStore.from_transcripts(load_transcripts(fixed_dir=tmpdirname))
+    assert undated_store.get_session_date(1) is None
+
+    club_ids = undated_store.get_speech_affiliation_ids(speaker_affiliation_table)
+    undated_speeches = undated_store.speech_session == 1
+    assert (club_ids[undated_speeches] == NO_ID).all(), "affiliation is unknown without date"
+    assert [undated_store.clubs.get_string(c) for c in club_ids[~undated_speeches]] == \
+        [store.clubs.get_string(c) for c in store.get_speech_affiliation_ids(speaker_affiliation_table)]
+
+    speech_mask = undated_store.select_speeches(affiliations=['PiS'], speaker_affiliation_table=speaker_affiliation_table)
+    assert speech_mask.sum() == store.select_speeches(affiliations=['PiS'], speaker_affiliation_table=speaker_affiliation_table).sum()
@@ -0,0 +1,101 @@
+import os
+import json
+import shutil
+import tempfile
+from aipolit.transcript.ingestion import TranscriptIngestion
+from aipolit.transcript.utils import load_transcripts
+from aipolit.transcript.occurrence_counter import ListOccurrenceCounter
+from tests.t_transcript.test_utils import create_corpus_with_dates
+
+
+searched_tokens = ['książka', 'Oklaski']
+
+
+def read_outputs(output_dir):
+    result = dict()
+    for output_name, filename in TranscriptIngestion.MERGED_OUTPUTS.items():
+        with open(os.path.join(output_dir, filename), "r", encoding='utf8') as f:
+            result[output_name] = f.read()
+    return result
+
+
+def create_ingestion(transcripts_dir, output_dir, cache_dir, tokens=searched_tokens):
+    # sentence cache in temporary dir, so tests do not write to AIPOLIT_CACHE_DIR
+    return TranscriptIngestion(
+        transcripts_dir,
+        output_dir=output_dir,
+        searched_tokens=tokens,
+        sentence_cache_fp=os.path.join(cache_dir, "sentence-spans.sqlite"))
+
+
+def ingest_at_once(transcripts_dir):
+    with tempfile.TemporaryDirectory() as output_dir, tempfile.TemporaryDirectory() as cache_dir:
+        create_ingestion(transcripts_dir, output_dir, cache_dir).run()
+        return read_outputs(output_dir)
+
+
+def test_ingestion_outputs():
+    with tempfile.TemporaryDirectory() as transcripts_dir, tempfile.TemporaryDirectory() as output_dir, \
+            tempfile.TemporaryDirectory() as cache_dir:
+        create_corpus_with_dates(transcripts_dir, ["2024-01-01", "2024-01-02"])
+        stats = create_ingestion(transcripts_dir, output_dir, cache_dir).run()
+        assert stats == {'processed': 2, 'removed': 0, 'unchanged': 0}
+
+        transcripts = load_transcripts(fixed_dir=transcripts_dir)
+        outputs = read_outputs(output_dir)
+
+        speeches = [json.loads(line) for line in outputs['speeches'].splitlines()]
+        assert len(speeches) == sum(len(t.session_content) for t in transcripts)
+        assert [s['when'] for s in speeches] == [t.session_date for t in transcripts for _ in t.session_content]
+        assert sum(sum(s['utt_counts'].values()) for s in speeches) == sum(len(sp.content) for t in transcripts for sp in t.session_content)
+        assert any(s['affiliation'] is not None for s in speeches), "some speakers are MPs"
+
+        counter = ListOccurrenceCounter(searched_tokens)
+        expected_count = sum(len(counter.run_count(t)) for t in transcripts)
+        occurrences = [json.loads(line) for line in outputs['occurrences'].splitlines()]
+        assert len(occurrences) > 0
+        assert len(occurrences) == expected_count
+        assert sum(int(line.split("\t")[1]) for line in outputs['occurrence_counts'].splitlines()[1:]) == expected_count
+
+        speaker_lines = outputs['speakers'].splitlines()
+        assert speaker_lines[0] == "speaker_name\taffiliations\tcanon_name"
+        assert len(speaker_lines) - 1 == len({s['speaker_name'] for s in speeches})
+
+
+def test_ingestion_processes_only_changed_files():
+    with tempfile.TemporaryDirectory() as transcripts_dir, tempfile.TemporaryDirectory() as output_dir, \
+            tempfile.TemporaryDirectory() as new_files_dir, tempfile.TemporaryDirectory() as cache_dir:
+        create_corpus_with_dates(transcripts_dir, ["2024-01-01", "2024-01-02", "2024-01-03"])
+
+        ingestion = create_ingestion(transcripts_dir, output_dir, cache_dir)
+        assert ingestion.run() == {'processed': 3, 'removed': 0, 'unchanged': 0}
+
+        ingestion = create_ingestion(transcripts_dir, output_dir, cache_dir)
+        assert ingestion.find_files_to_process() == []
+        assert ingestion.run() == {'processed': 0, 'removed': 0, 'unchanged': 3}
+
+        # new file, changed file and removed file
+        create_corpus_with_dates(new_files_dir, ["2024-01-04", "2024-01-05"])
+        shutil.move(os.path.join(new_files_dir, "transcript_00.xml"), os.path.join(transcripts_dir, "transcript_99.xml"))
+        shutil.move(os.path.join(new_files_dir, "transcript_01.xml"), os.path.join(transcripts_dir, "transcript_01.xml"))
+        os.remove(os.path.join(transcripts_dir, "transcript_02.xml"))
+
+        ingestion = create_ingestion(transcripts_dir, output_dir, cache_dir)
+        assert sorted(os.path.basename(fp) for fp in ingestion.find_files_to_process()) == ["transcript_01.xml", "transcript_99.xml"]
+        assert ingestion.run() == {'processed': 2, 'removed': 1, 'unchanged': 1}
+        assert not os.path.exists(os.path.join(output_dir, TranscriptIngestion.SPEECHES_DIR, "transcript_02.xml.jsonl"))
+        assert read_outputs(output_dir) == ingest_at_once(transcripts_dir), "merged outputs are the same as processed at once"
+
+        # other searched tokens - all files processed again
+        ingestion = create_ingestion(transcripts_dir, output_dir, cache_dir, tokens=['hańba'])
+        assert ingestion.run() == {'processed': 3, 'removed': 0, 'unchanged': 0}
+
+
+def test_ingestion_with_workers():
+    with tempfile.TemporaryDirectory() as transcripts_dir, tempfile.TemporaryDirectory() as output_dir, \
+            tempfile.TemporaryDirectory() as cache_dir:
+        create_corpus_with_dates(transcripts_dir, ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"])
+        ingestion = create_ingestion(transcripts_dir, output_dir, cache_dir)
+        # files are parsed in chunks (2 workers * PARSE_CHUNK_PER_WORKER files), so 5 files need many chunks
+        assert ingestion.run(workers=2) == {'processed': 5, 'removed': 0, 'unchanged': 0}
+        assert read_outputs(output_dir) == ingest_at_once(transcripts_dir)
@@ -1,5 +1,12 @@
+import os
+import pickle
+import tempfile
+import pytest
 from hipisejm.stenparser.transcript import SessionTranscript
 from aipolit.transcript.occurrence_counter import ListOccurrenceCounter
+from aipolit.transcript.symbol_table import TranscriptSymbolTable
+from aipolit.transcript.utils import list_transcript_filepaths, load_transcripts
+from tests.t_transcript.test_utils import create_corpus_with_dates
 
 sample_transcript_fp = "resources/test_data/transcripts_sejm/sample_transcript_06_a_ksiazka.xml"
 sample_transcript = SessionTranscript()
@@ -29,8 +36,7 @@ def test_detailed_occurrence_count():
     assert occurrence.speaker == "Marszałek Szymon Hołownia"
     assert occurrence.sentence == "Na sekretarzy dzisiejszych obrad powołuję posłów Jolantę Niezgodzką, Aleksandrę Karolinę Wiśniewską, Filipa Kaczyńskiego i Łukasza Kmitę."
     assert occurrence.matched_utt_index == 2
-    # TODO to może być trudne
-    #assert occurrence.sentence_start_index_in_utt == 21
+    assert occurrence.sentence_start_index_in_utt == 21
     assert occurrence.sentence_start_match == 0
     assert occurrence.sentence_end_match == len(searched_tokens[0])
     assert occurrence.prev_sentence == "Dzień dobry państwu."
@@ -55,3 +61,123 @@ def test_occurrence_correct_prev_sentence_with_double_interruptions():
 
     occur_with_double = result[1]
     assert 'Bardzo proszę, panie pośle' in occur_with_double.prev_sentence, "Should correct show prev_sentence when two interruptions appear"
+
+
+@pytest.mark.parametrize(
+    "searched_tokens",
+    [
+        ['książka', 'książki'],
+        ['Ha, ha, ha'],
+        ['polski rząd', 'pan', 'pani', 'Pan Marszałek', 'posłowie'],
+    ])
+def test_phrase_matcher_the_same_as_regex(searched_tokens):
+    def to_tuples(result):
+        return [
+            (o.speaker, o.sentence, o.matched_utt_index, o.sentence_start_index_in_utt, o.sentence_start_match, o.sentence_end_match, o.prev_sentence)
+            for o in result]
+
+    regex_counter = ListOccurrenceCounter(searched_tokens, use_phrase_matcher=False)
+    matcher_counter = ListOccurrenceCounter(searched_tokens, use_phrase_matcher=True)
+    assert regex_counter.phrase_matcher is None
+    assert matcher_counter.phrase_matcher is not None
+
+    expected = to_tuples(regex_counter.run_count(sample_transcript))
+    assert len(expected) > 0
+    assert to_tuples(matcher_counter.run_count(sample_transcript)) == expected
+
+
+def test_phrase_matcher_not_used_for_regex_tokens():
+    counter = ListOccurrenceCounter(['książk(a|i)'], use_phrase_matcher=True)
+    assert counter.phrase_matcher is None
+    assert len(counter.run_count(sample_transcript)) == 5
+
+
+def occurrences_to_tuples(result):
+    return [
+        (o.speaker, o.sentence, o.matched_utt_index, o.speech_index, o.utt_type, o.speech_speaker, o.prev_sentence)
+        for o in result]
+
+
+def test_occurrence_locators():
+    counter = ListOccurrenceCounter(['Ha, ha, ha'])
+    result = counter.run_count(sample_transcript)
+
+    for occurrence in result:
+        assert occurrence.source_file == "06_a_ksiazka.pdf"
+        speech = sample_transcript.session_content[occurrence.speech_index]
+        assert speech is occurrence.speech_ref
+        assert speech.content[occurrence.matched_utt_index] is occurrence.utt_ref
+
+    interruptions = [o for o in result if o.utt_type == 'interrupt']
+    assert len(interruptions) > 0
+    assert "przerywając wypowiedź" in str(interruptions[0])
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_run_count_corpus(workers):
+    counter = ListOccurrenceCounter(['książka', 'książki', 'polski rząd'])
+    expected = occurrences_to_tuples(counter.run_count(sample_transcript))
+
+    dates = ["2024-01-01", "2024-01-02"]
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        create_corpus_with_dates(tmpdirname, dates)
+        filepaths = list_transcript_filepaths(tmpdirname)
+        transcripts = load_transcripts(fixed_dir=tmpdirname)
+
+        from_filepaths = counter.run_count_corpus(filepaths, workers=workers)
+        from_transcripts = counter.run_count_corpus(transcripts, workers=workers)
+
+    assert len(from_filepaths) == len(dates)
+    for filepath, transcript, result_fp, result_tr in zip(filepaths, transcripts, from_filepaths, from_transcripts):
+        assert occurrences_to_tuples(result_fp) == expected
+        assert occurrences_to_tuples(result_tr) == expected
+        for occurrence in result_fp:
+            assert occurrence.source_file == filepath
+            assert occurrence.utt_ref is None and occurrence.speech_ref is None, "occurrences should be compact"
+            utt = occurrence.get_utt(transcript)
+            assert occurrence.sentence[:10] in (utt if isinstance(utt, str) else utt.text)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_occurrences_with_symbol_table(workers):
+    symbol_table = TranscriptSymbolTable()
+    counter = ListOccurrenceCounter(['Ha, ha, ha', 'książka'], symbol_table=symbol_table)
+    expected = occurrences_to_tuples(ListOccurrenceCounter(['Ha, ha, ha', 'książka']).run_count(sample_transcript))
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        create_corpus_with_dates(tmpdirname, ["2024-01-01", "2024-01-02"])
+        results = counter.run_count_corpus(list_transcript_filepaths(tmpdirname), workers=workers)
+
+    speaker_strings = dict()
+    for result in results:
+        assert occurrences_to_tuples(result) == expected
+        for occurrence in result:
+            assert symbol_table.get_speaker(occurrence.speaker_id) == occurrence.speaker
+            assert symbol_table.get_speaker(occurrence.speech_speaker_id) == occurrence.speech_speaker
+            assert speaker_strings.setdefault(occurrence.speaker_id, occurrence.speaker) is occurrence.speaker, \
+                "the same speaker string should be shared by all occurrences"
+
+
+def test_compact_occurrence_pickle_size():
+    counter = ListOccurrenceCounter(['książka', 'książki'])
+    result = counter.run_count(sample_transcript)
+    full_size = len(pickle.dumps(result))
+
+    for occurrence in result:
+        occurrence.make_compact()
+    compact_size = len(pickle.dumps(result))
+
+    assert compact_size * 2 < full_size
+
+
+def test_occurrence_count_with_sentence_cache():
+    searched_tokens = ['polski rząd', 'książka', 'książki']
+    expected = occurrences_to_tuples(ListOccurrenceCounter(searched_tokens).run_count(sample_transcript))
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        counter = ListOccurrenceCounter(searched_tokens, use_sentence_cache=True)
+        counter.utt_sentence_splitter.cache_fp = os.path.join(tmpdirname, "spans.sqlite")
+        # first run fills the cache, second run uses it
+        assert occurrences_to_tuples(counter.run_count(sample_transcript)) == expected
+        assert occurrences_to_tuples(counter.run_count(sample_transcript)) == expected
+        counter.utt_sentence_splitter.cache_connection.close()
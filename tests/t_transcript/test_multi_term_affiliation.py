@@ -0,0 +1,50 @@
+from aipolit.transcript.multi_term_affiliation import MultiTermPersonAffiliation, SejmTerm
+from aipolit.transcript.transcript_speaker_affiliation import TranscriptSpeakerAffiliation
+
+
+terms = [
+    SejmTerm(10, "2023-11-13", "resources/test_data/political-affiliation/sejm.json"),
+    SejmTerm(9, "2019-11-12", "resources/test_data/political-affiliation/sejm_term_9.json"),
+]
+multi_term_affiliation = MultiTermPersonAffiliation(terms=terms)
+
+
+def test_terms_are_sorted():
+    assert [t.term for t in multi_term_affiliation.terms] == [9, 10]
+
+
+def test_person_across_terms():
+    assert sorted(multi_term_affiliation.get_person_terms("Jan Nowak").keys()) == [9, 10]
+    assert multi_term_affiliation.get_person_terms("unknown") == dict()
+
+    assert multi_term_affiliation.get_club("Jan Nowak", "2019-01-01") is None, "before first term"
+    assert multi_term_affiliation.get_club("Jan Nowak", "2020-01-01") == "W"
+    assert multi_term_affiliation.get_club("Jan Nowak", "2022-01-01") == "X"
+    assert multi_term_affiliation.get_club("Jan Nowak", "2024-10-05") == "Y"
+    assert multi_term_affiliation.get_club("jan nowak", "2024-11-03") == "Z"
+
+
+def test_namesakes():
+    assert multi_term_affiliation.get_club("Jan Kowalski", "2020-01-01") == "A"
+    assert multi_term_affiliation.get_person_id("Jan Kowalski", "2020-01-01") == "jan-kowalski-1960"
+
+    # term 10 starts before Jan Kowalski (other person) joins club X
+    assert multi_term_affiliation.get_club("Jan Kowalski", "2023-12-01") is None
+    assert multi_term_affiliation.get_person_id("Jan Kowalski", "2023-12-01") == "Jan Kowalski"
+    assert multi_term_affiliation.get_club("Jan Kowalski", "2024-10-01") == "X"
+
+
+def test_name_variants():
+    assert multi_term_affiliation.get_club("Anna Nowacka", "2020-01-01") == "B"
+    assert multi_term_affiliation.get_club("Anna Zielińska", "2020-01-01") == "B"
+    assert multi_term_affiliation.get_person_id("Anna Zielińska", "2020-01-01") == "anna-nowacka"
+    assert multi_term_affiliation.get_club("Anna Zielińska", "2022-01-01") is None, "not active"
+    assert multi_term_affiliation.get_club("Anna Kowalska", "2020-01-01") is None, "unknown person"
+
+
+def test_transcript_speaker_affiliation():
+    transcript_speaker_affiliation = TranscriptSpeakerAffiliation(multi_term_affiliation)
+    assert transcript_speaker_affiliation.assign_affiliation("Poseł Jan Nowak", when_txt="2020-01-01") == "W"
+    assert transcript_speaker_affiliation.assign_affiliation("Poseł Jan Nowak", when_txt="2024-10-05") == "Y"
+    assert transcript_speaker_affiliation.assign_affiliation("Poseł Anna Zielińska", when_txt="2020-01-01") == "B"
+    assert transcript_speaker_affiliation.assign_affiliation("Poseł Leopold Nowak", when_txt="2024-10-05") == "X"
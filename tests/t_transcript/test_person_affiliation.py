@@ -1,4 +1,5 @@
 import pytest
+from datetime import date
 
 from aipolit.transcript.person_affiliation import PersonAffiliation
 
@@ -62,3 +63,30 @@ def test_club_no_from_or_to():
     assert person.get_club(when="2023-10-01") == "X"
     assert person.get_club(when="2999-10-01") == "X"
     assert person.get_club(when="1222-10-01") == "X"
+
+
+@pytest.mark.parametrize("name,when_txt", [
+    ("Jan Nowak", "2024-01-01"),
+    ("Jan Nowak", "2024-10-05"),
+    ("Jan Nowak", "2024-11-01"),
+    ("Jan Smith", "2024-10-31"),
+    ("Jan Smith", "2024-11-01"),
+    ("Jan Kowalski", "2023-10-01"),
+    ("Jan Kropek", "1222-10-01"),
+])
+def test_club_for_date_obj(name, when_txt):
+    person = person_affiliation.get_person_by_name(name)
+    when = date.fromisoformat(when_txt)
+
+    assert person.get_club(when=when) == person.get_club(when=when_txt), f"date object and string should give the same club for {name} {when_txt}"
+    assert person.check_is_active(when=when) == person.check_is_active(when=when_txt)
+
+
+def test_club_recompiled_after_sort():
+    person = person_affiliation.get_person_by_name("Jan Nowak")
+    assert person.club_bounds is not None
+
+    person.sort_clubs()
+    assert person.club_bounds is None
+    assert person.get_club(when=date(2024, 10, 5)) == "Y"
+    assert person.club_bounds is not None
@@ -0,0 +1,53 @@
+import os
+import tempfile
+from aipolit.transcript.session_index import TranscriptSessionIndex
+from tests.t_transcript.test_utils import create_corpus_with_dates
+
+
+def test_session_index_build_and_find():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        create_corpus_with_dates(tmpdirname, ["2024-01-05", "2024-01-01", "2024-01-03"])
+        index_fp = os.path.join(tmpdirname, "index", "index.json")
+
+        index = TranscriptSessionIndex(tmpdirname, index_fp=index_fp)
+        assert index.update() == 3, "all files should be indexed"
+
+        entry = index.get_entry(os.path.join(tmpdirname, "transcript_00.xml"))
+        assert entry['session_date'] == "2024-01-05"
+        assert entry['session_no'] == 6
+        assert entry['speech_count'] == 318
+        assert entry['utt_counts'] == {'norm': 614, 'reaction': 266, 'interrupt': 223}
+        assert "Poseł Robert Telus" in entry['speakers']
+
+        found = index.find_filepaths(date_from="2024-01-02", date_to="2024-01-05")
+        assert [os.path.basename(fp) for fp in found] == ["transcript_00.xml", "transcript_02.xml"]
+
+        assert len(index.find_filepaths(speakers=["Poseł Robert Telus"])) == 3
+        assert len(index.find_filepaths(speakers=["Nieznany Mówca"])) == 0
+
+
+def test_session_index_incremental_update():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        create_corpus_with_dates(tmpdirname, ["2024-01-05", "2024-01-01"])
+        index_fp = os.path.join(tmpdirname, "index.json")
+        TranscriptSessionIndex(tmpdirname, index_fp=index_fp).update()
+
+        index = TranscriptSessionIndex(tmpdirname, index_fp=index_fp)
+        assert len(index.entries) == 2, "index should be loaded from file"
+        assert index.update() == 0, "nothing changed"
+
+        os.remove(os.path.join(tmpdirname, "transcript_01.xml"))
+        create_corpus_with_dates(tmpdirname, ["2024-01-07"])
+        assert index.update() == 1, "only changed file should be indexed again"
+        assert [e['session_date'] for _, e in sorted(index.entries.items())] == ["2024-01-07"]
+
+
+def test_session_index_update_without_save():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        create_corpus_with_dates(tmpdirname, ["2024-01-05", "2024-01-01"])
+        index_fp = os.path.join(tmpdirname, "index.json")
+
+        index = TranscriptSessionIndex(tmpdirname, index_fp=index_fp)
+        assert index.update(save=False) == 2
+        assert len(index.find_filepaths(date_from="2024-01-02")) == 1
+        assert not os.path.exists(index_fp), "index should be kept only in memory"
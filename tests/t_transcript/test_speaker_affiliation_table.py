@@ -0,0 +1,49 @@
+import pytest
+from datetime import date, timedelta
+from aipolit.transcript.transcript_speaker_affiliation import TranscriptSpeakerAffiliation
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from aipolit.transcript.person_affiliation import PersonAffiliation
+from aipolit.transcript.utils import load_transcripts
+
+
+sample_data_fp = "resources/test_data/political-affiliation/sejm.json"
+dummy_transcript_speaker_affiliation = TranscriptSpeakerAffiliation(PersonAffiliation(fixed_filepath=sample_data_fp))
+
+
+@pytest.mark.parametrize(
+    "speaker_name",
+    [
+        "Jan Kowalski",
+        "Poseł Jan Nowak",
+        "Jan Smith",
+        "Jan Kropek",
+        "Leopold Nowak",
+        "Jan Marian Kowalski",
+        "JanKowalski",
+        "Nieznany Mówca",
+    ])
+def test_table_same_as_assign_affiliation(speaker_name):
+    table = SpeakerAffiliationTable(dummy_transcript_speaker_affiliation)
+    table.add_speakers([speaker_name])
+
+    when = date(2023, 12, 1)
+    while when < date(2025, 2, 1):
+        expected = dummy_transcript_speaker_affiliation.assign_affiliation(speaker_name, when=when)
+        assert table.get_affiliation(speaker_name, when) == expected, f"{speaker_name} at {when}"
+        when += timedelta(days=1)
+
+    assert table.get_canon_name(speaker_name) == dummy_transcript_speaker_affiliation.normalize_name(speaker_name)
+
+
+def test_table_for_real_transcript():
+    transcript_speaker_affiliation = TranscriptSpeakerAffiliation(PersonAffiliation())
+    transcripts = load_transcripts(fixed_dir="resources/test_data/transcripts_sejm")
+    table = SpeakerAffiliationTable(transcript_speaker_affiliation)
+    table.add_transcripts(transcripts)
+
+    assert table.count() == len({s.speaker for t in transcripts for s in t.session_content})
+    for transcript in transcripts:
+        for when in [date(2024, 2, 21), date(2024, 6, 30), date(2025, 1, 1)]:
+            for session_speech in transcript.session_content:
+                expected = transcript_speaker_affiliation.assign_affiliation(session_speech.speaker, when=when)
+                assert table.get_affiliation(session_speech.speaker, when) == expected
@@ -0,0 +1,25 @@
+from aipolit.transcript.symbol_table import TranscriptSymbolTable
+from aipolit.transcript.utils import load_transcripts
+from aipolit.utils.string_pool import NO_ID
+
+
+sample_transcript_dir = "resources/test_data/transcripts_sejm"
+
+
+def test_symbol_table_add_transcripts():
+    transcripts = load_transcripts(fixed_dir=sample_transcript_dir)
+    symbol_table = TranscriptSymbolTable()
+    symbol_table.add_transcripts(transcripts)
+
+    speakers_count = len(symbol_table.speakers)
+    assert speakers_count > 0
+    assert "Poseł Robert Telus" in symbol_table.speakers
+    assert "Głos z sali" in symbol_table.speakers, "interrupting persons should be added too"
+
+    symbol_table.add_transcripts(transcripts)
+    assert len(symbol_table.speakers) == speakers_count, "ids are assigned only once"
+
+    telus_id = symbol_table.get_speaker_id("Poseł Robert Telus")
+    assert symbol_table.get_speaker(telus_id) == "Poseł Robert Telus"
+    assert symbol_table.get_canon_id(None) == NO_ID
+    assert symbol_table.get_club(symbol_table.get_club_id("PiS")) == "PiS"
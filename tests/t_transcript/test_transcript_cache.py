@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+from aipolit.transcript.transcript_cache import TranscriptCache
+from aipolit.transcript.utils import load_transcripts
+
+
+sample_transcript_fp = "resources/test_data/transcripts_sejm/sample_transcript_06_a_ksiazka.xml"
+
+
+def test_cache_hits_and_misses():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        xml_fp = os.path.join(tmpdirname, "transcript.xml")
+        shutil.copyfile(sample_transcript_fp, xml_fp)
+        cache = TranscriptCache(cache_dir=os.path.join(tmpdirname, "cache"))
+
+        assert cache.get(xml_fp) is None, "empty cache"
+        transcripts = load_transcripts(fixed_dir=tmpdirname, use_cache=True, cache_dir=cache.cache_dir)
+
+        cached = cache.get(xml_fp)
+        assert cached is not None, "transcript should be cached after load"
+        assert cached.session_date == transcripts[0].session_date
+        assert len(cached.session_content) == len(transcripts[0].session_content)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_invalidation():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        xml_fp = os.path.join(tmpdirname, "transcript.xml")
+        shutil.copyfile(sample_transcript_fp, xml_fp)
+        cache = TranscriptCache(cache_dir=os.path.join(tmpdirname, "cache"))
+        load_transcripts(fixed_dir=tmpdirname, use_cache=True, cache_dir=cache.cache_dir)
+
+        # only mtime changed - content hash is the same
+        stat = os.stat(xml_fp)
+        os.utime(xml_fp, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert cache.get(xml_fp) is not None, "touched file should be still taken from cache"
+
+        with open(xml_fp, "r") as f:
+            xml = f.read()
+        with open(xml_fp, "w") as f:
+            f.write(xml.replace("2024-02-21", "2024-02-22"))
+        assert cache.get(xml_fp) is None, "changed file should not be taken from cache"
+
+        transcripts = load_transcripts(fixed_dir=tmpdirname, use_cache=True, cache_dir=cache.cache_dir)
+        assert transcripts[0].session_date == "2024-02-22"
@@ -0,0 +1,127 @@
+import os
+import re
+import tempfile
+import pytest
+from aipolit.transcript.transcript_index import TranscriptIndex, tokenize_with_offsets
+from aipolit.transcript.utils import load_transcripts
+from aipolit.transcript.person_affiliation import PersonAffiliation
+from aipolit.transcript.transcript_speaker_affiliation import TranscriptSpeakerAffiliation
+from aipolit.transcript.speaker_affiliation_table import SpeakerAffiliationTable
+from hipisejm.stenparser.transcript_utils import get_speaker_for_utt, get_utt_text
+from tests.t_transcript.test_utils import create_corpus_with_dates
+
+
+sample_transcript_dir = "resources/test_data/transcripts_sejm"
+
+
+def scan_for_word(transcripts, word):
+    """
+    Returns hits of whole word (case insensitive) found by scanning transcripts with regex.
+    """
+    result = []
+    regex = re.compile(r"\b" + re.escape(word) + r"\b", flags=re.IGNORECASE)
+    for transcript in transcripts:
+        for speech_index, speech in enumerate(transcript.session_content):
+            for utt_index, utt in enumerate(speech.content):
+                for m in regex.finditer(get_utt_text(utt)):
+                    result.append((speech_index, utt_index, get_speaker_for_utt(utt, speech), m.start(), m.end()))
+    return result
+
+
+def hits_to_tuples(hits):
+    return [(h.speech_index, h.utt_index, h.speaker, h.start, h.end) for h in hits]
+
+
+def test_tokenize_with_offsets():
+    assert tokenize_with_offsets("Hańba!  Zdrada, panie Marszałku") == [
+        ('hańba', 0), ('zdrada', 8), ('panie', 16), ('marszałku', 22)]
+
+
+@pytest.mark.parametrize("word", ['książka', 'Oklaski', 'hańba', 'rząd', 'nieistniejące'])
+def test_search_word_same_as_scan(word):
+    transcripts = load_transcripts(fixed_dir=sample_transcript_dir)
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        transcript_index = TranscriptIndex(sample_transcript_dir, index_dir=os.path.join(tmpdirname, "index"))
+        assert transcript_index.update() is True
+
+        hits = transcript_index.search(word)
+        assert hits_to_tuples(hits) == scan_for_word(transcripts, word)
+        for hit in hits:
+            utt_text = transcript_index.get_utt_text(hit.utt_row)
+            assert utt_text[hit.start:hit.end].lower() == word.lower()
+            utt = transcripts[0].session_content[hit.speech_index].content[hit.utt_index]
+            assert utt_text == get_utt_text(utt)
+
+
+def test_search_phrase_and_filters():
+    transcripts = load_transcripts(fixed_dir=sample_transcript_dir)
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        transcript_index = TranscriptIndex(sample_transcript_dir, index_dir=os.path.join(tmpdirname, "index"))
+        transcript_index.update(loaded_transcripts={})
+
+        hits = transcript_index.search("Panie Marszałku! Wysoka Izbo")
+        assert len(hits) > 0
+        for hit in hits:
+            text = transcript_index.get_utt_text(hit.utt_row)
+            assert tokenize_with_offsets(text[hit.start:hit.end]) == tokenize_with_offsets("Panie Marszałku! Wysoka Izbo"), \
+                "case and punctuation between tokens are ignored"
+
+        assert len(transcript_index.search("Izbo Wysoka")) == 0, "order of phrase tokens matters"
+        assert len(transcript_index.search("")) == 0
+
+        all_hits = transcript_index.search("rolnictwa")
+        telus_hits = transcript_index.search("rolnictwa", speakers=["Poseł Robert Telus"])
+        assert 0 < len(telus_hits) < len(all_hits)
+        assert all(h.speaker == "Poseł Robert Telus" for h in telus_hits)
+        assert len(transcript_index.search("rolnictwa", limit=2)) == 2
+
+        speaker_affiliation_table = SpeakerAffiliationTable(TranscriptSpeakerAffiliation(PersonAffiliation()))
+        pis_hits = transcript_index.search("rolnictwa", affiliations=["PiS"], speaker_affiliation_table=speaker_affiliation_table)
+        assert hits_to_tuples(telus_hits)[0] in hits_to_tuples(pis_hits)
+        when = transcripts[0].session_date
+        for hit in pis_hits:
+            assert speaker_affiliation_table.get_affiliation(hit.speaker, when) == "PiS"
+
+        interrupt_hits = transcript_index.search("brawo", utt_types=['interrupt'])
+        assert len(interrupt_hits) > 0 and all(h.utt_type == 'interrupt' for h in interrupt_hits)
+
+
+def test_index_dates_and_update():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        corpus_dir = os.path.join(tmpdirname, "corpus")
+        os.makedirs(corpus_dir)
+        create_corpus_with_dates(corpus_dir, ["2024-01-05", "2024-01-01"])
+        index_dir = os.path.join(tmpdirname, "index")
+
+        transcript_index = TranscriptIndex(corpus_dir, index_dir=index_dir)
+        assert transcript_index.update() is True
+        single_session_count = len(transcript_index.search("rolnictwa")) // 2
+        assert len(transcript_index.search("rolnictwa", date_from="2024-01-02")) == single_session_count
+        assert {h.session_date for h in transcript_index.search("rolnictwa", date_to="2024-01-01")} == {"2024-01-01"}
+
+        reopened_index = TranscriptIndex(corpus_dir, index_dir=index_dir)
+        assert reopened_index.update() is False, "index is loaded from disk"
+        assert hits_to_tuples(reopened_index.search("rolnictwa")) == hits_to_tuples(transcript_index.search("rolnictwa"))
+
+        new_dir = os.path.join(tmpdirname, "new")
+        os.makedirs(new_dir)
+        create_corpus_with_dates(new_dir, ["2024-02-01"])
+        os.replace(os.path.join(new_dir, "transcript_00.xml"), os.path.join(corpus_dir, "transcript_99.xml"))
+        assert reopened_index.update() is True, "new file in the corpus"
+        assert len(reopened_index.search("rolnictwa")) == 3 * single_session_count
+
+
+def test_search_affiliations_without_date():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        corpus_dir = os.path.join(tmpdirname, "corpus")
+        os.makedirs(corpus_dir)
+        create_corpus_with_dates(corpus_dir, ["2024-02-21", ""])
+        transcript_index = TranscriptIndex(corpus_dir, index_dir=os.path.join(tmpdirname, "index"))
+        transcript_index.update()
+
+        speaker_affiliation_table = SpeakerAffiliationTable(TranscriptSpeakerAffiliation(PersonAffiliation()))
+        all_hits = transcript_index.search("rolnictwa")
+        pis_hits = transcript_index.search("rolnictwa", affiliations=["PiS"], speaker_affiliation_table=speaker_affiliation_table)
+        assert {h.session_date for h in all_hits} == {"2024-02-21", None}
+        assert len(pis_hits) > 0
+        assert {h.session_date for h in pis_hits} == {"2024-02-21"}, "affiliation is unknown without date"
@@ -0,0 +1,36 @@
+import os
+import tempfile
+from aipolit.preprocessors.lemmatizer import PLLemmatizer
+from aipolit.transcript.transcript_index import TranscriptIndex
+
+
+sample_transcript_dir = "resources/test_data/transcripts_sejm"
+
+
+def test_lemmatize_many_with_offsets():
+    lemmatizer = PLLemmatizer.get_instance()
+    texts = ["Ala ma kota!", "Kiedy byliśmy z Marcinem?"]
+    result = lemmatizer.lemmatize_many_with_offsets(texts)
+
+    assert [lemma for lemma, _, _ in result[0]] == ["ala", "mieć", "kot"], "punctuation is skipped"
+    for text, tokens in zip(texts, result):
+        for _, start, end in tokens:
+            assert text[start:end].strip() == text[start:end] and end > start
+    assert lemmatizer.lemmatize_many_with_offsets(texts, n_process=2) == result
+
+
+def test_search_lemmas():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        index_dir = os.path.join(tmpdirname, "index")
+        transcript_index = TranscriptIndex(sample_transcript_dir, index_dir=index_dir, with_lemmas=True)
+        assert transcript_index.update() is True
+
+        surface_hits = transcript_index.search("rolnictwa")
+        lemma_hits = transcript_index.search("rolnictwo", lemmas=True)
+        assert len(lemma_hits) > len(surface_hits), "all inflected forms should be found"
+        matched_forms = {transcript_index.get_utt_text(h.utt_row)[h.start:h.end].lower() for h in lemma_hits}
+        assert "rolnictwa" in matched_forms
+
+        reopened_index = TranscriptIndex(sample_transcript_dir, index_dir=index_dir)
+        assert reopened_index.update() is False, "lemmas are kept in the index"
+        assert len(reopened_index.search("rolnictwo", lemmas=True)) == len(lemma_hits)
@@ -1,5 +1,12 @@
+import os
+import gzip
+import json
+import tempfile
 import pytest
-from aipolit.transcript.transcript_query import TranscriptQuery
+from collections import Counter
+from aipolit.transcript.transcript_query import TranscriptQuery, NamedQuery, counter_to_ranking
+from aipolit.utils.output_sink import ListOutputSink, open_output_sink
+from tests.t_transcript.test_utils import create_corpus_with_dates
 
 
 sample_transcript_dir = "resources/test_data/transcripts_sejm"
@@ -27,3 +34,247 @@ def test_query_with_what(what_to_dump, expected_count, first_element, last_eleme
     assert len(dumped) == expected_count, f"{what_to_dump} expected_count = {expected_count} actual {len(dumped)}"
     assert dumped[0] == first_element, f"{what_to_dump} first element = {first_element}"
     assert dumped[-1] == last_element, f"{what_to_dump} last element = {last_element}"
+
+
+def test_streaming_query_same_as_loaded():
+    streaming_transcript_query = TranscriptQuery(
+        fixed_transcript_dir=sample_transcript_dir,
+        streaming=True)
+    assert streaming_transcript_query.count_transcripts() == 1
+
+    for what_to_dump in ['speech_speaker', 'utt']:
+        dumped = []
+        transcript_query.query(what_to_dump=what_to_dump, to_list=dumped)
+        streaming_dumped = []
+        streaming_transcript_query.query(what_to_dump=what_to_dump, to_list=streaming_dumped)
+        assert streaming_dumped == dumped
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_query_with_date_and_speakers(streaming):
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        corpus_dir = os.path.join(tmpdirname, "corpus")
+        os.makedirs(corpus_dir)
+        create_corpus_with_dates(corpus_dir, ["2024-01-05", "2024-01-01", "2024-01-03"])
+        dated_transcript_query = TranscriptQuery(
+            fixed_transcript_dir=corpus_dir,
+            streaming=streaming,
+            session_index_fp=os.path.join(tmpdirname, "index.json"))
+
+        dumped = []
+        dated_transcript_query.query(what_to_dump='speech_speaker', to_list=dumped, date_from="2024-01-02")
+        assert len(dumped) == 2 * 318, "only two sessions match dates"
+
+        dumped = []
+        dated_transcript_query.query(what_to_dump='speech_speaker', to_list=dumped, date_to="2024-01-01", speakers=["Poseł Robert Telus"])
+        assert dumped == ["Poseł Robert Telus"] * 4, "only speeches of given speaker from single session"
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_session_index_saved_only_in_streaming_mode(streaming, monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        cache_dir = os.path.join(tmpdirname, "cache")
+        monkeypatch.setattr("aipolit.transcript.session_index.AIPOLIT_CACHE_DIR", cache_dir)
+        corpus_dir = os.path.join(tmpdirname, "corpus")
+        os.makedirs(corpus_dir)
+        create_corpus_with_dates(corpus_dir, ["2024-01-05", "2024-01-01"])
+        dated_transcript_query = TranscriptQuery(fixed_transcript_dir=corpus_dir, streaming=streaming)
+
+        dumped = []
+        dated_transcript_query.query(what_to_dump='speech_speaker', to_list=dumped, date_from="2024-01-02")
+        assert len(dumped) == 318
+        assert os.path.isfile(dated_transcript_query.get_session_index().index_fp) == streaming
+        assert os.path.isdir(cache_dir) == streaming
+
+
+@pytest.mark.parametrize(
+    "what_to_dump, query_params",
+    [
+        (['speech_speaker'], {}),
+        (['utt'], {}),
+        (['speech_speaker', 'utt_interrupt_by', 'utt_interrupt'], {}),
+        (['utt_norm', 'utt_reaction'], {'restrict_speaker_affiliations': ['KO', 'PiS']}),
+        (['speech_speaker', 'utt_norm'], {'speakers': ['Poseł Robert Telus', 'Marszałek Szymon Hołownia']}),
+        (['speech_speaker'], {'restrict_speaker_affiliations': []}),
+    ])
+def test_columnar_query_same_as_loaded(what_to_dump, query_params):
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        loaded_transcript_query = TranscriptQuery(
+            fixed_transcript_dir=sample_transcript_dir,
+            session_index_fp=os.path.join(tmpdirname, "session_index.json"))
+        columnar_transcript_query = TranscriptQuery(
+            fixed_transcript_dir=sample_transcript_dir,
+            session_index_fp=os.path.join(tmpdirname, "columnar_session_index.json"),
+            columnar=True)
+
+        dumped = []
+        loaded_transcript_query.query(what_to_dump=what_to_dump, to_list=dumped, **query_params)
+        columnar_dumped = []
+        columnar_transcript_query.query(what_to_dump=what_to_dump, to_list=columnar_dumped, **query_params)
+        assert columnar_dumped == dumped
+
+
+def test_columnar_query_with_dates():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        corpus_dir = os.path.join(tmpdirname, "corpus")
+        os.makedirs(corpus_dir)
+        create_corpus_with_dates(corpus_dir, ["2024-01-05", "2024-01-01", "2024-01-03"])
+        dated_transcript_query = TranscriptQuery(
+            fixed_transcript_dir=corpus_dir,
+            columnar=True)
+
+        dumped = []
+        dated_transcript_query.query(what_to_dump='speech_speaker', to_list=dumped, date_from="2024-01-02")
+        assert len(dumped) == 2 * 318, "only two sessions match dates"
+
+        dumped = []
+        dated_transcript_query.query(what_to_dump='speech_speaker', to_list=dumped, date_to="2024-01-01", speakers=["Poseł Robert Telus"])
+        assert dumped == ["Poseł Robert Telus"] * 4, "only speeches of given speaker from single session"
+
+
+def test_query_to_filehandle_same_as_list():
+    dumped = []
+    transcript_query.query(what_to_dump=['speech_speaker', 'utt'], to_list=dumped)
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        fp = os.path.join(tmpdirname, "dump.txt")
+        with open(fp, "w") as f:
+            transcript_query.query(what_to_dump=['speech_speaker', 'utt'], to_filehandle=f)
+            assert f.tell() > 0, "buffer is flushed at the end of the query"
+        with open(fp, "r") as f:
+            assert f.read() == "".join(f"{txt}\n" for txt in dumped)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_query_with_meta(columnar):
+    query = TranscriptQuery(fixed_transcript_dir=sample_transcript_dir, columnar=columnar)
+    what_to_dump = ['speech_speaker', 'utt', 'utt_interrupt_by']
+
+    dumped = []
+    query.query(what_to_dump=what_to_dump, to_list=dumped)
+    records = []
+    query.query(what_to_dump=what_to_dump, to_sink=ListOutputSink(records, with_meta=True))
+
+    assert [r['text'] for r in records] == dumped
+    assert {r['date'] for r in records} == {'2024-02-21'}
+    assert {r['dumped_as'] for r in records} == {'speech_speaker', 'utt_norm', 'utt_reaction', 'utt_interrupt', 'utt_interrupt_by'}
+    assert all(r['speaker'] is None and r['affiliation'] is None for r in records if r['dumped_as'] == 'utt_reaction')
+    assert all(r['text'] == r['speaker'] for r in records if r['dumped_as'] in {'speech_speaker', 'utt_interrupt_by'})
+    assert any(r['affiliation'] == 'KO' for r in records if r['dumped_as'] == 'utt_norm')
+
+
+def test_columnar_query_with_meta_same_as_loaded():
+    columnar_transcript_query = TranscriptQuery(fixed_transcript_dir=sample_transcript_dir, columnar=True)
+    query_params = {'what_to_dump': ['speech_speaker', 'utt', 'utt_interrupt_by'], 'restrict_speaker_affiliations': ['KO', 'PiS']}
+
+    records = []
+    transcript_query.query(to_sink=ListOutputSink(records, with_meta=True), **query_params)
+    columnar_records = []
+    columnar_transcript_query.query(to_sink=ListOutputSink(columnar_records, with_meta=True), **query_params)
+    assert columnar_records == records
+
+
+def test_query_to_compressed_jsonl():
+    dumped = []
+    transcript_query.query(what_to_dump='utt_interrupt', to_list=dumped)
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        fp = os.path.join(tmpdirname, "dump.jsonl.gz")
+        with open_output_sink(fp, jsonl=True, buffer_lines=10) as out_sink:
+            transcript_query.query(what_to_dump='utt_interrupt', to_sink=out_sink)
+        with gzip.open(fp, "rt", encoding='utf8') as f:
+            records = [json.loads(line) for line in f]
+    assert [r['text'] for r in records] == dumped
+    assert all(r['dumped_as'] == 'utt_interrupt' for r in records)
+
+
+batch_queries_params = [
+    ('speakers', {'what_to_dump': 'speech_speaker'}),
+    ('interrupt_by', {'what_to_dump': ['utt_interrupt_by']}),
+    ('ko_pis_utts', {'what_to_dump': ['utt_norm', 'utt_reaction'], 'restrict_speaker_affiliations': ['KO', 'PiS']}),
+    ('ko_speakers', {'what_to_dump': ['speech_speaker'], 'restrict_speaker_affiliations': ['KO']}),
+    ('telus', {'what_to_dump': ['speech_speaker', 'utt'], 'speakers': ['Poseł Robert Telus']}),
+    ('from_2024_01_02', {'what_to_dump': ['speech_speaker'], 'date_from': '2024-01-02'}),
+]
+
+
+@pytest.mark.parametrize("query_params", [{}, {'streaming': True}, {'columnar': True}])
+def test_query_many_same_as_separate_queries(query_params):
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        corpus_dir = os.path.join(tmpdirname, "corpus")
+        os.makedirs(corpus_dir)
+        create_corpus_with_dates(corpus_dir, ["2024-01-03", "2024-01-01", "2024-01-02"])
+        query = TranscriptQuery(
+            fixed_transcript_dir=corpus_dir,
+            session_index_fp=os.path.join(tmpdirname, "session_index.json"),
+            **query_params)
+
+        name_to_dumped = {name: [] for name, _ in batch_queries_params}
+        query.query_many([NamedQuery(name, to_list=name_to_dumped[name], **params) for name, params in batch_queries_params])
+
+        for name, params in batch_queries_params:
+            dumped = []
+            query.query(to_list=dumped, **params)
+            assert len(dumped) > 0
+            assert name_to_dumped[name] == dumped, f"batch query {name} same as separate query"
+
+
+@pytest.mark.parametrize("query_params", [{}, {'streaming': True}, {'columnar': True}])
+@pytest.mark.parametrize(
+    "what_to_dump, criteria",
+    [
+        (['utt_interrupt_by'], {}),
+        (['speech_speaker', 'utt'], {}),
+        (['utt_norm', 'utt_reaction'], {'restrict_speaker_affiliations': ['KO', 'PiS']}),
+        (['speech_speaker', 'utt_interrupt'], {'speakers': ['Poseł Robert Telus', 'Marszałek Szymon Hołownia']}),
+    ])
+def test_aggregate_same_as_counted_dump(query_params, what_to_dump, criteria):
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        query = TranscriptQuery(
+            fixed_transcript_dir=sample_transcript_dir,
+            session_index_fp=os.path.join(tmpdirname, "session_index.json"),
+            **query_params)
+        records = []
+        query.query(what_to_dump=what_to_dump, to_sink=ListOutputSink(records, with_meta=True), **criteria)
+
+        assert query.aggregate(what_to_dump, ['text'], **criteria) == Counter((r['text'],) for r in records)
+        assert query.aggregate(what_to_dump, ['dumped_as', 'speaker', 'affiliation'], **criteria) == Counter(
+            (r['dumped_as'], r['speaker'], r['affiliation']) for r in records)
+        assert query.aggregate(what_to_dump, ['month', 'date', 'session'], **criteria) == Counter(
+            {('2024-02', '2024-02-21', 'sample_transcript_06_a_ksiazka.xml'): len(records)})
+        assert query.aggregate(what_to_dump, ['canon_name'], **criteria) == Counter(
+            (query.speaker_affiliation_table.get_canon_name(r['speaker']) if r['speaker'] is not None else None,) for r in records)
+
+
+def test_aggregate_streaming_with_dates():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        corpus_dir = os.path.join(tmpdirname, "corpus")
+        os.makedirs(corpus_dir)
+        create_corpus_with_dates(corpus_dir, ["2024-01-05", "2024-02-01", "2024-01-03"])
+        query = TranscriptQuery(
+            fixed_transcript_dir=corpus_dir,
+            session_index_fp=os.path.join(tmpdirname, "session_index.json"),
+            streaming=True)
+
+        assert query.aggregate('speech_speaker', ['month']) == Counter({('2024-01',): 2 * 318, ('2024-02',): 318})
+        assert query.aggregate('speech_speaker', 'month', date_to='2024-01-04') == Counter({('2024-01',): 318})
+
+
+def test_counter_to_ranking():
+    counter = Counter({('b', 'KO'): 3, ('a', None): 3, ('c', 'PiS'): 5, ('d', 'KO'): 1})
+    assert counter_to_ranking(counter) == [['c', 'PiS', 5], ['a', None, 3], ['b', 'KO', 3], ['d', 'KO', 1]]
+    assert counter_to_ranking(counter, top_n=2) == [['c', 'PiS', 5], ['a', None, 3]]
+
+
+def test_query_with_affiliation_snapshot():
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_transcript_query = TranscriptQuery(
+            fixed_transcript_dir=sample_transcript_dir,
+            use_snapshot=True,
+            snapshot_cache_dir=snapshot_dir)
+        assert len(os.listdir(snapshot_dir)) == 1
+
+        result = []
+        snapshot_transcript_query.query('utt', to_list=result, restrict_speaker_affiliations=['PiS'])
+        expected = []
+        transcript_query.query('utt', to_list=expected, restrict_speaker_affiliations=['PiS'])
+        assert len(result) > 0
+        assert result == expected
@@ -50,6 +50,9 @@ def test_dummy_affiliation_no_club(input_text, input_date_txt):
         ("Poseł Jan Kowalski", "2024-12-31", "X"),
         ("Marszałek Sejmu Jan Kowalski", "2024-12-31", "X"),
         ("Przedstawiciel wnioskodawców inicjatywy ustawodawczej społecznego komitetu Odnowa Jan Kowalski", "2024-12-31", "X"),
+        ("Poseł Leopold Nowak", "2024-12-31", "X"),
+        ("Poseł Jan Marian Kowalski", "2024-12-31", "X"),
+        ("Anna-Jan Kowalski", "2024-12-31", "X"),
     ])
 def test_dummy_affiliation_with_prefix(input_text, input_date_txt, expected_text):
     actual_affiliation = dummy_transcript_speaker_affiliation.assign_affiliation(
@@ -1,7 +1,10 @@
 import pytest
-from aipolit.transcript.transcript_speaker_affiliation import TranscriptSpeakerAffiliation
+from aipolit.transcript.transcript_speaker_affiliation import TranscriptSpeakerAffiliation, iter_affiliation_batches
 from aipolit.transcript.person_affiliation import PersonAffiliation
 from aipolit.transcript.utils import load_transcripts
+from aipolit.transcript.columnar_store import ColumnarTranscriptStore
+from aipolit.transcript.symbol_table import TranscriptSymbolTable
+from hipisejm.stenparser.transcript import SessionTranscript, SessionSpeech
 
 
 sample_transcript_dir = "resources/test_data/transcripts_sejm"
@@ -44,3 +47,71 @@ def test_create_affiliation_to_utts_from_transcripts_with_only_process_parties()
 
     for party in ['PL2050', 'Konfederacja', 'Lewica', 'PSL']:
         assert party not in affiliation_to_entries, f"Party {party} should NOT be returned in affiliation_to_entries"
+
+
+@pytest.mark.parametrize("only_process_parties", [None, ['KO', 'PiS'], []])
+def test_create_affiliation_to_utts_from_store_same_as_from_transcripts(only_process_parties):
+    transcipts = load_transcripts(fixed_dir=sample_transcript_dir)
+    store = ColumnarTranscriptStore.from_transcripts(transcipts)
+
+    expected = transcript_speaker_affiliation.create_affiliation_to_utts_from_transcripts(
+        transcipts, only_process_parties=only_process_parties, symbol_table=store.symbol_table)
+    actual = transcript_speaker_affiliation.create_affiliation_to_utts_from_store(store, only_process_parties=only_process_parties)
+    assert actual == expected, "store version should return the same entries"
+
+
+def test_create_affiliation_to_utts_with_symbol_table():
+    transcipts = load_transcripts(fixed_dir=sample_transcript_dir)
+    symbol_table = TranscriptSymbolTable()
+    affiliation_to_entries = transcript_speaker_affiliation.create_affiliation_to_utts_from_transcripts(transcipts, symbol_table=symbol_table)
+    plain_affiliation_to_entries = transcript_speaker_affiliation.create_affiliation_to_utts_from_transcripts(transcipts)
+
+    for affiliation, entries in affiliation_to_entries.items():
+        assert len(entries) == len(plain_affiliation_to_entries[affiliation])
+        for entry, plain_entry in zip(entries, plain_affiliation_to_entries[affiliation]):
+            assert {k: entry[k] for k in plain_entry} == plain_entry, "the same entry, but with ids"
+            assert symbol_table.get_speaker(entry['speaker_id']) == entry['speaker_name']
+            assert symbol_table.get_canon_name(entry['canon_id']) == entry['canon_name']
+            assert symbol_table.get_club(entry['affiliation_id']) == affiliation
+
+    pis_entries = affiliation_to_entries['PiS']
+    telus_entries = [e for e in pis_entries if e['canon_name'] == 'Robert Telus']
+    assert len({e['canon_id'] for e in telus_entries}) == 1
+    assert len({id(e['canon_name']) for e in telus_entries}) == 1, "canon name string is shared by entries"
+
+
+def test_iter_affiliation_utts_same_as_dict():
+    transcripts = load_transcripts(fixed_dir=sample_transcript_dir)
+    affiliation_to_entries = transcript_speaker_affiliation.create_affiliation_to_utts_from_transcripts(transcripts)
+
+    entries = list(transcript_speaker_affiliation.iter_affiliation_utts_from_transcripts(iter(transcripts)))
+    assert sum(len(v) for v in affiliation_to_entries.values()) == len(entries)
+    for affiliation, affiliation_entries in affiliation_to_entries.items():
+        assert [e for e in entries if e['affiliation'] == affiliation] == affiliation_entries
+
+    store = ColumnarTranscriptStore.from_transcripts(transcripts)
+    assert [{k: e[k] for k in ['speaker_name', 'utts_raw']} for e in transcript_speaker_affiliation.iter_affiliation_utts_from_store(store)] == [
+        {k: e[k] for k in ['speaker_name', 'utts_raw']} for e in entries]
+
+
+def test_iter_affiliation_utts_merges_speeches_split_by_marszalek():
+    transcript = SessionTranscript()
+    transcript.session_date = "2024-02-21"
+    for i, speaker in enumerate(["Poseł Robert Telus", "Marszałek Szymon Hołownia"] * 3 + ["Poseł Kamila Gasiuk-Pihowicz"]):
+        speech = SessionSpeech(speaker)
+        speech.content = [f"Zdanie  {i}.", f"Drugie\nzdanie {i}."]
+        transcript.session_content.append(speech)
+
+    entries = list(transcript_speaker_affiliation.iter_affiliation_utts_from_transcripts([transcript]))
+    assert [e['speaker_name'] for e in entries] == ["Poseł Robert Telus", "Poseł Kamila Gasiuk-Pihowicz"]
+    assert entries[0]['utts_raw'] == "Zdanie 0. Drugie zdanie 0. Zdanie 2. Drugie zdanie 2. Zdanie 4. Drugie zdanie 4.", "merged, whitespaces normalized"
+    assert entries[1]['utts_raw'] == "Zdanie 6. Drugie zdanie 6."
+
+    store = ColumnarTranscriptStore.from_transcripts([transcript])
+    assert [e['utts_raw'] for e in transcript_speaker_affiliation.iter_affiliation_utts_from_store(store)] == [e['utts_raw'] for e in entries]
+
+
+def test_iter_affiliation_batches():
+    entries = [{'affiliation': a, 'i': i} for i, a in enumerate(['KO', 'PiS', 'KO', 'KO', 'PiS', 'Lewica', 'KO'])]
+    batches = [(affiliation, [e['i'] for e in batch]) for affiliation, batch in iter_affiliation_batches(iter(entries), 2)]
+    assert batches == [('KO', [0, 2]), ('PiS', [1, 4]), ('KO', [3, 6]), ('Lewica', [5])]
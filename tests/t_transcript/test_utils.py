@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import datetime
+import pytest
+from aipolit.transcript.utils import load_transcripts, list_transcript_filepaths, iter_transcripts, read_transcript_session_date
+
+
+sample_transcript_dir = "resources/test_data/transcripts_sejm"
+sample_transcript_fp = "resources/test_data/transcripts_sejm/sample_transcript_06_a_ksiazka.xml"
+
+
+def create_corpus_with_dates(target_dir, dates):
+    with open(sample_transcript_fp, "r") as f:
+        sample_xml = f.read()
+
+    for i, date_txt in enumerate(dates):
+        xml = sample_xml.replace("<session_date>2024-02-21</session_date>", f"<session_date>{date_txt}</session_date>")
+        with open(os.path.join(target_dir, f"transcript_{i:02d}.xml"), "w") as f:
+            f.write(xml)
+
+
+def test_list_transcript_filepaths():
+    filepaths = list_transcript_filepaths(sample_transcript_dir)
+    assert filepaths == [sample_transcript_fp]
+
+
+def test_load_transcripts_parallel_same_as_serial():
+    dates = ["2024-01-05", "2024-01-01", "2024-01-03", "2024-01-02"]
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        create_corpus_with_dates(tmpdirname, dates)
+        # not xml files should be ignored
+        shutil.copyfile(sample_transcript_fp, os.path.join(tmpdirname, "ignored.txt"))
+
+        serial = load_transcripts(fixed_dir=tmpdirname)
+        parallel = load_transcripts(fixed_dir=tmpdirname, workers=2)
+
+    assert [t.session_date for t in serial] == dates, "serial transcripts sorted by filename"
+    assert [t.session_date for t in parallel] == dates, "parallel transcripts sorted by filename"
+    assert [len(t.session_content) for t in parallel] == [len(t.session_content) for t in serial]
+
+
+@pytest.mark.parametrize(
+    "filters, expected_dates",
+    [
+        ({}, ["2024-01-05", "2024-01-01", "2024-01-03", "2024-01-02"]),
+        ({'date_from': "2024-01-02"}, ["2024-01-05", "2024-01-03", "2024-01-02"]),
+        ({'date_to': "2024-01-02"}, ["2024-01-01", "2024-01-02"]),
+        ({'date_from': datetime.date(2024, 1, 2), 'date_to': datetime.date(2024, 1, 3)}, ["2024-01-03", "2024-01-02"]),
+        ({'filename_regex': r"_0[01]\.xml$"}, ["2024-01-05", "2024-01-01"]),
+        ({'filename_regex': r"_0[01]\.xml$", 'date_from': "2024-01-02"}, ["2024-01-05"]),
+    ])
+def test_iter_transcripts_with_filters(filters, expected_dates):
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        create_corpus_with_dates(tmpdirname, ["2024-01-05", "2024-01-01", "2024-01-03", "2024-01-02"])
+        actual_dates = [t.session_date for t in iter_transcripts(fixed_dir=tmpdirname, **filters)]
+    assert actual_dates == expected_dates
+
+
+def test_read_transcript_session_date():
+    assert read_transcript_session_date(sample_transcript_fp) == "2024-02-21"
@@ -1,5 +1,9 @@
+import os
+import re
+import tempfile
+import pytest
 from hipisejm.stenparser.transcript import SpeechReaction, SpeechInterruption
-from aipolit.transcript.utt_sentence_splitter import UttSentenceSplitter
+from aipolit.transcript.utt_sentence_splitter import UttSentenceSplitter, align_sentences_to_text
 
 
 splitter = UttSentenceSplitter()
@@ -76,3 +80,84 @@ def test_sample_utt_split_reaction():
 
     assert actual_result_indexes == [
         0, 9], "test sample utt with reaction (sentence index)"
+
+
+@pytest.mark.parametrize(
+    "tested_text",
+    [
+        'To jest pkt. 1. To jest pkt.2. A to jest trzecie!',
+        '  To  jest   zdanie.   A to   drugie!  ',
+        'Pierwsze zdanie.\nDrugie zdanie. \n Trzecie?',
+        'Hańba!Hańba!Hańba!',
+        '',
+    ])
+def test_split_string_the_same_as_sentence_splitter(tested_text):
+    expected = splitter.splitter.split(text=tested_text)
+    assert splitter.split_string_to_sentences(tested_text) == expected
+
+    spans = align_sentences_to_text(tested_text, expected)
+    assert len(spans) == len(expected)
+    for (start, end), sentence in zip(spans, expected):
+        assert re.sub(' +', ' ', tested_text[start:end]) == sentence
+
+
+def test_split_many():
+    utts = [
+        'To jest pkt. 1. To jest pkt.2. A to jest trzecie!',
+        SpeechInterruption('Anna Nowak', 'Hańba! Hańba! Hańba!'),
+        SpeechReaction('Oklaski. Śmiech na sali.'),
+    ]
+    actual = splitter.split_many(utts)
+    assert actual == [splitter.split_utt_to_sentences(utt) for utt in utts]
+
+
+def test_split_with_cache():
+    utts = [
+        'To jest pkt. 1. To jest pkt.2. A to jest trzecie!',
+        '  To  jest   zdanie.   A to   drugie!  ',
+        SpeechReaction('Oklaski. Śmiech na sali.'),
+        'To jest pkt. 1. To jest pkt.2. A to jest trzecie!',
+    ]
+    expected = [splitter.split_utt_to_sentences(utt) for utt in utts]
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        cache_fp = os.path.join(tmpdirname, "spans.sqlite")
+        cached_splitter = UttSentenceSplitter(use_cache=True, cache_fp=cache_fp)
+        assert cached_splitter.split_many(utts) == expected
+
+        # all texts are in cache now, so segmentation should not be run at all
+        other_splitter = UttSentenceSplitter(use_cache=True, cache_fp=cache_fp)
+        other_splitter.splitter = None
+        assert other_splitter.split_many(utts) == expected
+        assert other_splitter.split_utt_to_sentences(utts[1]) == expected[1]
+
+        other_splitter.cache_connection.close()
+        cached_splitter.cache_connection.close()
+
+
+@pytest.mark.parametrize(
+    "tested_text, expected_spans",
+    [
+        ('To jest pkt. 1. To jest pkt.2. A to jest trzecie!', [(0, 15), (16, 30), (31, 49)]),
+        ('  To  jest zdanie.   A to   drugie!  ', [(2, 18), (21, 35)]),
+        ('Pierwsze.\nDrugie. \n Trzecie?', [(0, 9), (10, 17), (20, 28)]),
+        ('', []),
+    ])
+def test_split_string_to_spans(tested_text, expected_spans):
+    assert splitter.split_string_to_spans(tested_text) == expected_spans
+    assert splitter.spans_to_sentences(tested_text, expected_spans) == splitter.split_string_to_sentences(tested_text)
+
+
+def test_split_many_to_spans():
+    utts = [
+        'To jest pkt. 1. To jest pkt.2. A to jest trzecie!',
+        SpeechReaction('Oklaski.  Śmiech na sali.'),
+    ]
+    assert splitter.split_many_to_spans(utts) == [[(0, 15), (16, 30), (31, 49)], [(0, 8), (10, 25)]]
+
+
+def test_estimate_start_index_for_not_normalized_spaces():
+    tested_utt = 'Pierwsze  zdanie.  Drugie   zdanie.'
+    sentences = splitter.split_utt_to_sentences(tested_utt)
+    assert sentences == ['Pierwsze zdanie.', 'Drugie zdanie.']
+    assert splitter.estimate_start_index_of_each_sentence_matching(tested_utt, sentences) == [0, 19]
@@ -0,0 +1,157 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pytest
+from aipolit.ttdata.polit_tweets_data import PolitTweetsData
+from aipolit.ttdata.polit_tweets_filter import PolitTweetsFilter
+from aipolit.ttdata.tweet_criteria import ClubCriterion, DateRangeCriterion
+
+
+sample_tweets_fp = "resources/test_data/sample_polit_tweets.tsv"
+sample_users_fp = "resources/test_data/sample_tt_users.tsv"
+
+
+def load_data(columnar):
+    data = PolitTweetsData(columnar=columnar)
+    data.load_data(sample_tweets_fp, sample_users_fp)
+    return data
+
+
+def test_columnar_load():
+    data = load_data(columnar=True)
+    assert data.count() == 3, "tweet of other_user should be removed"
+
+    frame = data.tweets_frame
+    assert str(frame['username'].dtype) == 'category'
+    assert str(frame['club'].dtype) == 'category'
+    assert str(frame['party'].dtype) == 'category'
+    assert np.issubdtype(frame['datetime'].dtype, np.datetime64)
+
+    assert frame['username'].tolist() == ['test_user', 'test_user2', 'test_user3']
+    assert frame['club'].tolist() == ['X', 'Y', 'X']
+    assert frame['party'].tolist() == ['PX', 'PY', 'PX2']
+    assert frame['tweet_id'].tolist()[0] == "1234567890123456789"
+    assert frame['text'].tolist()[1] == "krótki"
+    assert frame['raw_text'].tolist()[1] == "@jan_kowalski @Nowak_2 krótki"
+
+
+def add_edge_cases(input_fp, output_fp, edge_case):
+    with open(input_fp, "r") as f:
+        lines = f.read().splitlines()
+
+    if edge_case == "extra_field":
+        lines[3] += "\textra"
+    elif edge_case == "extra_field_in_first_row":
+        lines[1] += "\textra"
+    elif edge_case == "trailing_whitespace":
+        lines = [line + " \t " for line in lines]
+    elif edge_case == "short_row":
+        # datetime is moved before text, so only text is missing in the short row
+        lines = ["\t".join([t[0], t[1], t[3], t[2]]) for t in (line.split("\t") for line in lines)]
+        lines[3] = "\t".join(lines[3].split("\t")[:3])
+    elif edge_case == "none_value":
+        lines[3] = lines[3].replace("1234567890123456791", "N/A")
+
+    with open(output_fp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+@pytest.mark.parametrize(
+    "edge_case",
+    [None, "extra_field", "extra_field_in_first_row", "trailing_whitespace", "short_row", "none_value"])
+def test_columnar_the_same_as_list(edge_case):
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        tweets_fp = os.path.join(tmpdirname, "tweets.tsv")
+        add_edge_cases(sample_tweets_fp, tweets_fp, edge_case)
+
+        data = PolitTweetsData(columnar=False)
+        data.load_data(tweets_fp, sample_users_fp)
+        columnar_data = PolitTweetsData(columnar=True)
+        columnar_data.load_data(tweets_fp, sample_users_fp)
+        assert columnar_data.count() == data.count() == 3
+        assert columnar_data.get_tweets_columns() == data.get_tweets_columns()
+
+        for key in data.get_tweets_columns():
+            values = [e[key] for e in data.tweets_data]
+            columnar_values = columnar_data.tweets_frame[key].astype(object).tolist()
+            if key == 'datetime':
+                columnar_values = [v.to_pydatetime() for v in columnar_data.tweets_frame[key]]
+            else:
+                columnar_values = [None if pd.isna(v) else v for v in columnar_values]
+            assert columnar_values == values, key
+
+        outputs = []
+        for ttdata in [data, columnar_data]:
+            output_fp = os.path.join(tmpdirname, f"output_{ttdata.columnar}.tsv")
+            PolitTweetsFilter(ttdata).dump_to_file(output_fp)
+            with open(output_fp, "r") as f:
+                outputs.append(f.read())
+        assert outputs[0] == outputs[1]
+
+
+def test_filter_columnar():
+    columnar_data = load_data(columnar=True)
+    ttfilter = PolitTweetsFilter(columnar_data)
+    assert ttfilter.filter_mask().tolist() == [True, True, True]
+
+    ttfilter.min_char_length = 10
+    assert ttfilter.filter_mask().tolist() == [True, False, True]
+
+    ttfilter.fixed_club = "X"
+    assert ttfilter.filter_data()['tweet_id'].tolist() == ["1234567890123456789", "1234567890123456792"]
+
+    ttfilter.min_char_length = None
+    ttfilter.fixed_club = "Y"
+    assert ttfilter.filter_data()['username'].tolist() == ['test_user2']
+
+
+def test_dump_columnar_the_same_as_list():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        outputs = []
+        for columnar in [False, True]:
+            ttfilter = PolitTweetsFilter(load_data(columnar=columnar))
+            ttfilter.min_char_length = 10
+            output_fp = os.path.join(tmpdirname, f"output_{columnar}.tsv")
+            ttfilter.dump_to_file(output_fp)
+            with open(output_fp, "r") as f:
+                outputs.append(f.read())
+
+        assert outputs[0] == outputs[1]
+        assert len(outputs[0].splitlines()) == 3
+
+
+def test_filter_criteria_and_stats():
+    for columnar in [False, True]:
+        ttfilter = PolitTweetsFilter(load_data(columnar=columnar), criteria=[ClubCriterion(["X"])])
+        ttfilter.add_criterion(DateRangeCriterion(date_from="2022-01-02"))
+        filtered_data = ttfilter.filter_data()
+        assert len(filtered_data) == 1
+        assert [s['selected'] for s in ttfilter.stats] == [2, 2]
+        assert [s['selected_cumulative'] for s in ttfilter.stats] == [2, 1]
+        assert ttfilter.stats[0]['selectivity'] == pytest.approx(2 / 3)
+
+
+def test_list_mode_by_default():
+    data = PolitTweetsData()
+    data.load_data(sample_tweets_fp, sample_users_fp)
+    assert not data.columnar
+    assert data.count() == len(data.tweets_data) == 3
+    assert data.tweets_frame is None
+    assert isinstance(PolitTweetsFilter(data).filter_data(), list)
+
+
+def test_list_mode_columns_converted_once():
+    data = load_data(columnar=False)
+    ttfilter = PolitTweetsFilter(data, criteria=[ClubCriterion(["X"])])
+    assert ttfilter.filter_mask().tolist() == [True, False, True]
+    assert sorted(data.converted_columns) == ['club']
+    club_column = data.converted_columns['club']
+
+    ttfilter.add_criterion(DateRangeCriterion(date_from="2022-01-02"))
+    assert ttfilter.filter_mask().tolist() == [False, False, True]
+    assert sorted(data.converted_columns) == ['club', 'datetime']
+    assert data.converted_columns['club'] is club_column, "converted column should be reused"
+
+    data.load_data(sample_tweets_fp, sample_users_fp)
+    assert len(data.converted_columns) == 0, "converted columns should be dropped with old data"
@@ -0,0 +1,75 @@
+import datetime
+import pytest
+import pandas as pd
+from aipolit.ttdata.tweet_criteria import DateRangeCriterion, ClubCriterion, PartyCriterion, LengthCriterion, \
+    RegexCriterion, HashtagCriterion, MentionCriterion, LanguageCriterion, AllCriteria, AnyCriteria, NotCriterion, \
+    detect_language_column
+
+
+frame = pd.DataFrame({
+    'username': pd.Categorical(['u1', 'u2', 'u3', 'u1']),
+    'club': pd.Categorical(['X', 'Y', None, 'X']),
+    'party': pd.Categorical(['PX', 'PY', 'PZ', 'PX']),
+    'datetime': pd.Series([
+        datetime.datetime(2022, 1, 1, 12, 0, 0),
+        datetime.datetime(2022, 1, 31, 23, 59, 59),
+        datetime.datetime(2022, 2, 1, 0, 0, 0),
+        datetime.datetime(2023, 5, 5, 5, 5, 5),
+    ]),
+    'text': pd.Series([
+        'Nie zgadzam się z #Sejm',
+        'This is the best day',
+        'Spotkanie z @jan_kowalski w Krakowie',
+        None,
+    ], dtype="string"),
+})
+
+
+@pytest.mark.parametrize(
+    "criterion, expected_mask",
+    [
+        (DateRangeCriterion("2022-01-01", "2022-01-31"), [True, True, False, False]),
+        (DateRangeCriterion(date_from="2022-02-01"), [False, False, True, True]),
+        (ClubCriterion(["X", "Y"]), [True, True, False, True]),
+        (PartyCriterion(["PZ"]), [False, False, True, False]),
+        (LengthCriterion(min_length=21), [True, False, True, False]),
+        (LengthCriterion(min_length=20, max_length=23), [True, True, False, False]),
+        (RegexCriterion(r"kraków"), [False, False, False, False]),
+        (RegexCriterion(r"krak", ignore_case=True), [False, False, True, False]),
+        (RegexCriterion(r"krak", ignore_case=True, present=False), [True, True, False, True]),
+        (HashtagCriterion(), [True, False, False, False]),
+        (MentionCriterion(), [False, False, True, False]),
+        (MentionCriterion(present=False), [True, True, False, True]),
+        (LanguageCriterion(["pl"]), [True, False, True, False]),
+        (LanguageCriterion(["en", "unknown"]), [False, True, False, True]),
+        (AllCriteria([ClubCriterion(["X"]), HashtagCriterion()]), [True, False, False, False]),
+        (AnyCriteria([HashtagCriterion(), MentionCriterion()]), [True, False, True, False]),
+        (NotCriterion(ClubCriterion(["X"])), [False, True, True, False]),
+    ])
+def test_criterion_mask(criterion, expected_mask):
+    assert criterion.compute_mask(frame).tolist() == expected_mask
+    assert criterion.describe()
+
+
+def test_detect_language_column():
+    assert detect_language_column(frame['text']).tolist() == ['pl', 'en', 'pl', 'unknown']
+
+
+@pytest.mark.parametrize("text_dtype", ["string", "string[pyarrow]"])
+def test_regex_criteria_use_python_re(text_dtype):
+    if text_dtype == "string[pyarrow]":
+        pytest.importorskip("pyarrow")
+    texts_frame = pd.DataFrame({
+        'text': pd.Series([
+            'Dziś w #Łódź',
+            'Mówię że tak',
+            'abab',
+            None,
+        ], dtype=text_dtype),
+    })
+
+    assert HashtagCriterion().compute_mask(texts_frame).tolist() == [True, False, False, False]
+    assert RegexCriterion(r"\bże\b").compute_mask(texts_frame).tolist() == [False, True, False, False]
+    assert RegexCriterion(r"(?<=a)b").compute_mask(texts_frame).tolist() == [False, False, True, False]
+    assert RegexCriterion(r"(ab)\1").compute_mask(texts_frame).tolist() == [False, False, True, False]
+    assert detect_language_column(texts_frame['text']).tolist() == ['pl', 'pl', 'unknown', 'unknown']
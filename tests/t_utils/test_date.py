@@ -1,4 +1,7 @@
 from aipolit.utils.date import get_now_text, get_today_text, text_to_date, date_to_text, text_to_datetime, datetime_to_text
+from aipolit.utils.date import texts_to_dates, texts_to_datetimes
+from datetime import datetime
+import numpy as np
 import re
 import pytest
 
@@ -48,3 +51,47 @@ def test_text_to_datetime_and_back(datetime_text, expected):
     actual_back_to_text = datetime_to_text(actual)
 
     assert actual_back_to_text == datetime_text
+
+
+def test_text_to_datetime_with_microseconds():
+    assert text_to_datetime("2022-12-13 13:14:59.123456") == datetime(2022, 12, 13, 13, 14, 59)
+
+
+@pytest.mark.parametrize(
+    "date_texts",
+    [
+        ["2022-01-01", "2022-12-13", "2022-01-01"],
+        ["2022-1-1", "2022-12-13"],
+        [],
+    ])
+def test_texts_to_dates(date_texts):
+    expected = [text_to_date(t) for t in date_texts]
+    assert texts_to_dates(date_texts) == expected
+    assert texts_to_dates(date_texts, as_numpy=True).tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "datetime_texts",
+    [
+        ["2022-01-01 01:02:03", "2022-12-13 13:14:59"],
+        ["2022-01-01 01:02:03", "2022-12-13 13:14:59.123456"],
+    ])
+def test_texts_to_datetimes(datetime_texts):
+    expected = [text_to_datetime(t) for t in datetime_texts]
+    assert texts_to_datetimes(datetime_texts) == expected
+
+    actual_np = texts_to_datetimes(datetime_texts, as_numpy=True)
+    assert actual_np.dtype == np.dtype('datetime64[s]')
+    assert actual_np.tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "datetime_texts",
+    [
+        ["2022-01-01 01:02:03", "NaT"],
+        ["2022-01-01T01:02:03"],
+        ["2022-13-01 01:02:03"],
+    ])
+def test_texts_to_datetimes_errors(datetime_texts):
+    with pytest.raises(ValueError):
+        texts_to_datetimes(datetime_texts)
@@ -0,0 +1,61 @@
+import io
+import os
+import gzip
+import json
+import tempfile
+import pytest
+from aipolit.utils.output_sink import BufferedOutputSink, ListOutputSink, open_output_sink
+
+
+class CountingWriter(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writelines_calls = 0
+
+    def writelines(self, lines):
+        self.writelines_calls += 1
+        super().writelines(lines)
+
+
+def test_buffered_output_sink():
+    writer = CountingWriter()
+    out_sink = BufferedOutputSink(writer, buffer_lines=4)
+    for i in range(10):
+        out_sink.put(f"line {i}")
+    assert writer.writelines_calls == 2, "lines are written only when buffer is full"
+    out_sink.close()
+    assert writer.writelines_calls == 3
+    assert not writer.closed, "filehandle not owned by the sink is not closed"
+    assert writer.getvalue() == "".join(f"line {i}\n" for i in range(10))
+
+
+def test_buffered_output_sink_jsonl():
+    writer = io.StringIO()
+    with BufferedOutputSink(writer, jsonl=True) as out_sink:
+        out_sink.put("Hańba!", {'speaker': 'Poseł Jan Nowak', 'date': '2024-02-21'})
+        out_sink.put_many(["Brawo!"])
+    assert [json.loads(line) for line in writer.getvalue().splitlines()] == [
+        {'text': 'Hańba!', 'speaker': 'Poseł Jan Nowak', 'date': '2024-02-21'},
+        {'text': 'Brawo!'},
+    ]
+
+
+def test_list_output_sink():
+    out_list = []
+    out_sink = ListOutputSink(out_list)
+    out_sink.put("a", {'speaker': 'X'})
+    out_sink.put_many(["b", "c"])
+    assert out_list == ["a", "b", "c"], "metadata is ignored without with_meta"
+
+
+@pytest.mark.parametrize("filename", ["dump.txt", "dump.txt.gz"])
+def test_open_output_sink(filename):
+    lines = [f"zdanie {i} żółć" for i in range(100)]
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        fp = os.path.join(tmpdirname, filename)
+        with open_output_sink(fp, buffer_lines=7) as out_sink:
+            out_sink.put_many(lines)
+
+        open_func = gzip.open if filename.endswith(".gz") else open
+        with open_func(fp, "rt", encoding='utf8') as f:
+            assert f.read().splitlines() == lines
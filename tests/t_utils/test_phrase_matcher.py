@@ -0,0 +1,57 @@
+import re
+import pytest
+
+from aipolit.utils.phrase_matcher import PhraseMatcher
+
+
+def find_all_with_regex(phrases, text):
+    searched_regex = re.compile(r"\b(?:" + "|".join(phrases) + r")\b", flags=re.IGNORECASE)
+    result = []
+    pos = 0
+    while True:
+        matched = searched_regex.search(text, pos=pos)
+        if not matched:
+            break
+        result.append((matched.start(), matched.end()))
+        pos = matched.start() + 1
+    return result
+
+
+@pytest.mark.parametrize(
+    "phrases, text, expected",
+    [
+        (['hańba'], "Hańba! HAŃBA, hańbą", [(0, 5, 0), (7, 12, 0)]),
+        (['hańb', 'hańba'], "hańba hańb", [(0, 5, 1), (6, 10, 0)]),
+        (['ha, ha', 'ha'], "Ha, ha, ha!", [(0, 6, 0), (4, 10, 0), (8, 10, 1)]),
+        (['polski rząd', 'rząd'], "Polski rząd i rządy", [(0, 11, 0), (7, 11, 1)]),
+        (['zdrada', 'zdrajca'], "zdradaa _zdrada zdrajca_", []),
+    ])
+def test_find_all(phrases, text, expected):
+    matcher = PhraseMatcher(phrases)
+    assert matcher.find_all(text) == expected
+
+
+@pytest.mark.parametrize(
+    "phrases, text",
+    [
+        (['a', 'ab', 'abc', 'bc', 'c'], "abc ab a bc c ABC"),
+        (['ąę', 'Ąę ął', 'ł'], "ąę ĄĘ ął ł ąęł"),
+        (['he', 'she', 'his', 'hers'], "ushers, she and his hers"),
+        (['1', '1 2', '2'], "1 2 12 1_2"),
+    ])
+def test_find_all_the_same_as_regex(phrases, text):
+    matcher = PhraseMatcher(phrases)
+    actual = [(start, end) for start, end, _ in matcher.find_all(text)]
+    assert actual == find_all_with_regex(phrases, text)
+
+
+def test_many_phrases():
+    phrases = [f"słowo{i}" for i in range(5000)]
+    matcher = PhraseMatcher(phrases)
+    text = "Słowo12 i słowo4999, ale nie słowo5000."
+    assert matcher.find_all(text) == [(0, 7, 12), (10, 19, 4999)]
+
+
+def test_empty_phrase():
+    with pytest.raises(ValueError):
+        PhraseMatcher(['a', ''])
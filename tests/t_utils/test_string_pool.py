@@ -0,0 +1,26 @@
+from aipolit.utils.string_pool import StringPool, NO_ID
+
+
+def test_string_pool():
+    pool = StringPool(["Oklaski", "Brawo!"])
+    assert pool.add("Oklaski") == 0, "existing string keeps its id"
+    assert pool.add("Głos z sali") == 2
+    assert len(pool) == 3
+    assert pool.get_string(1) == "Brawo!"
+
+    assert pool.find_id("Wesołość na sali") == NO_ID, "find_id does not add strings"
+    assert "Wesołość na sali" not in pool
+    assert pool.find_ids(["Głos z sali", "unknown", "Oklaski"]) == [2, 0]
+
+    assert pool.add_optional(None) == NO_ID
+    assert pool.get_string(NO_ID) is None
+
+
+def test_string_pool_intern():
+    pool = StringPool()
+    first = "".join(["Okla", "ski"])
+    second = "".join(["Ok", "laski"])
+    assert first is not second
+    assert pool.intern(first) is first
+    assert pool.intern(second) is first, "equal strings share one object"
+    assert pool.intern(None) is None